@@ -0,0 +1,174 @@
+# -*- coding: utf-8 -*-
+"""
+InterestEngine 与 Deposit.make_interests 的逐位一致性检查和基准测试
+
+    python -m benchmarks.interest_engine_check [-n 20000] [--seed 1]
+
+1. 一致性检查：随机生成 n 件存款（每件 1〜14 个 detail），对多个 base_date（月初/月中、UTC）
+   分别用 Deposit.make_interests 逐件计算和 InterestEngine.make_interests 批量计算，
+   interests（包括 amount 的字符串表示和 -0）与 is_deposit_end 必须完全相同；不一致时以非 0 退出。
+   生成的数据包括：
+   - 首月（deposit_begin 在 base_date 的上个月）：按日比例，以及 16日0点 ±1ms 存入的 detail
+   - 乘积超过 context 有效位数、正好落在 .5 上的 ROUND_HALF_EVEN 边界（前一位为奇数/偶数）
+   - amount/interest_rate 为 None、0、负数，deposit_limit 为空或早于 deposit_date
+2. 基准：逐件 Deposit.make_interests 与 InterestEngine.make_interests 的总耗时
+
+固定边界条件的测试在 tests/test_interest_engine.py（数据生成使用这里的 make_deposits / half_even_cases）
+"""
+import argparse
+import decimal
+import logging
+import random
+import sys
+import time
+from decimal import Decimal
+import pendulum
+from models.deposit import Deposit
+from models.deposit_detail import DepositDetail
+from models.interest_engine import InterestEngine
+from utils.timestamps import date_to_ms
+
+BASE_DATES = [
+    pendulum.datetime(2024, 2, 1, tz='Asia/Shanghai'),
+    pendulum.datetime(2024, 3, 15, tz='Asia/Shanghai'),
+    pendulum.datetime(2024, 6, 1, tz='Asia/Shanghai'),
+    pendulum.datetime(2024, 12, 1, tz='Asia/Shanghai'),
+    pendulum.datetime(2025, 1, 1, tz='Asia/Shanghai'),
+    pendulum.datetime(2025, 2, 1, tz='UTC'),
+    pendulum.datetime(2025, 3, 1, tz='Asia/Shanghai'),
+    pendulum.datetime(2025, 4, 2, tz='Asia/Shanghai'),
+]
+
+
+def half_even_cases() -> list[tuple[Decimal, Decimal]]:
+    """
+    (amount, interest_rate)：amount * rate 的系数为 prec + 1 位、末位正好是 5
+    E-1 时舍入会改变个位（前一位为偶数时不进位，为奇数时进位），整数部分不超过 quantize 的有效位数
+    """
+    prec = decimal.getcontext().prec
+    cases = []
+    for head in ("1234567890123456789012345678", "1234567890123456789012345677"):
+        head = head[:prec]
+        for exponent in (-1, -6):
+            amount = Decimal(f"{head}5E{exponent}")
+            cases += [(amount, Decimal('1')), (amount, Decimal('0.1')), (-amount, Decimal('1'))]
+    # amount * rate 在乘法时才产生 .5 的尾数
+    cases += [
+        (Decimal('2469135780246913578024691357'), Decimal('0.5')),
+        (Decimal('2469135780246913578024691355'), Decimal('0.5')),
+        (Decimal('1999999999999999999999999999'), Decimal('1.5')),
+        (Decimal('1999999999999999999999999997'), Decimal('1.5')),
+    ]
+    return cases
+
+
+def random_amount(rng: random.Random, edge_cases: list) -> tuple:
+    roll = rng.random()
+    if roll < 0.05:
+        return rng.choice(edge_cases)
+    amount = rng.choice([
+        None,
+        Decimal('0'),
+        Decimal(rng.randint(1, 10 ** 9)) / Decimal(10 ** rng.randint(0, 6)),
+        Decimal(str(rng.random() * 1e12)),
+        -Decimal(rng.randint(1, 10 ** 6)),
+    ])
+    rate = rng.choice([
+        None,
+        Decimal('0.0125'),
+        Decimal('0.003333333333333333333333333333'),
+        Decimal(str(rng.random())),
+    ])
+    return amount, rate
+
+
+def make_deposit(rng: random.Random, uid: int, begin: pendulum.DateTime, edge_cases: list) -> Deposit:
+    deposit = Deposit({"uid": uid, "id": 1, "deposit_begin": date_to_ms(begin) + rng.randint(0, 999), "status": "begin"})
+    details = []
+    for k in range(rng.randint(1, 14)):
+        month = begin.start_of('month').add(months=k)
+        sixteenth = month.add(days=15)
+        deposit_date = month.add(days=rng.randint(0, 27), hours=rng.randint(0, 23), seconds=rng.randint(0, 3599))
+        roll = rng.random()
+        if roll < 0.1:
+            deposit_date = sixteenth
+        elif roll < 0.2:
+            deposit_date = sixteenth.subtract(microseconds=1000)
+        amount, rate = random_amount(rng, edge_cases)
+        limit = deposit_date.add(days=rng.randint(-3, 30))
+        details.append(DepositDetail({
+            "uid": uid,
+            "id": 1,
+            "installment": f"{month.year:04d}/{month.month:02d}",
+            "deposit_date": date_to_ms(deposit_date),
+            "amount": amount,
+            "interest_rate": rate,
+            "deposit_limit": date_to_ms(limit) if rng.random() < 0.9 else None,
+        }))
+    deposit.init_details(details)
+    return deposit
+
+
+def make_deposits(n: int, seed: int) -> list[Deposit]:
+    rng = random.Random(seed)
+    edge_cases = half_even_cases()
+    first_month_begins = [base.in_timezone('Asia/Shanghai').start_of('month').subtract(months=1) for base in BASE_DATES]
+    deposits = []
+    for uid in range(n):
+        if rng.random() < 0.3:
+            # 首月：base_date 的上个月内开始
+            begin = rng.choice(first_month_begins).add(days=rng.randint(0, 27), hours=rng.randint(0, 23))
+        else:
+            begin = pendulum.datetime(2024, rng.randint(1, 12), rng.randint(1, 28), rng.randint(0, 23), tz='Asia/Shanghai')
+        deposits.append(make_deposit(rng, uid, begin, edge_cases))
+    return deposits
+
+
+def same_result(expected: tuple, actual: tuple) -> bool:
+    expected_interests, expected_end = expected
+    interests, is_deposit_end = actual
+    return expected_end == is_deposit_end and len(expected_interests) == len(interests) and all(
+        e == a and str(e["amount"]) == str(a["amount"]) for e, a in zip(expected_interests, interests)
+    )
+
+
+def check(logger, deposits: list[Deposit]) -> tuple[int, int]:
+    compared = 0
+    failures = 0
+    for base_date in BASE_DATES:
+        results = InterestEngine(logger, base_date).make_interests(deposits)
+        for deposit, actual in zip(deposits, results):
+            expected = deposit.make_interests(base_date, logger)
+            compared += len(expected[0])
+            if not same_result(expected, actual):
+                failures += 1
+                print(f"{base_date} deposit {deposit.uid}-{deposit.id} mismatch: expected {expected}, got {actual}")
+    return compared, failures
+
+
+def bench(label: str, func) -> float:
+    started = time.perf_counter()
+    func()
+    elapsed = time.perf_counter() - started
+    print(f"{label:40s} {elapsed:.3f}s")
+    return elapsed
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("-n", type=int, default=20000)
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+
+    logger = logging.getLogger("interest_engine_check")
+    logger.setLevel(logging.WARNING)
+
+    deposits = make_deposits(args.n, args.seed)
+    compared, failures = check(logger, deposits)
+    print(f"equivalence: {len(deposits)} deposits x {len(BASE_DATES)} base dates, {compared} interests, {failures} mismatches")
+
+    base_date = pendulum.datetime(2025, 3, 1, tz='Asia/Shanghai')
+    bench("Deposit.make_interests (per deposit)", lambda: [d.make_interests(base_date, logger) for d in deposits])
+    bench("InterestEngine.make_interests", lambda: InterestEngine(logger, base_date).make_interests(deposits))
+
+    sys.exit(1 if failures else 0)
@@ -0,0 +1,55 @@
+# -*- coding: utf-8 -*-
+"""
+unix 毫秒 <-> DateTime 转换的基准测试
+
+    python -m benchmarks.timestamp_benchmark [-n 200000]
+
+旧的 float 转换（pendulum.from_timestamp(ms / 1000.0) / int(timestamp() * 1e3)）
+与 utils.timestamps 的整数转换，以及 DepositDetail 构造（只比较毫秒，不访问 DateTime）。
+往返转换和 LazyDate 的测试在 tests/test_timestamps.py
+"""
+import argparse
+import random
+import time
+import pendulum
+from models.deposit_detail import DepositDetail
+from utils.timestamps import ms_to_date, date_to_ms
+
+
+def old_int_to_date(ms: int) -> pendulum.DateTime:
+    return pendulum.from_timestamp(ms / 1000.0, tz='Asia/Shanghai')
+
+
+def old_date_to_int(date: pendulum.DateTime) -> int:
+    return int(date.timestamp() * 1e3)
+
+
+def bench(label: str, func, values) -> float:
+    started = time.perf_counter()
+    for value in values:
+        func(value)
+    elapsed = time.perf_counter() - started
+    print(f"{label:36s} {len(values)} calls: {elapsed:.3f}s")
+    return elapsed
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("-n", type=int, default=200000)
+    args = parser.parse_args()
+
+    random.seed(1)
+    millis = [random.randint(1577808000000, 1893427200000) for _ in range(args.n)]
+    dates = [ms_to_date(ms) for ms in millis]
+
+    bench("before int_to_date (float)", old_int_to_date, millis)
+    bench("after ms_to_date", ms_to_date, millis)
+    bench("before date_to_int (float)", old_date_to_int, dates)
+    bench("after date_to_ms", date_to_ms, dates)
+
+    rows = [
+        {"uid": i, "id": 1, "installment": "2025/01", "deposit_date": ms, "amount": 100, "interest_rate": "0.01", "deposit_limit": ms + 86400000}
+        for i, ms in enumerate(millis)
+    ]
+    bench("DepositDetail + compare ms", lambda row: DepositDetail(row).deposit_date_ms > 0, rows)
+    bench("DepositDetail + DateTime access", lambda row: DepositDetail(row).deposit_date, rows)
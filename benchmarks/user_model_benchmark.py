@@ -0,0 +1,107 @@
+# -*- coding: utf-8 -*-
+"""
+User 模型构建的基准测试：从 row tuple 构建 10 万个 User，对比旧的全字段即时转换版本
+
+    python -m benchmarks.user_model_benchmark [-n 100000]
+"""
+import argparse
+import gc
+import json
+import random
+import time
+import tracemalloc
+from decimal import Decimal
+from typing import Optional
+from models.user import User
+from utils.utils import Utils
+
+COLUMNS = (
+    "id", "name", "email", "phone", "invitation", "login_id", "point", "balance", "loan", "demand_balance",
+    "can_lend", "can_borrow", "parent", "parent_divid", "wallet", "audited_usdt", "audited_trx", "score",
+    "risk_level", "hacking_event", "detail_list", "risk_detail", "system_admin_id",
+)
+
+
+class EagerUser:
+    """改动前的 User：构造时转换全部金额字段并解析 JSON"""
+
+    def __init__(self, data: dict):
+        utils = Utils()
+        self.id: int = data.get("id")
+        self.name: str = data.get("name")
+        self.email: str = data.get("email")
+        self.phone: str = data.get("phone")
+        self.invitation: str = data.get("invitation")
+        self.login_id: Optional[str] = data.get("login_id")
+        self.point: Decimal = utils.safe_decimal(data.get("point")) or Decimal('0')
+        self.balance: Decimal = utils.safe_decimal(data.get("balance")) or Decimal('0')
+        self.loan: Decimal = utils.safe_decimal(data.get("loan")) or Decimal('0')
+        self.demand_balance: Decimal = utils.safe_decimal(data.get("demand_balance")) or Decimal('0')
+        self.can_lend: bool = data.get("can_lend", False)
+        self.can_borrow: bool = data.get("can_borrow", False)
+        self.parent: Optional[int] = data.get("parent")
+        self.parent_divid: Optional[Decimal] = utils.safe_decimal(data.get("parent_divid"))
+        self.wallet: Optional[str] = data.get("wallet")
+        self.audited_usdt: Decimal = utils.safe_decimal(data.get("audited_usdt")) or Decimal('0')
+        self.audited_trx: Decimal = utils.safe_decimal(data.get("audited_trx")) or Decimal('0')
+        self.score: Optional[int] = data.get("score")
+        self.risk_level: Optional[str] = data.get("risk_level")
+        self.hacking_event: Optional[str] = data.get("hacking_event")
+        detail_list_str = data.get("detail_list")
+        if detail_list_str:
+            try:
+                self.detail_list = json.loads(detail_list_str) if isinstance(detail_list_str, str) else detail_list_str
+            except (json.JSONDecodeError, TypeError):
+                self.detail_list = None
+        else:
+            self.detail_list = None
+        risk_detail_str = data.get("risk_detail")
+        if risk_detail_str:
+            try:
+                self.risk_detail = json.loads(risk_detail_str) if isinstance(risk_detail_str, str) else risk_detail_str
+            except (json.JSONDecodeError, TypeError):
+                self.risk_detail = None
+        else:
+            self.risk_detail = None
+        self.system_admin_id: Optional[int] = data.get("system_admin_id")
+        self.children: list = []
+
+
+def make_rows(n: int) -> list[tuple]:
+    random.seed(0)
+    rows = []
+    for i in range(1, n + 1):
+        rows.append((
+            i, f"user{i}", f"user{i}@example.com", "0000", f"inv{i}", f"login{i}",
+            Decimal(random.randint(0, 10 ** 8)), Decimal(random.randint(0, 10 ** 8)), Decimal(0), Decimal(random.randint(0, 10 ** 6)),
+            True, True, random.randint(1, i) if i > 1 else None, Decimal("0.100000"), f"T{i:033d}",
+            Decimal(random.randint(0, 10 ** 9)), Decimal(random.randint(0, 10 ** 9)), random.randint(0, 100),
+            "low", None, json.dumps(["exchange", "defi"]), json.dumps([{"type": "aml", "score": 10}]), None,
+        ))
+    return rows
+
+
+def measure(cls, rows: list[tuple]) -> tuple[float, int]:
+    gc.collect()
+    tracemalloc.start()
+    started = time.perf_counter()
+    users = [cls(dict(zip(COLUMNS, row))) for row in rows]
+    # batch 路径只访问这几个字段
+    for user in users:
+        user.id, user.parent, user.parent_divid, user.point
+    elapsed = time.perf_counter() - started
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del users
+    return elapsed, current
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("-n", type=int, default=100000)
+    args = parser.parse_args()
+
+    rows = make_rows(args.n)
+    for label, cls in (("before (eager)", EagerUser), ("after (__slots__ + lazy)", User)):
+        elapsed, memory = measure(cls, rows)
+        print(f"{label:28s} {args.n} users: {elapsed:.3f}s, {memory / 1024 / 1024:.1f} MiB")
@@ -31,3 +31,38 @@ risk_api_endpoints = {
     "moderate": "http://172.31.50.211:8081/api/collections/collect2",  # 中级API endpoint
     "high": "http://172.31.50.211:8081/api/collections/collect"  # 高级API endpoint
 }
+
+# MistTrack 风险评估结果缓存
+risk_cache = {
+    "max_size": 10000,  # 进程内最多缓存的条目数（LRU 淘汰）
+    "wallet_ttl": 1800,  # 钱包风险的有效秒数；交易风险扫描后不再变化，永久缓存
+}
+
+# MistTrack API（RiskService）
+misttrack = {
+    "qps": 5,  # 套餐允许的每秒请求数（令牌桶的补充速度）
+    "burst": 5,  # 令牌桶容量
+    "retry_max_delay": 30,  # 重试退避的最大秒数
+    "window": 20,  # assess_many 同时在途的风险评估任务数
+}
+
+# TronGrid API（WalletService），限流按 Key 独立计算，增加 Key 即可提高吞吐量
+trongrid = {
+    "api_keys": [
+        "109a39a3-a6d6-4483-bcf4-7b3267bdf395",
+        "4bc45d3c-41a7-45d3-b8e1-c5b9632ae9fb",
+    ],
+    "qps_per_key": 5,  # 每个 Key 的每秒请求数
+    "burst": 5,  # 每个 Key 的令牌桶容量
+    "cooldown": 30,  # 收到 429 且没有 Retry-After 时该 Key 的冷却秒数
+}
+
+# 对外 HTTP 请求（utils.http_client.HttpClient）
+# 调用方传数值 timeout 时，该值只作为读取超时，连接超时取 min(connect_timeout, timeout)：
+# MistTrack(30) / TronGrid(10) / Slack(10) 的连接超时因此是 5 秒（之前与读取超时相同），连接不上时更早进入各自的重试。
+# 需要更长连接超时的调用传 (连接, 读取) 的 tuple，例如 monitoring 的归集 API 传 (300, 300)。
+http_client = {
+    "pool_maxsize": 16,  # 每个主机保留的 keep-alive 连接数
+    "connect_timeout": 5,  # 连接超时秒数（数值 timeout 时的上限）
+    "read_timeout": 30,  # 默认的读取超时秒数
+}
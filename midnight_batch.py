@@ -1,6 +1,7 @@
 # -*- coding: utf-8 -*-
 import logging.config
 import argparse
+import itertools
 import uuid
 import traceback
 import time
@@ -10,6 +11,9 @@ import base as base
 import pendulum
 from decimal import Decimal
 from models.lp_exception import LPException
+from models.ledger import Ledger
+from models.user_hierarchy import AncestorIndex
+from models.interest_engine import InterestEngine
 from services.db_service import DBService
 from services.user_service import UserService
 from services.deposit_service import DepositService
@@ -19,168 +23,138 @@ from services.borrowing_service import BorrowingService
 from services.user_fund_flow_service import UserFundFlowService
 from services.riskService import RiskService
 from services.notification_service import NotificationService
-from utils.utils import Utils
+from services.batch_run_service import BatchRunService
+from utils.timestamps import date_to_ms, ms_to_date, now_ms
 
-def monthly(logger, mode, base_date, conn):
-    logger.info(f"monthly: {base_date}")
-    deposit_service = DepositService(logger)
+# monthlyで一度に利息計算するdeposit件数
+MONTHLY_CHUNK_SIZE = 1000
+
+def flush_ledger(logger, conn, ledger: Ledger, process: str):
+    """
+    把 ledger 里累积的资金流水和各用户的净变动一次性写入数据库，并用返回的余额重新同步 ledger
+    """
     user_service = UserService(logger)
     user_fund_flow_service = UserFundFlowService(logger)
+
+    for flow_process, flows in ledger.take_flows():
+        user_fund_flow_service.save_deposit_interest_flows(conn, flows, 0, flow_process)
+        logger.info(f"保存了 {len(flows)} 条资金流水记录 ({flow_process})")
+
+    point_deltas = ledger.take_point_deltas()
+    if point_deltas:
+        ledger.sync_points(user_service.credit_points_bulk(conn, point_deltas, 0, process))
+        logger.info(f"成功更新 {len(point_deltas)} 个用户的point")
+
+    demand_balance_deltas = ledger.take_demand_balance_deltas()
+    if demand_balance_deltas:
+        ledger.sync_demand_balances(user_service.update_demand_balances_bulk(conn, demand_balance_deltas, 0, process))
+        logger.info(f"成功更新 {len(demand_balance_deltas)} 个用户的demand_balance")
+
+def monthly(logger, mode, base_date, conn, ledger: Ledger):
+    logger.info(f"monthly: {base_date}")
+    deposit_service = DepositService(logger)
     
-    # ユーザー情報を取得
-    users = user_service.get_users(conn)
-    users_dict = {user.id: user for user in users}
-    
-    deposits = deposit_service.get_deposits(conn)
-    
-    user_interest_totals = {}
     all_interests = []
-    deposit_interest_flows = []
     
-    for deposit in deposits:
-        deposit_service.get_deposit_details(conn, deposit)
-        interests, is_deposit_end = deposit.make_interests(base_date, logger)
-        logger.info(f"deposit {deposit.id} 利息: {interests}")
+    engine = InterestEngine(logger, base_date)
+    
+    # 利息が発生し得るdepositだけを、detailsと一緒に2本のクエリでストリーミングし、
+    # chunk単位でまとめて利息を計算する
+    deposits_iter = deposit_service.iter_interest_deposits(conn, base_date)
+    while True:
+        chunk = list(itertools.islice(deposits_iter, MONTHLY_CHUNK_SIZE))
+        if not chunk:
+            break
+        results = engine.make_interests(chunk)
+        
+        for deposit, (interests, is_deposit_end) in zip(chunk, results):
+            logger.info(f"deposit {deposit.id} 利息: {interests}")
         
-        all_interests.extend(interests)
+            all_interests.extend(interests)
         
-        # deposit単位でinterestsのamountを合計
-        deposit_total_interest = Decimal('0')
-        for interest in interests:
-            uid = interest["uid"]
-            amount = interest["amount"]
-            if uid not in user_interest_totals:
-                user_interest_totals[uid] = Decimal('0')
-            user_interest_totals[uid] = user_interest_totals[uid] + Decimal(amount)
-            deposit_total_interest += Decimal(amount)
+            # deposit単位でinterestsのamountを合計し、ledgerに記帳（balance_afterもledgerが計算）
+            deposit_total_interest = Decimal('0')
+            for interest in interests:
+                deposit_total_interest += Decimal(interest["amount"])
         
-        # deposit単位でuser_fund_flowを作成
-        if deposit_total_interest > 0:
-            user = users_dict.get(deposit.uid)
-            if user:
-                balance_after = user.point + deposit_total_interest
-                flow = {
-                    "user_id": deposit.uid,
-                    "fund_type": "POINT",
-                    "action": "brothers_deposit_interest",
-                    "amount": deposit_total_interest,
-                    "balance_after": balance_after,
-                    "related_fund_type": None,
-                    "related_amount": None,
-                    "remark": "存款利息",
-                    "related_flow_id": None,
-                    "counter_side": None
-                }
-                deposit_interest_flows.append(flow)
-                
-                # ユーザーのpointを更新（次のdepositの計算で使用）
-                user.point = balance_after
+            if deposit_total_interest > 0:
+                ledger.credit(deposit.uid, deposit_total_interest, "brothers_deposit_interest", "存款利息",
+                              "batch.monthly_deposit_interest_flows")
         
-        # 預金が終了した場合、ステータスを更新
-        if is_deposit_end:
-            logger.info(f"deposit {deposit.uid}, {deposit.id} が終了しました。ステータスを更新します。")
-            deposit_service.update_deposit_status(conn, deposit.uid, deposit.id, 0, "batch.monthly")
+            # 預金が終了した場合、ステータスを更新
+            if is_deposit_end:
+                logger.info(f"deposit {deposit.uid}, {deposit.id} が終了しました。ステータスを更新します。")
+                deposit_service.update_deposit_status(conn, deposit.uid, deposit.id, 0, "batch.monthly")
 
     deposit_service.save_deposit_interests(conn, all_interests, 0, "batch.save_deposit_interests")
     
-    # user_fund_flowsを保存
-    if deposit_interest_flows:
-        user_fund_flow_service.save_deposit_interest_flows(conn, deposit_interest_flows, 0, "batch.monthly_deposit_interest_flows")
-        logger.info(f"保存了 {len(deposit_interest_flows)} 条存款利息资金流水记录")
-    
-    for uid, total_interest in user_interest_totals.items():
-        logger.info(f"用户 {uid} 获得利息总额: {total_interest}")
-        user_service.update_point(conn, uid, total_interest, 0, "batch.monthly_interest_update")
+    flush_ledger(logger, conn, ledger, "batch.monthly_interest_update")
+
+def overdue_checks(logger, mode, base_date, conn):
+    logger.info(f"overdue_checks: {base_date}")
+
+    check_deposit_details(logger, mode, base_date, conn)
 
-def borrow(logger, mode, base_date, conn):
+    BorrowingService(logger).update_interest_status(conn, base_date)
+
+def borrow(logger, mode, base_date, conn, ledger: Ledger, hierarchy: AncestorIndex = None):
     logger.info(f"borrow: {base_date}")
     borrowing_service = BorrowingService(logger)
-    borrowing_service.update_interest_status(conn, base_date)
 
-    user_service = UserService(logger)
-    user_fund_flow_service = UserFundFlowService(logger)
-    users_dict = user_service.get_related_users(conn)
+    # 上家链索引は1回の実行で1度だけ構築する（期間指定実行では日をまたいで使い回す）
+    if hierarchy is None:
+        hierarchy = AncestorIndex(logger, UserService(logger).get_user_hierarchy(conn))
     
-    all_incomes, all_flows = borrowing_service.distribute_incomes(conn, base_date, users_dict)
-    
-    if all_incomes:
-        user_income_totals = {}
-        for income in all_incomes:
-            uid = income['uid']
-            amount = Decimal(str(income['amount']))
-            if uid not in user_income_totals:
-                user_income_totals[uid] = Decimal('0')
-            user_income_totals[uid] = user_income_totals[uid] + amount
-        
-        for uid, total_income in user_income_totals.items():
-            logger.info(f"用户 {uid} 获得收入总额: {total_income}")
-            user_service.update_point(conn, uid, total_income, 0, "batch.distribute_incomes")
-        
-        logger.info(f"成功更新 {len(user_income_totals)} 个用户的余额")
+    borrowing_service.distribute_incomes(conn, base_date, hierarchy, ledger, "batch.borrow_flows")
     
-    # 处理flows的balance_after属性
-    if all_flows:
-        for flow in all_flows:
-            user_id = flow['user_id']
-            amount = Decimal(str(flow['amount']))
-            
-            if user_id in users_dict:
-                user = users_dict[user_id]
-                new_balance = user.point + amount
-                flow['balance_after'] = new_balance
-                user.point = new_balance
-        
-        # 保存flows到数据库
-        user_fund_flow_service.save_deposit_interest_flows(conn, all_flows, 0, "batch.borrow_flows")
-        logger.info(f"成功保存 {len(all_flows)} 条资金流水记录")
+    flush_ledger(logger, conn, ledger, "batch.distribute_incomes")
     
 def check_deposit_details(logger, mode, base_date, conn):
     logger.info(f"check_deposit_details: {base_date}")
     
     deposit_service = DepositService(logger)
-    utils = Utils()
-    
-    # NDYステータスの預金詳細を取得
-    ndy_details = deposit_service.get_ndy_deposit_details(conn)
-    
-    if not ndy_details:
-        logger.info("NDYステータスの預金詳細がありません")
-        return
-    
-    logger.info(f"NDYステータスの預金詳細 {len(ndy_details)} 件をチェックします")
     
     # 使用传入的base_date而不是真实时间，以支持测试场景
-    current_time = base_date
-    overdue_count = 0
-    
-    for detail in ndy_details:
-        if detail.deposit_limit is None:
+    current_ms = date_to_ms(base_date)
+    ndy_count = 0
+    overdue_details = []
+    
+    # NDYステータスの預金詳細をストリーミングでチェック
+    for detail in deposit_service.iter_ndy_deposit_details(conn):
+        ndy_count += 1
+        if detail.deposit_limit_ms is None:
             logger.warning(f"預金詳細 {detail.uid}-{detail.id}-{detail.installment} の期限日が設定されていません")
             continue
         
         # 現在時刻が期限日を過ぎているかチェック
-        if current_time > detail.deposit_limit:
+        if current_ms > detail.deposit_limit_ms:
             logger.info(f"預金詳細 {detail.uid}-{detail.id}-{detail.installment} が期限切れです。期限日: {detail.deposit_limit}")
-            
-            try:
-                deposit_service.update_deposit_detail_status(
-                    conn, 
-                    detail.uid, 
-                    detail.id, 
-                    detail.installment, 
-                    "overdue", 
-                    0, 
-                    "batch.check_deposit_details"
-                )
-                overdue_count += 1
-                logger.info(f"預金詳細 {detail.uid}-{detail.id}-{detail.installment} のステータスを overdue に更新しました")
-            except Exception as e:
-                logger.error(f"預金詳細 {detail.uid}-{detail.id}-{detail.installment} のステータス更新に失敗しました: {str(e)}")
+            overdue_details.append(detail)
+    
+    if ndy_count == 0:
+        logger.info("NDYステータスの預金詳細がありません")
+        return
+    
+    logger.info(f"NDYステータスの預金詳細 {ndy_count} 件をチェックしました")
+    
+    # 期限切れの預金詳細をまとめて overdue に更新する
+    overdue_count = 0
+    if overdue_details:
+        try:
+            overdue_count = deposit_service.update_deposit_detail_statuses(
+                conn,
+                overdue_details,
+                "overdue",
+                0,
+                "batch.check_deposit_details"
+            )
+        except Exception as e:
+            logger.error(f"預金詳細 {len(overdue_details)} 件のステータス更新に失敗しました: {str(e)}")
     
     logger.info(f"期限切れの預金詳細 {overdue_count} 件のステータスを更新しました")
 
 
-def process_demands(logger, mode, base_date, conn):
+def process_demands(logger, mode, base_date, conn, ledger: Ledger):
     """
     处理已到期的demand存款
     - 当base_date > demand_end时，处理status='begin'的记录：
@@ -190,8 +164,6 @@ def process_demands(logger, mode, base_date, conn):
     logger.info(f"process_demands: {base_date}")
     
     demand_service = DemandService(logger)
-    user_service = UserService(logger)
-    user_fund_flow_service = UserFundFlowService(logger)
     
     # 获取所有已到期的demand记录
     expired_demands = demand_service.get_expired_demands(conn, base_date)
@@ -202,18 +174,12 @@ def process_demands(logger, mode, base_date, conn):
     
     logger.info(f"找到 {len(expired_demands)} 条已到期的demand存款需要处理")
     
-    # 获取所有用户信息
-    users = user_service.get_users(conn)
-    users_dict = {user.id: user for user in users}
-    
-    interest_flows = []
-    deposit_end_flows = []
+    done_demands = []
     
     for demand in expired_demands:
         logger.info(f"处理demand: uid={demand.uid}, id={demand.id}, status={demand.status.value}, amount={demand.amount}, interest={demand.interest}")
         
-        user = users_dict.get(demand.uid)
-        if not user:
+        if demand.uid not in ledger:
             logger.warning(f"用户 {demand.uid} 不存在，跳过处理")
             continue
         
@@ -223,82 +189,89 @@ def process_demands(logger, mode, base_date, conn):
         
         # 处理利息支付（所有查询到的demand都是status='begin'，需要支付利息）
         if demand.interest is not None and demand.interest > 0:
-            # 更新用户point（加上利息）
-            user_service.update_point(conn, demand.uid, demand.interest, 0, "batch.process_demands_interest")
+            ledger.credit(demand.uid, demand.interest, "brothers_demand_interest", "活期存款利息",
+                          "batch.process_demands_interest_flows")
+            # 逐笔取整（与每笔调用 update_point 时相同）
+            ledger.settle(demand.uid)
             logger.info(f"用户 {demand.uid} 获得利息: {demand.interest}")
-            
-            # 更新内存中的用户对象，用于计算balance_after
-            user.point = user.point + demand.interest
-            
-            # 创建资金流水记录
-            balance_after = user.point
-            interest_flow = {
-                "user_id": demand.uid,
-                "fund_type": "POINT",
-                "action": "brothers_demand_interest",
-                "amount": demand.interest,
-                "balance_after": balance_after,
-                "related_fund_type": None,
-                "related_amount": None,
-                "remark": "活期存款利息",
-                "related_flow_id": None,
-                "counter_side": None
-            }
-            interest_flows.append(interest_flow)
         
-        # 处理存款退还
-        # 更新用户point（加上存款金额）
-        user_service.update_point(conn, demand.uid, demand.amount, 0, "batch.process_demands_deposit_end")
+        # 处理存款退还：point加上存款金额，demand_balance减去存款金额
+        ledger.credit(demand.uid, demand.amount, "brothers_demand_deposit_end", "活期存款结束退还",
+                      "batch.process_demands_deposit_end_flows")
+        ledger.settle(demand.uid)
         logger.info(f"用户 {demand.uid} 退还存款: {demand.amount}")
         
-        # 更新用户demand_balance（减去存款金额）
-        user_service.update_demand_balance(conn, demand.uid, demand.amount, 0, "batch.process_demands_deposit_end")
+        ledger.debit_demand_balance(demand.uid, demand.amount)
         logger.info(f"用户 {demand.uid} demand_balance减少: {demand.amount}")
         
-        # 更新内存中的用户对象，用于计算balance_after
-        user.point = user.point + demand.amount
-        user.demand_balance = user.demand_balance - demand.amount
-        
-        # 创建资金流水记录
-        balance_after = user.point
-        deposit_end_flow = {
-            "user_id": demand.uid,
-            "fund_type": "POINT",
-            "action": "brothers_demand_deposit_end",
-            "amount": demand.amount,
-            "balance_after": balance_after,
-            "related_fund_type": None,
-            "related_amount": None,
-            "remark": "活期存款结束退还",
-            "related_flow_id": None,
-            "counter_side": None
-        }
-        deposit_end_flows.append(deposit_end_flow)
-        
-        # 更新demand状态为done
-        demand_service.update_demand_status(conn, demand.uid, demand.id, "done", 0, "batch.process_demands")
-        logger.info(f"demand {demand.uid}-{demand.id} 状态已更新为done")
+        done_demands.append(demand)
     
-    # 保存资金流水记录
-    if interest_flows:
-        user_fund_flow_service.save_deposit_interest_flows(conn, interest_flows, 0, "batch.process_demands_interest_flows")
-        logger.info(f"保存了 {len(interest_flows)} 条demand利息资金流水记录")
+    # 更新demand状态为done（一次性批量更新）
+    if done_demands:
+        done_count = demand_service.update_demand_statuses(conn, done_demands, "done", 0, "batch.process_demands")
+        logger.info(f"{done_count} 条demand状态已更新为done")
     
-    if deposit_end_flows:
-        user_fund_flow_service.save_deposit_interest_flows(conn, deposit_end_flows, 0, "batch.process_demands_deposit_end_flows")
-        logger.info(f"保存了 {len(deposit_end_flows)} 条demand存款结束资金流水记录")
+    flush_ledger(logger, conn, ledger, "batch.process_demands")
     
     logger.info(f"成功处理 {len(expired_demands)} 条已到期的demand存款")
 
 
-def daily(logger, mode, base_date, conn):
-    logger.info(f"daily: {base_date}")
+def build_phases(logger, mode, base_date, conn, ledger: Ledger, hierarchy: AncestorIndex = None) -> list:
+    """
+    base_date 要执行的阶段列表 [(阶段名, 函数)]，按顺序执行
+    - monthly_interests: 每月第一天的存款利息
+    - overdue_checks: 存款明细/借款利息的逾期检查
+    - interest_distribution: 借款利息分配
+    - demand_settlement: 到期活期存款结算
+    """
+    phases = []
+    if base_date.day == 1:
+        phases.append(("monthly_interests", lambda: monthly(logger, mode, base_date, conn, ledger)))
+    phases += [
+        ("overdue_checks", lambda: overdue_checks(logger, mode, base_date, conn)),
+        ("interest_distribution", lambda: borrow(logger, mode, base_date, conn, ledger, hierarchy)),
+        ("demand_settlement", lambda: process_demands(logger, mode, base_date, conn, ledger)),
+    ]
+    return phases
 
-    check_deposit_details(logger, mode, base_date, conn)
-    
-    borrow(logger, mode, base_date, conn)
-    
-    process_demands(logger, mode, base_date, conn)
+def run_phases(logger, mode, base_date, conn, ledger: Ledger, hierarchy: AncestorIndex = None):
+    """
+    逐个阶段执行并各自提交；batch_run_steps 里已完成的阶段跳过。
+    阶段失败时回滚该阶段、记录错误后重新抛出异常（之前已提交的阶段不受影响）
+    """
+    batch_run_service = BatchRunService(logger)
+    business_date = base_date.format('YYYY-MM-DD')
+
+    batch_run_service.start_run(conn, business_date)
+    done_phases = batch_run_service.get_done_phases(conn, business_date)
+    conn.commit(holdConnection=True)
+
+    for phase, func in build_phases(logger, mode, base_date, conn, ledger, hierarchy):
+        if phase in done_phases:
+            logger.info(f"[{business_date}] {phase} は完了済みのためスキップします")
+            continue
+
+        started_at = now_ms()
+        logger.info(f"[{business_date}] {phase} begin")
+        try:
+            func()
+            batch_run_service.complete_step(conn, business_date, phase, started_at)
+            conn.commit(holdConnection=True)
+        except BaseException as e:
+            error = f"[{e.error_function}][{e.error_detail}]" if isinstance(e, LPException) else str(e)
+            try:
+                conn.rollback(holdConnection=True)
+                batch_run_service.fail_step(conn, business_date, phase, started_at, error)
+                batch_run_service.finish_run(conn, business_date, BatchRunService.STATUS_FAILED, f"{phase}: {error}")
+                conn.commit(holdConnection=True)
+            except LPException as journal_error:
+                logger.error(f"[{business_date}] {phase} の失敗を記録できませんでした")
+                journal_error.print()
+            raise
+        logger.info(f"[{business_date}] {phase} done: {now_ms() - started_at}ms")
+
+    batch_run_service.finish_run(conn, business_date, BatchRunService.STATUS_DONE)
+    conn.commit(holdConnection=True)
 
 def run(logger, mode, test_date: pendulum.DateTime = None):
     """
@@ -314,6 +287,8 @@ def run(logger, mode, test_date: pendulum.DateTime = None):
 
     try:
         db_service = DBService(logger, mode)
+        # 同じ形のupdate/insertを大量に実行するので、サーバー側でPREPAREして再利用する
+        db_service.enable_prepared_statements()
         conn = db_service.get_connection()
 
         # 如果提供了测试日期，使用它；否则使用当前时间
@@ -323,42 +298,93 @@ def run(logger, mode, test_date: pendulum.DateTime = None):
         else:
             current_time = pendulum.now()
         
-        unix_milliseconds = int(current_time.timestamp() * 1000)
-
-        utils = Utils()
-        converted_date = utils.int_to_date(unix_milliseconds)
+        unix_milliseconds = date_to_ms(current_time)
+        converted_date = ms_to_date(unix_milliseconds)
         date_only = converted_date.start_of('day')
         logger.info(f"当前时间Unix毫秒: {unix_milliseconds}, 转换后日期: {converted_date}, 仅日期: {date_only}")
         
-        # 如果是每月第一天，执行monthly方法
-        if date_only.day == 1:
-            monthly(logger, mode, date_only, conn)
+        BatchRunService(logger).ensure_tables(conn)
+        conn.commit(holdConnection=True)
+
+        # 本次运行共用的记账簿：余额只在这里读取一次，各阶段结束时批量写回
+        ledger = Ledger(logger, UserService(logger).get_user_points(conn))
 
-        daily(logger, mode, date_only, conn)
+        # 各阶段独立提交，重跑同一日期时跳过已完成的阶段
+        run_phases(logger, mode, date_only, conn, ledger)
 
+        logger.info(f"statement cache: {conn.statement_cache_stats()}")
         conn.commit()
+        conn = None
     except LPException as e:
         logger.info("===================midnight_batch error===================")
         e.print()
-        if conn is not None:
-            conn.rollback()
 
     except (KeyboardInterrupt, SystemExit) as e:
         logger.info("===================midnight_batch error===================")
         logger.error(e)
-        if conn is not None:
-            conn.rollback()
 
     except Exception as e:
         logger.info("===================midnight_batch error===================")
         logger.error(e)
-        if conn is not None:
-            conn.rollback()
     
     finally:
+        if conn is not None and conn.conn is not None:
+            conn.rollback()
         logger.info("===================midnight_batch run completed===================")
 
 
+def run_range(logger, mode, date_from: pendulum.DateTime, date_to: pendulum.DateTime):
+    """
+    按日期顺序补跑 [date_from, date_to] 的 batch（每月1日执行monthly，每天执行daily的各阶段）
+
+    连接、用户余额（ledger）和用户层级只在开始时读取一次，之后在内存里跨日期沿用；
+    每个阶段各自提交，中途失败时停止，之前已完成的日期/阶段重跑时会被跳过
+    """
+    logger.info(f"===================midnight_batch range begin: {date_from.format('YYYY/MM/DD')} - {date_to.format('YYYY/MM/DD')}===================")
+    conn = None
+
+    try:
+        db_service = DBService(logger, mode)
+        db_service.enable_prepared_statements()
+        conn = db_service.get_connection()
+
+        BatchRunService(logger).ensure_tables(conn)
+        conn.commit(holdConnection=True)
+
+        user_service = UserService(logger)
+        ledger = Ledger(logger, user_service.get_user_points(conn))
+        hierarchy = AncestorIndex(logger, user_service.get_user_hierarchy(conn))
+
+        base_date = date_from.start_of('day')
+        end_date = date_to.start_of('day')
+        days = 0
+        while base_date <= end_date:
+            run_phases(logger, mode, base_date, conn, ledger, hierarchy)
+            days += 1
+            base_date = base_date.add(days=1)
+
+        logger.info(f"{days} 日分の処理が完了しました")
+        logger.info(f"statement cache: {conn.statement_cache_stats()}")
+        conn.commit()
+        conn = None
+    except LPException as e:
+        logger.info("===================midnight_batch error===================")
+        e.print()
+
+    except (KeyboardInterrupt, SystemExit) as e:
+        logger.info("===================midnight_batch error===================")
+        logger.error(e)
+
+    except Exception as e:
+        logger.info("===================midnight_batch error===================")
+        logger.error(e)
+
+    finally:
+        if conn is not None and conn.conn is not None:
+            conn.rollback()
+        logger.info("===================midnight_batch range completed===================")
+
+
 if __name__ == "__main__":
     # 解析命令行参数（包括测试日期参数）
     parser = argparse.ArgumentParser()
@@ -376,6 +402,10 @@ if __name__ == "__main__":
     )
     parser.add_argument("-t", "--test-date", dest="test_date", default=None,
                        help="测试日期，格式: YYYY/MM/DD，用于测试场景（仅dev模式，生产环境无效）")
+    parser.add_argument("--from", dest="date_from", default=None,
+                       help="补跑开始日期，格式: YYYY/MM/DD（与--to一起使用，按日期顺序执行后退出）")
+    parser.add_argument("--to", dest="date_to", default=None,
+                       help="补跑结束日期（包含），格式: YYYY/MM/DD，省略时与--from相同")
     parser.add_argument("-n", "--appName", dest="appName", help="app name")
     args = parser.parse_args()
     
@@ -398,7 +428,19 @@ if __name__ == "__main__":
             logger.error("期望格式: YYYY/MM/DD，将使用当前时间执行")
             test_date = None
     
-    if mode == "dev":
+    if args.date_from:
+        try:
+            date_from = pendulum.parse(args.date_from, tz='Asia/Shanghai').start_of('day')
+            date_to = pendulum.parse(args.date_to or args.date_from, tz='Asia/Shanghai').start_of('day')
+        except Exception as e:
+            logger.error(f"期间日期格式错误: {args.date_from} - {args.date_to}, 错误: {str(e)}")
+            raise SystemExit(1)
+        if date_from > date_to:
+            logger.error(f"--from {args.date_from} 晚于 --to {args.date_to}")
+            raise SystemExit(1)
+        run_range(logger, mode, date_from, date_to)
+        logger.info("===================midnight_batch end===================")
+    elif mode == "dev":
         run(logger, mode, test_date)
         logger.info("===================midnight_batch end===================")
     else:
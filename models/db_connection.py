@@ -1,17 +1,96 @@
 # -*- coding: utf-8 -*-
 from xmlrpc.client import boolean
+import io
+import uuid
 import psycopg2
 import psycopg2.extras
 import pendulum
 from decimal import Decimal
 from typing import Any
 from models.lp_exception import LPException
+from models.statement_cache import StatementCache, to_positional
+from utils.timestamps import date_to_ms, now_ms
+
+
+class _CopyRowStream(io.TextIOBase):
+    """
+    COPY FROM STDIN 用的只读流，按需从行生成器中取出文本行，
+    不需要先把整个批次拼成一个大字符串
+    """
+
+    def __init__(self, lines):
+        self._lines = iter(lines)
+        self._buffer = ""
+
+    def readable(self):
+        return True
+
+    def read(self, size=-1):
+        if size is None or size < 0:
+            data = self._buffer + "".join(self._lines)
+            self._buffer = ""
+            return data
+        while len(self._buffer) < size:
+            line = next(self._lines, None)
+            if line is None:
+                break
+            self._buffer += line
+        data, self._buffer = self._buffer[:size], self._buffer[size:]
+        return data
+
+    def readline(self, size=-1):
+        return self.read(size)
 
 
 class DBConnection:
-    def __init__(self, logger, conn: psycopg2.extensions.connection):
+    # 表名 -> {列名: 类型}，update_many 生成带类型转换的 VALUES 时使用（进程内共享）
+    _column_types_cache: dict = {}
+
+    # insert/insert_update/update/delete 的 SQL 模板缓存（进程内共享）
+    statement_cache = StatementCache()
+
+    def __init__(self, logger, conn: psycopg2.extensions.connection, pool=None, prepare: bool = False):
         self.logger = logger
         self.conn = conn
+        # 连接池模式下，commit/rollback 时归还连接而不是关闭
+        self.pool = pool
+        # True 时缓存的写语句在该物理连接上 PREPARE，之后用 EXECUTE 执行
+        self.prepare = prepare
+        # 同一个事务（unit of work）内的审计时间戳只取一次
+        self._now_ms = None
+
+    @classmethod
+    def statement_cache_stats(cls) -> dict:
+        """SQL 模板缓存的命中/未命中次数等统计"""
+        return cls.statement_cache.stats()
+
+    def _audit_now(self) -> int:
+        """当前事务的审计时间戳（unix 毫秒），commit/rollback 后重新取得"""
+        if self._now_ms is None:
+            self._now_ms = now_ms()
+        return self._now_ms
+
+    def _execute_cached(self, cur, key: tuple, builder, values):
+        """
+        按 key 从缓存取得（或生成）SQL 后执行；
+        prepare 模式下首次在该连接上 PREPARE，之后以 EXECUTE 执行
+        """
+        cache = DBConnection.statement_cache
+        sql = cache.get(key, builder)
+        if not self.prepare or not values:
+            cur.execute(sql, values)
+            return sql
+        name = cache.prepared_name(self.conn, key)
+        if name is None:
+            name = cache.register_prepared(self.conn, key)
+            try:
+                cur.execute(f"prepare {name} as {to_positional(sql)}")
+            except Exception:
+                cache.forget_prepared(self.conn, key)
+                raise
+        cur.execute(f"execute {name} (" + ", ".join(["%s"] * len(values)) + ")", values)
+        cache.prepared_executions += 1
+        return sql
 
     def _convert_value_for_db(self, value):
         """
@@ -21,8 +100,8 @@ class DBConnection:
         - その他の値はそのまま返す
         """
         if isinstance(value, pendulum.DateTime):
-            # pendulum型をunixミリ秒に変換
-            return int(value.timestamp() * 1000)
+            # pendulum型をunixミリ秒に変換（floatを経由しない整数演算）
+            return date_to_ms(value)
         elif isinstance(value, Decimal):
             # Decimal型はそのまま渡して精度を保持
             return value
@@ -42,28 +121,16 @@ class DBConnection:
         try:
             if self.conn is None:
                 raise LPException(self.logger, "DBConnection.select", "数据库连接为空")
-            cur = self.conn.cursor(cursor_factory=psycopg2.extras.DictCursor)
+            # psycopg2 已经把 numeric 列转换为 Decimal，直接返回 RealDictRow（dict 子类），不再逐单元格复制
+            cur = self.conn.cursor(cursor_factory=psycopg2.extras.RealDictCursor)
             if params != "":
                 cur.execute(sql, params)
             else:
                 cur.execute(sql)
             self.logger.debug(cur.query.decode('utf-8') if hasattr(cur, 'query') and cur.query else sql)
             results = cur.fetchall()
-            
-            # DECIMAL型の項目をDecimal型に変換
-            converted_results = []
-            for row in results:
-                converted_row = {}
-                for key, value in row.items():
-                    # psycopg2のDecimal型を検出して変換
-                    if hasattr(value, '__class__') and value.__class__.__name__ == 'Decimal':
-                        converted_row[key] = Decimal(str(value))
-                    else:
-                        converted_row[key] = value
-                converted_results.append(converted_row)
-            
             cur.close()
-            return converted_results
+            return results
         except Exception as e:
             raise LPException(
                 self.logger,
@@ -71,50 +138,117 @@ class DBConnection:
                 str(e) + ", " + sql + ", " + ",".join(str(p) for p in params) if params else str(e) + ", " + sql,
             )
 
+    def select_rows(self, sql: str, params: Any = None, row_type=None) -> list:
+        """
+        按 SQL 中声明的列顺序读取结果，返回 tuple（指定 row_type 时为 namedtuple）列表，
+        不创建 dict，也不做额外的类型转换
+        """
+        try:
+            if self.conn is None:
+                raise LPException(self.logger, "DBConnection.select_rows", "数据库连接为空")
+            cur = self.conn.cursor()
+            cur.execute(sql, params)
+            self.logger.debug(cur.query.decode('utf-8') if hasattr(cur, 'query') and cur.query else sql)
+            results = cur.fetchall()
+            cur.close()
+            if row_type is not None:
+                make = row_type._make
+                return [make(row) for row in results]
+            return results
+        except LPException:
+            raise
+        except Exception as e:
+            raise LPException(
+                self.logger,
+                "DBConnection.select_rows",
+                str(e) + ", " + sql + ", " + ",".join(str(p) for p in params) if params else str(e) + ", " + sql,
+            )
+
+    def select_iter(self, sql: str, params: Any = None, itersize: int = 2000, row_type=None):
+        """
+        使用服务端命名游标逐批读取结果（每次从服务器取 itersize 行），
+        以生成器方式返回 DictRow（指定 row_type 时为 namedtuple），内存占用与结果集大小无关
+
+        注意: 命名游标只在当前事务内有效，迭代结束前不要 commit/rollback
+        """
+        if self.conn is None:
+            raise LPException(self.logger, "DBConnection.select_iter", "数据库连接为空")
+        cur = None
+        try:
+            name = f"select_iter_{uuid.uuid4().hex}"
+            if row_type is not None:
+                cur = self.conn.cursor(name=name)
+            else:
+                cur = self.conn.cursor(name=name, cursor_factory=psycopg2.extras.DictCursor)
+            cur.itersize = itersize
+            cur.execute(sql, params)
+            self.logger.debug(cur.query.decode('utf-8') if hasattr(cur, 'query') and cur.query else sql)
+            if row_type is not None:
+                make = row_type._make
+                for row in cur:
+                    yield make(row)
+            else:
+                for row in cur:
+                    yield row
+        except LPException:
+            raise
+        except GeneratorExit:
+            raise
+        except Exception as e:
+            raise LPException(
+                self.logger,
+                "DBConnection.select_iter",
+                str(e) + ", " + sql + ", " + ",".join(str(p) for p in params) if params else str(e) + ", " + sql,
+            )
+        finally:
+            if cur is not None and not cur.closed and not self.conn.closed:
+                try:
+                    cur.close()
+                except Exception:
+                    pass
+
+    def execute(self, sql: str, params: Any = None) -> int:
+        """执行不返回结果集的 SQL（DDL、自定义 update 等），返回影响行数"""
+        try:
+            if self.conn is None:
+                raise LPException(self.logger, "DBConnection.execute", "数据库连接为空")
+            cur = self.conn.cursor()
+            cur.execute(sql, params)
+            self.logger.debug(cur.query.decode('utf-8') if hasattr(cur, 'query') and cur.query else sql)
+            count = cur.rowcount
+            cur.close()
+            return count
+        except LPException:
+            raise
+        except Exception as e:
+            raise LPException(self.logger, "DBConnection.execute", f"{e}, {sql}")
+
     def insert(self, table: str, json, user=None, process=None):
         try:
             if self.conn is None:
                 raise LPException(self.logger, "DBConnection.insert", "数据库连接为空")
             # JSONデータの値をDB用に変換
             processed_json = self._process_json_values(json)
-            
-            columnsString = ""
-            valuesString = ""
-            values = []
-
-            for key, value in processed_json.items():
-                if columnsString == "":
-                    columnsString += '"' + key + '"'
-                    valuesString += "%s"
-                else:
-                    columnsString += ', "' + key + '"'
-                    valuesString += ", %s"
-                values.append(value)
-
-            now = int(pendulum.now().timestamp() * 1000)  # 毫秒精度に変更
-            if user is not None and process is not None:
-                common = {
-                    "create_by": user,
-                    "create_at": now,
-                    "create_with": process,
-                    "update_by": user,
-                    "update_at": now,
-                    "update_with": process,
-                }
-                for key, value in common.items():
-                    if columnsString == "":
-                        columnsString += '"' + key + '"'
-                        valuesString += "%s"
-                    else:
-                        columnsString += ', "' + key + '"'
-                        valuesString += ", %s"
-                    values.append(value)
+            columns = tuple(processed_json.keys())
+            values = list(processed_json.values())
+
+            with_common = user is not None and process is not None
+            if with_common:
+                now = self._audit_now()
+                values += [user, now, process, user, now, process]
+
+            def build():
+                all_columns = list(columns)
+                if with_common:
+                    all_columns += ["create_by", "create_at", "create_with", "update_by", "update_at", "update_with"]
+                columnsString = ", ".join('"' + key + '"' for key in all_columns)
+                valuesString = ", ".join(["%s"] * len(all_columns))
+                return 'insert into "{0}" ({1}) values ({2})'.format(
+                    table, columnsString, valuesString
+                )
 
-            sql = 'insert into "{0}" ({1}) values ({2})'.format(
-                table, columnsString, valuesString
-            )
             cur = self.conn.cursor()
-            cur.execute(sql, values)
+            sql = self._execute_cached(cur, ("insert", table, columns, with_common), build, values)
             self.logger.debug(cur.query.decode('utf-8') if hasattr(cur, 'query') and cur.query else sql)
             cur.close()
         except Exception as e:
@@ -128,54 +262,36 @@ class DBConnection:
                 raise LPException(self.logger, "DBConnection.insert_update", "数据库连接为空")
             # JSONデータの値をDB用に変換
             processed_json = self._process_json_values(json)
-            
-            columnsString = ""
-            valuesString = ""
-            values = []
-            updateString = ""
-
-            for key, value in processed_json.items():
-                if columnsString == "":
-                    columnsString += '"' + key + '"'
-                    valuesString += "%s"
-                else:
-                    columnsString += ', "' + key + '"'
-                    valuesString += ", %s"
-                values.append(value)
-
-            now = int(pendulum.now().timestamp() * 1000)  # 毫秒精度に変更
-            if user is not None and process is not None:
-                common = {
-                    "create_by": user,
-                    "create_at": now,
-                    "create_with": process,
-                    "update_by": user,
-                    "update_at": now,
-                    "update_with": process,
-                }
-                for key, value in common.items():
-                    if columnsString == "":
-                        columnsString += '"' + key + '"'
-                        valuesString += "%s"
-                    else:
-                        columnsString += ', "' + key + '"'
-                        valuesString += ", %s"
-                    values.append(value)
-
-            updateString = ", ".join(
-                [
-                    f'"{key}" = EXCLUDED."{key}"'
-                    for key in processed_json.keys()
-                    if key not in key_json.keys()
-                ]
-            )
-            sql = (
-                'insert into "{0}" ({1}) values ({2}) on conflict do update set {3}'.format(
-                    table, columnsString, valuesString, updateString
+            columns = tuple(processed_json.keys())
+            key_columns = tuple(key_json.keys())
+            values = list(processed_json.values())
+
+            with_common = user is not None and process is not None
+            if with_common:
+                now = self._audit_now()
+                values += [user, now, process, user, now, process]
+
+            def build():
+                all_columns = list(columns)
+                if with_common:
+                    all_columns += ["create_by", "create_at", "create_with", "update_by", "update_at", "update_with"]
+                columnsString = ", ".join('"' + key + '"' for key in all_columns)
+                valuesString = ", ".join(["%s"] * len(all_columns))
+                updateString = ", ".join(
+                    [
+                        f'"{key}" = EXCLUDED."{key}"'
+                        for key in columns
+                        if key not in key_columns
+                    ]
                 )
-            )
+                return (
+                    'insert into "{0}" ({1}) values ({2}) on conflict do update set {3}'.format(
+                        table, columnsString, valuesString, updateString
+                    )
+                )
+
             cur = self.conn.cursor()
-            cur.execute(sql, values)
+            sql = self._execute_cached(cur, ("insert_update", table, columns, key_columns, with_common), build, values)
             self.logger.debug(cur.query.decode('utf-8') if hasattr(cur, 'query') and cur.query else sql)
             cur.close()
         except Exception as e:
@@ -192,7 +308,7 @@ class DBConnection:
             columnsString = ""
             valuesString = ""
             insert_value = []
-            now = int(pendulum.now().timestamp() * 1000)  # 毫秒精度に変更
+            now = self._audit_now()
             common = {
                 "create_by": user,
                 "create_at": now,
@@ -236,44 +352,104 @@ class DBConnection:
                 self.logger, "DBConnection.insertMany {}".format(table), f"{e}"
             )
 
+    def _copy_text_value(self, value) -> str:
+        """COPY text 格式的单元格编码（NULL 为 \\N，Decimal 保持原有精度）"""
+        if value is None:
+            return "\\N"
+        if isinstance(value, bool):
+            return "t" if value else "f"
+        if isinstance(value, Decimal):
+            # 指数形式（如 1E+2）无法写入整数列，统一展开为定点表示
+            return format(value, "f")
+        if isinstance(value, pendulum.DateTime):
+            value = self._convert_value_for_db(value)
+        text = str(value)
+        if "\\" in text or "\t" in text or "\n" in text or "\r" in text:
+            text = text.replace("\\", "\\\\").replace("\t", "\\t").replace("\n", "\\n").replace("\r", "\\r")
+        return text
+
+    def bulk_insert(self, table: str, rows: list, user=None, process=None, is_master: bool = False,
+                    use_copy: bool = True, page_size: int = 1000) -> int:
+        """
+        批量插入，默认使用 COPY ... FROM STDIN 一次性流式写入，
+        use_copy=False 时退回到 execute_values 按页插入
+
+        - 列以第一行的 key 为准，其余行缺少的列写入 NULL
+        - 审计列（create_by/create_at/...）在整个批次中只计算一次，不修改传入的 dict
+        - Decimal 按原精度写入
+        """
+        try:
+            if self.conn is None:
+                raise LPException(self.logger, "DBConnection.bulk_insert", "数据库连接为空")
+            if not rows:
+                return 0
+
+            columns = list(rows[0].keys())
+            audit_values = []
+            if is_master == False:
+                now = self._audit_now()
+                audit_columns = ["create_by", "create_at", "create_with", "update_by", "update_at", "update_with"]
+                audit_values = [user, now, process, user, now, process]
+                columns = [c for c in columns if c not in audit_columns] + audit_columns
+                data_columns = columns[:-len(audit_columns)]
+            else:
+                data_columns = columns
+            columns_string = ", ".join('"' + c + '"' for c in columns)
+
+            cur = self.conn.cursor()
+            if use_copy:
+                audit_text = [self._copy_text_value(v) for v in audit_values]
+                encode = self._copy_text_value
+
+                def lines():
+                    for row in rows:
+                        cells = [encode(row.get(c)) for c in data_columns]
+                        cells.extend(audit_text)
+                        yield "\t".join(cells) + "\n"
+
+                sql = 'copy "{0}" ({1}) from stdin'.format(table, columns_string)
+                cur.copy_expert(sql, _CopyRowStream(lines()))
+            else:
+                convert = self._convert_value_for_db
+                values = [[convert(row.get(c)) for c in data_columns] + audit_values for row in rows]
+                sql = 'insert into "{0}" ({1}) values %s'.format(table, columns_string)
+                psycopg2.extras.execute_values(cur, sql, values, page_size=page_size)
+            self.logger.debug(f"bulk_insert {table}: {len(rows)} rows ({'copy' if use_copy else 'execute_values'})")
+            cur.close()
+            return len(rows)
+        except LPException:
+            raise
+        except Exception as e:
+            raise LPException(
+                self.logger, "DBConnection.bulk_insert {}".format(table), f"{e}"
+            )
+
     def update(self, table: str, keys, json, user: int, process: str, is_master=False):
         try:
             if self.conn is None:
                 raise LPException(self.logger, "DBConnection.update", "数据库连接为空")
             # JSONデータの値をDB用に変換
             processed_json = self._process_json_values(json)
-            
-            setString = ""
-            whereString = ""
-            values = []
-
-            for key, value in processed_json.items():
-                if setString == "":
-                    setString += '"' + key + '" = %s'
-                else:
-                    setString += ', "' + key + '" = %s'
-                values.append(value)
-
-            now = int(pendulum.now().timestamp() * 1000)  # 毫秒精度に変更
-            if is_master == False:
-                common = {"update_by": user, "update_at": now, "update_with": process}
-                for key, value in common.items():
-                    if setString == "":
-                        setString += '"' + key + '" = %s'
-                    else:
-                        setString += ', "' + key + '" = %s'
-                    values.append(value)
-
-            for key, value in keys.items():
-                if whereString == "":
-                    whereString += '"' + key + '" = %s'
-                else:
-                    whereString += ' and "' + key + '" = %s'
-                values.append(value)
-            sql = 'update "{0}" set {1} where {2} '.format(table, setString, whereString)
+            columns = tuple(processed_json.keys())
+            key_columns = tuple(keys.keys())
+            values = list(processed_json.values())
+
+            with_common = is_master == False
+            if with_common:
+                values += [user, self._audit_now(), process]
+            values += list(keys.values())
+
+            def build():
+                set_columns = list(columns)
+                if with_common:
+                    set_columns += ["update_by", "update_at", "update_with"]
+                setString = ", ".join('"' + key + '" = %s' for key in set_columns)
+                whereString = " and ".join('"' + key + '" = %s' for key in key_columns)
+                return 'update "{0}" set {1} where {2} '.format(table, setString, whereString)
 
             cur = self.conn.cursor()
-            count = cur.execute(sql, values)
+            sql = self._execute_cached(cur, ("update", table, columns, key_columns, with_common), build, values)
+            count = cur.rowcount
             self.logger.debug(cur.query.decode('utf-8') if hasattr(cur, 'query') and cur.query else sql)
             cur.close()
             return count
@@ -282,22 +458,213 @@ class DBConnection:
                 self.logger, "DBConnection.update {}".format(table), f"{e}"
             )
 
+    def increment(self, table: str, keys, deltas, user: int, process: str, is_master=False):
+        """
+        在 SQL 内原子地加算数值列：col = trunc(coalesce(col, 0) + delta)（切り捨て到整数，等同于 ROUND_DOWN），
+        一次往返完成更新并通过 returning 返回更新后的值
+
+        参数:
+            table: 表名
+            keys: 主键 dict
+            deltas: {列名: 增量} 的 dict（减算时传负数）
+            user: 操作用户ID
+            process: 操作过程标识
+            is_master: True 时不更新 update_by/update_at/update_with
+
+        返回:
+            dict: {列名: 更新后的值}，没有匹配的行时返回 None
+        """
+        try:
+            if self.conn is None:
+                raise LPException(self.logger, "DBConnection.increment", "数据库连接为空")
+            columns = tuple(deltas.keys())
+            key_columns = tuple(keys.keys())
+            values = [self._convert_value_for_db(v) for v in deltas.values()]
+
+            with_common = is_master == False
+            if with_common:
+                values += [user, self._audit_now(), process]
+            values += list(keys.values())
+
+            def build():
+                set_parts = ['"{0}" = trunc(coalesce("{0}", 0) + %s)'.format(c) for c in columns]
+                if with_common:
+                    set_parts += ['"update_by" = %s', '"update_at" = %s', '"update_with" = %s']
+                whereString = " and ".join('"' + key + '" = %s' for key in key_columns)
+                returningString = ", ".join('"' + c + '"' for c in columns)
+                return 'update "{0}" set {1} where {2} returning {3}'.format(
+                    table, ", ".join(set_parts), whereString, returningString
+                )
+
+            cur = self.conn.cursor()
+            sql = self._execute_cached(cur, ("increment", table, columns, key_columns, with_common), build, values)
+            self.logger.debug(cur.query.decode('utf-8') if hasattr(cur, 'query') and cur.query else sql)
+            row = cur.fetchone()
+            cur.close()
+            if row is None:
+                return None
+            return dict(zip(columns, row))
+        except LPException:
+            raise
+        except Exception as e:
+            raise LPException(
+                self.logger, "DBConnection.increment {}".format(table), f"{e}"
+            )
+
+    def _column_types(self, table: str) -> dict:
+        types = DBConnection._column_types_cache.get(table)
+        if types is None:
+            cur = self.conn.cursor()
+            cur.execute(
+                """select a.attname, format_type(a.atttypid, a.atttypmod)
+                   from pg_attribute a
+                   where a.attrelid = %s::regclass and a.attnum > 0 and not a.attisdropped""",
+                ('"' + table + '"',),
+            )
+            types = dict(cur.fetchall())
+            cur.close()
+            DBConnection._column_types_cache[table] = types
+        return types
+
+    def update_many(self, table: str, key_columns, rows: list, user: int, process: str, is_master=False,
+                    page_size: int = 1000) -> int:
+        """
+        用一条 update ... from (values ...) 语句批量更新多行，返回更新的行数
+
+        参数:
+            table: 表名
+            key_columns: 主键列名列表，例如 ["uid", "id"]
+            rows: dict 列表，每个 dict 包含主键列和要更新的列（所有行的列需一致）
+            user: 操作用户ID
+            process: 操作过程标识
+            is_master: True 时不更新 update_by/update_at/update_with
+            page_size: 每条语句包含的最大行数
+        """
+        try:
+            if self.conn is None:
+                raise LPException(self.logger, "DBConnection.update_many", "数据库连接为空")
+            if not rows:
+                return 0
+
+            key_columns = list(key_columns)
+            set_columns = [c for c in rows[0].keys() if c not in key_columns]
+            if not set_columns:
+                raise LPException(self.logger, "DBConnection.update_many", "no columns to update")
+            columns = key_columns + set_columns
+
+            # VALUES 里的字面量没有类型，按目标列类型显式转换，避免 NULL/字符串 推断成 text
+            types = self._column_types(table)
+            template = "(" + ", ".join("%s::" + types[c] if c in types else "%s" for c in columns) + ")"
+
+            set_parts = ['"{0}" = v."{0}"'.format(c) for c in set_columns]
+            params = []
+            if is_master == False:
+                now = self._audit_now()
+                set_parts += ['"update_by" = %s', '"update_at" = %s', '"update_with" = %s']
+                params = [user, now, process]
+            where_string = " and ".join('t."{0}" = v."{0}"'.format(c) for c in key_columns)
+            columns_string = ", ".join('"' + c + '"' for c in columns)
+
+            cur = self.conn.cursor()
+            count = 0
+            for start in range(0, len(rows), page_size):
+                page = rows[start:start + page_size]
+                values_string = ",".join(
+                    cur.mogrify(template, [self._convert_value_for_db(row.get(c)) for c in columns]).decode("utf-8")
+                    for row in page
+                )
+                sql = 'update "{0}" as t set {1} from (values {2}) as v ({3}) where {4}'.format(
+                    table, ", ".join(set_parts), values_string.replace("%", "%%"), columns_string, where_string
+                )
+                cur.execute(sql, params)
+                count += cur.rowcount
+            self.logger.debug(f"update_many {table}: {len(rows)} rows, {count} updated")
+            cur.close()
+            return count
+        except LPException:
+            raise
+        except Exception as e:
+            raise LPException(
+                self.logger, "DBConnection.update_many {}".format(table), f"{e}"
+            )
+
+    def increment_many(self, table: str, key_columns, rows: list, user: int, process: str, is_master=False,
+                       page_size: int = 1000) -> list:
+        """
+        increment 的批量版：用一条 update ... from (values ...) 语句对多行加算，
+        col = trunc(coalesce(col, 0) + v.col)，返回更新后的行（dict，包含主键列和加算列）
+
+        参数:
+            table: 表名
+            key_columns: 主键列名列表
+            rows: dict 列表，每个 dict 包含主键列和增量列（所有行的列需一致，同一主键不能重复）
+            user: 操作用户ID
+            process: 操作过程标识
+            is_master: True 时不更新 update_by/update_at/update_with
+            page_size: 每条语句包含的最大行数
+        """
+        try:
+            if self.conn is None:
+                raise LPException(self.logger, "DBConnection.increment_many", "数据库连接为空")
+            if not rows:
+                return []
+
+            key_columns = list(key_columns)
+            delta_columns = [c for c in rows[0].keys() if c not in key_columns]
+            if not delta_columns:
+                raise LPException(self.logger, "DBConnection.increment_many", "no columns to increment")
+            columns = key_columns + delta_columns
+
+            types = self._column_types(table)
+            template = "(" + ", ".join("%s::" + types[c] if c in types else "%s" for c in columns) + ")"
+
+            set_parts = ['"{0}" = trunc(coalesce(t."{0}", 0) + v."{0}")'.format(c) for c in delta_columns]
+            params = []
+            if is_master == False:
+                now = self._audit_now()
+                set_parts += ['"update_by" = %s', '"update_at" = %s', '"update_with" = %s']
+                params = [user, now, process]
+            where_string = " and ".join('t."{0}" = v."{0}"'.format(c) for c in key_columns)
+            columns_string = ", ".join('"' + c + '"' for c in columns)
+            returning_string = ", ".join('t."' + c + '"' for c in columns)
+
+            cur = self.conn.cursor(cursor_factory=psycopg2.extras.RealDictCursor)
+            result = []
+            for start in range(0, len(rows), page_size):
+                page = rows[start:start + page_size]
+                values_string = ",".join(
+                    cur.mogrify(template, [self._convert_value_for_db(row.get(c)) for c in columns]).decode("utf-8")
+                    for row in page
+                )
+                sql = 'update "{0}" as t set {1} from (values {2}) as v ({3}) where {4} returning {5}'.format(
+                    table, ", ".join(set_parts), values_string.replace("%", "%%"), columns_string, where_string,
+                    returning_string
+                )
+                cur.execute(sql, params)
+                result.extend(dict(r) for r in cur.fetchall())
+            self.logger.debug(f"increment_many {table}: {len(rows)} rows, {len(result)} updated")
+            cur.close()
+            return result
+        except LPException:
+            raise
+        except Exception as e:
+            raise LPException(
+                self.logger, "DBConnection.increment_many {}".format(table), f"{e}"
+            )
+
     def delete(self, table: str, keys):
         try:
             if self.conn is None:
                 raise LPException(self.logger, "DBConnection.delete", "数据库连接为空")
-            whereString = ""
-            values = []
-            for key, value in keys.items():
-                if whereString == "":
-                    whereString += '"' + key + '" = %s'
-                else:
-                    whereString += ' and "' + key + '" = %s'
-                values.append(value)
-            sql = 'delete from "{0}" where {1} '.format(table, whereString)
+            key_columns = tuple(keys.keys())
+            values = list(keys.values())
+
+            def build():
+                whereString = " and ".join('"' + key + '" = %s' for key in key_columns)
+                return 'delete from "{0}" where {1} '.format(table, whereString)
 
             cur = self.conn.cursor()
-            count = cur.execute(sql, values)
+            sql = self._execute_cached(cur, ("delete", table, key_columns), build, values)
             self.logger.debug(cur.query.decode('utf-8') if hasattr(cur, 'query') and cur.query else sql)
             cur.close()
         except Exception as e:
@@ -305,26 +672,46 @@ class DBConnection:
                 self.logger, "DBConnection.delete {}".format(table), f"{e}"
             )
 
+    def _close(self):
+        """关闭连接；连接池模式下归还到连接池（已断开的连接会被丢弃）"""
+        if self.pool is not None:
+            if self.conn.closed:
+                self.pool.discard(self.conn)
+            else:
+                self.pool.release(self.conn)
+        else:
+            self.conn.close()
+        self.conn = None
+
     def commit(self, holdConnection: bool = False):
         try:
             if self.conn:
                 self.conn.commit()
+                self._now_ms = None
                 if holdConnection == False:
-                    self.conn.close()
-                    self.conn = None
+                    self._close()
             else:
                 raise Exception("already closed")
         except Exception as e:
+            self._discard_if_broken()
             raise LPException(self.logger, "DBConnection.commit", f"{e}")
 
     def rollback(self, holdConnection: bool = False):
         try:
             if self.conn:
                 self.conn.rollback()
+                self._now_ms = None
+                DBConnection.statement_cache.forget_connection(self.conn)
                 if holdConnection == False:
-                    self.conn.close()
-                    self.conn = None
+                    self._close()
             else:
                 raise Exception("already closed")
         except Exception as e:
+            self._discard_if_broken()
             raise LPException(self.logger, "DBConnection.rollback", f"{e}")
+
+    def _discard_if_broken(self):
+        """socket 断开等导致连接不可用时，从连接池中丢弃，下次借出时会重新建连"""
+        if self.pool is not None and self.conn is not None and self.conn.closed:
+            self.pool.discard(self.conn)
+            self.conn = None
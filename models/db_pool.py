@@ -0,0 +1,199 @@
+# -*- coding: utf-8 -*-
+import threading
+import time
+import psycopg2
+import psycopg2.extensions
+from models.lp_exception import LPException
+
+
+class _PooledConnection:
+    """池内的一条物理连接及其生命周期信息"""
+
+    def __init__(self, conn: psycopg2.extensions.connection):
+        self.conn = conn
+        self.created_at = time.monotonic()
+        self.last_used_at = self.created_at
+
+
+class DBConnectionPool:
+    """
+    psycopg2 物理连接池（线程安全）
+
+    - min_size: 启动时预先建立的连接数
+    - max_size: 同时借出的最大连接数，超过时等待归还
+    - max_lifetime: 连接最大存活秒数，超过后归还时关闭并重建
+    - health_check_idle: 闲置超过该秒数的连接在借出前执行 select 1 检查
+    - checkout_timeout: 等待空闲连接的最长秒数
+    """
+
+    def __init__(self, logger, connect, min_size: int = 1, max_size: int = 5, max_lifetime: float = 3600.0,
+                 health_check_idle: float = 30.0, checkout_timeout: float = 30.0):
+        if min_size < 0 or max_size < 1 or min_size > max_size:
+            raise LPException(logger, "DBConnectionPool.__init__", f"invalid pool size min={min_size} max={max_size}")
+        self.logger = logger
+        self._connect = connect
+        self.min_size = min_size
+        self.max_size = max_size
+        self.max_lifetime = max_lifetime
+        self.health_check_idle = health_check_idle
+        self.checkout_timeout = checkout_timeout
+
+        self._idle: list[_PooledConnection] = []
+        self._in_use: dict[int, _PooledConnection] = {}
+        self._cond = threading.Condition(threading.Lock())
+        self._closed = False
+        self._pending = 0
+
+        # 统计信息
+        self._checkouts = 0
+        self._wait_count = 0
+        self._wait_time_total = 0.0
+        self._wait_time_max = 0.0
+        self._created = 0
+        self._discarded = 0
+        self._health_check_failures = 0
+
+        for _ in range(min_size):
+            self._idle.append(self._new_connection())
+
+    def _new_connection(self) -> _PooledConnection:
+        pooled = _PooledConnection(self._connect())
+        self._created += 1
+        return pooled
+
+    def _is_expired(self, pooled: _PooledConnection, now: float) -> bool:
+        return self.max_lifetime is not None and now - pooled.created_at > self.max_lifetime
+
+    def _is_healthy(self, pooled: _PooledConnection, now: float) -> bool:
+        if pooled.conn.closed:
+            return False
+        if self.health_check_idle is None or now - pooled.last_used_at < self.health_check_idle:
+            return True
+        try:
+            cur = pooled.conn.cursor()
+            cur.execute("select 1")
+            cur.close()
+            pooled.conn.rollback()
+            return True
+        except Exception as e:
+            self._health_check_failures += 1
+            self.logger.warning(f"DBConnectionPool health check failed, reconnecting: {e}")
+            return False
+
+    def _discard(self, pooled: _PooledConnection):
+        self._discarded += 1
+        try:
+            if not pooled.conn.closed:
+                pooled.conn.close()
+        except Exception:
+            pass
+
+    def checkout(self) -> psycopg2.extensions.connection:
+        """借出一条可用连接，必要时新建或等待归还（建连和健康检查在锁外进行）"""
+        started = time.monotonic()
+        waited = False
+        while True:
+            pooled = None
+            with self._cond:
+                while True:
+                    if self._closed:
+                        raise LPException(self.logger, "DBConnectionPool.checkout", "pool is closed")
+                    if self._idle or len(self._in_use) + self._pending < self.max_size:
+                        break
+                    remaining = self.checkout_timeout - (time.monotonic() - started)
+                    if remaining <= 0:
+                        raise LPException(
+                            self.logger, "DBConnectionPool.checkout",
+                            f"no connection available within {self.checkout_timeout}s (max_size={self.max_size})")
+                    waited = True
+                    self._cond.wait(remaining)
+                if self._idle:
+                    pooled = self._idle.pop()
+                self._pending += 1
+
+            try:
+                now = time.monotonic()
+                if pooled is not None and (self._is_expired(pooled, now) or not self._is_healthy(pooled, now)):
+                    self._discard(pooled)
+                    pooled = None
+                if pooled is None and not self._idle:
+                    pooled = self._new_connection()
+            except Exception:
+                with self._cond:
+                    self._pending -= 1
+                    self._cond.notify()
+                raise
+            with self._cond:
+                self._pending -= 1
+                if pooled is not None:
+                    return self._lend(pooled, started, waited)
+                self._cond.notify()
+            # 坏连接被丢弃且仍有空闲连接时，重新走一遍借出流程
+
+    def _lend(self, pooled: _PooledConnection, started: float, waited: bool) -> psycopg2.extensions.connection:
+        wait_time = time.monotonic() - started
+        self._checkouts += 1
+        if waited:
+            self._wait_count += 1
+        self._wait_time_total += wait_time
+        self._wait_time_max = max(self._wait_time_max, wait_time)
+        self._in_use[id(pooled.conn)] = pooled
+        return pooled.conn
+
+    def release(self, conn: psycopg2.extensions.connection):
+        """归还连接；已断开、事务未结束或超过寿命的连接直接关闭"""
+        with self._cond:
+            pooled = self._in_use.pop(id(conn), None)
+            if pooled is None:
+                # 不是本池借出的连接
+                try:
+                    conn.close()
+                except Exception:
+                    pass
+                return
+            now = time.monotonic()
+            reusable = not self._closed and not conn.closed and not self._is_expired(pooled, now)
+            if reusable and conn.get_transaction_status() != psycopg2.extensions.TRANSACTION_STATUS_IDLE:
+                try:
+                    conn.rollback()
+                except Exception:
+                    reusable = False
+            if reusable:
+                pooled.last_used_at = now
+                self._idle.append(pooled)
+            else:
+                self._discard(pooled)
+            self._cond.notify()
+
+    def discard(self, conn: psycopg2.extensions.connection):
+        """丢弃损坏的连接（例如 socket 已断开）"""
+        with self._cond:
+            pooled = self._in_use.pop(id(conn), None)
+            if pooled is not None:
+                self._discard(pooled)
+            self._cond.notify()
+
+    def close(self):
+        with self._cond:
+            self._closed = True
+            for pooled in self._idle:
+                self._discard(pooled)
+            self._idle = []
+            self._cond.notify_all()
+
+    def stats(self) -> dict:
+        with self._cond:
+            return {
+                "min_size": self.min_size,
+                "max_size": self.max_size,
+                "active": len(self._in_use),
+                "idle": len(self._idle),
+                "checkouts": self._checkouts,
+                "waits": self._wait_count,
+                "wait_time_total": round(self._wait_time_total, 6),
+                "wait_time_avg": round(self._wait_time_total / self._checkouts, 6) if self._checkouts else 0.0,
+                "wait_time_max": round(self._wait_time_max, 6),
+                "created": self._created,
+                "discarded": self._discarded,
+                "health_check_failures": self._health_check_failures,
+            }
@@ -4,6 +4,7 @@ from typing import Optional
 from enum import Enum
 import pendulum
 from utils.utils import Utils
+from utils.timestamps import LazyDate
 
 
 class DemandStatus(Enum):
@@ -13,12 +14,15 @@ class DemandStatus(Enum):
 
 
 class Demand:
+    demand_begin = LazyDate("demand_begin_ms")
+    demand_end = LazyDate("demand_end_ms")
+
     def __init__(self, data: dict):
         self.uid: int = data.get("uid")  # type: ignore
         self.id: int = data.get("id")  # type: ignore
         utils = Utils()
-        self.demand_begin = utils.int_to_date(data.get("demand_begin"))
-        self.demand_end = utils.int_to_date(data.get("demand_end")) if data.get("demand_end") else None
+        self.demand_begin_ms: int = data.get("demand_begin")  # type: ignore
+        self.demand_end_ms: Optional[int] = data.get("demand_end") or None
         self.amount: Optional[Decimal] = utils.safe_decimal(data.get("amount"))
         self.status: DemandStatus = DemandStatus(data.get("status", "begin"))
         self.interest_rate: Optional[Decimal] = utils.safe_decimal(data.get("interest_rate"))
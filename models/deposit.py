@@ -2,8 +2,24 @@ from decimal import Decimal
 from typing import Optional, List
 from enum import Enum
 import pendulum
-from models.deposit_detail import DepositDetail
+from models.deposit_detail import DepositDetail, parse_installment
 from utils.utils import Utils
+from utils.timestamps import SHANGHAI, LazyDate, date_to_ms
+
+# (年, 月) -> (该月1日0点, 1日的毫秒, 16日0点的毫秒)，Asia/Shanghai，进程内缓存
+_month_bounds: dict[tuple[int, int], tuple[pendulum.DateTime, int, int]] = {}
+
+
+def month_bounds(year: int, month: int) -> tuple[pendulum.DateTime, int, int]:
+    if month > 12:
+        year, month = year + (month - 1) // 12, (month - 1) % 12 + 1
+    key = (year, month)
+    result = _month_bounds.get(key)
+    if result is None:
+        start = pendulum.datetime(year, month, 1, tz=SHANGHAI)
+        result = (start, date_to_ms(start), date_to_ms(start.add(days=15)))
+        _month_bounds[key] = result
+    return result
 
 class DepositStatus(Enum):
     BEGIN = 'begin'
@@ -11,18 +27,50 @@ class DepositStatus(Enum):
     DEFAULT = 'default'
 
 class Deposit:
+    # 日期列保留原始毫秒，需要日历计算时第一次访问才转换
+    deposit_begin = LazyDate("deposit_begin_ms")
+    deposit_end = LazyDate("deposit_end_ms")
+
     def __init__(self, data: dict):
         self.uid: int = data.get("uid") # type: ignore
         self.id: int = data.get("id") # type: ignore
         utils = Utils()
-        self.deposit_begin = utils.int_to_date(data.get("deposit_begin"))
-        self.deposit_end = utils.int_to_date(data.get("deposit_end")) if data.get("deposit_end") else None
-        self.minimum_amount: Optional[Decimal] = Decimal(str(data.get("minimum_amount", 0))) if data.get("minimum_amount") else None
+        self.deposit_begin_ms: int = data.get("deposit_begin")  # type: ignore
+        self.deposit_end_ms: Optional[int] = data.get("deposit_end") or None
+        self.minimum_amount: Optional[Decimal] = utils.safe_decimal(data.get("minimum_amount")) if data.get("minimum_amount") else None
         self.status: DepositStatus = DepositStatus(data.get("status", "begin"))
         self.details: List[DepositDetail] = []
+        self._details_by_month: dict[tuple[int, int], DepositDetail] = {}
+        self.max_installment: Optional[str] = None
 
     def init_details(self, details: List[DepositDetail]):
+        """设置 details，并建立 (年, 月) -> detail 的索引（installment 只在这里解析一次）"""
         self.details = details
+        self._details_by_month = {}
+        for detail in details:
+            detail.installment_key = parse_installment(detail.installment)
+            self._details_by_month.setdefault(detail.installment_key, detail)
+        self.max_installment = max((detail.installment for detail in details), default=None)
+
+    def detail_for_month(self, date: pendulum.DateTime) -> Optional[DepositDetail]:
+        """installment 的1日0点正好等于 date 的 detail（没有时返回 None）"""
+        local = date.in_timezone('Asia/Shanghai')
+        key = (local.year, local.month)
+        detail = self._details_by_month.get(key)
+        if detail is None or month_bounds(*key)[0] != date:
+            return None
+        return detail
+
+    def deposited_by_fifteenth(self, detail: DepositDetail) -> bool:
+        """deposit_date <= installment 当月15日 23:59:59.999999（即早于16日0点）"""
+        return detail.deposit_date_ms < month_bounds(*detail.installment_key)[2]
+
+    def is_last_interest_month(self, base_date: pendulum.DateTime) -> bool:
+        """base_date 是否为最后一个 installment 的下个月1日（最后一次发放利息）"""
+        if self.max_installment is None:
+            return False
+        year, month = parse_installment(self.max_installment)
+        return base_date == month_bounds(year, month + 1)[0]
 
     @property
     def first_interest_date(self):
@@ -44,7 +92,6 @@ class Deposit:
 
     def make_first_installment_interests(self, base_date: pendulum.DateTime, logger):
         interests = []
-        utils = Utils()
         
         # 计算按日比例：base_date到deposit_begin的天数 / deposit_begin当月的总天数
         days_from_begin_to_base = (base_date - self.deposit_begin.start_of('day')).days
@@ -52,15 +99,14 @@ class Deposit:
         payment_ratio = Decimal(str(days_from_begin_to_base)) / Decimal(str(days_in_month))
         
         for detail in self.details:
-            if detail.deposit_date is None or detail.amount is None or detail.amount == 0 or detail.interest_rate is None:
+            if detail.deposit_date_ms is None or detail.amount is None or detail.amount == 0 or detail.interest_rate is None:
                 continue
 
             # 计算基础利息金额
             base_interest_amount = detail.amount * detail.interest_rate
             
             # 计算实际利息金额（按日比例）并切り捨て到整数
-            fifteenth_of_month = utils.string_to_date(f"{detail.installment}/15").end_of('day')
-            if detail.deposit_date <= fifteenth_of_month:
+            if self.deposited_by_fifteenth(detail):
                 payment_ratio = Decimal('1')
             interest_amount = (base_interest_amount * payment_ratio).quantize(Decimal('1'), rounding='ROUND_DOWN')
             
@@ -80,49 +126,34 @@ class Deposit:
     def make_installment_interests(self, base_date: pendulum.DateTime, logger):
         interests = []
 
-        utils = Utils()
-        target_detail = None
-        for detail in self.details:
-            installment_date_str = f"{detail.installment}/01"
-            installment_date = utils.string_to_date(installment_date_str)
-            
-            logger.debug(f"compare: {installment_date} {base_date.subtract(months=1)}")
-            if installment_date == base_date.subtract(months=1):
-                target_detail = detail
-                break
+        # 上个月的 installment（索引查找，不再逐个解析日期字符串）
+        target_detail = self.detail_for_month(base_date.subtract(months=1))
         
-        if target_detail is None or target_detail.deposit_date is None or target_detail.amount is None or target_detail.amount == 0:
+        if target_detail is None or target_detail.deposit_date_ms is None or target_detail.amount is None or target_detail.amount == 0:
             return interests, False
         
         # 各detailの独自のdeposit_limit（日付）を使用して期限日を計算
-        if target_detail.deposit_limit is None:
+        if target_detail.deposit_limit_ms is None:
             return interests, False
             
-        # deposit_limitが日付型なので、そのまま使用
-        deadline_date = target_detail.deposit_limit
-        logger.debug(f"deadline_date: {deadline_date}, deposit_date: {target_detail.deposit_date}")
+        # 期限日との比較はunixミリ秒のまま行う
+        logger.debug(f"deadline_date: {target_detail.deposit_limit_ms}, deposit_date: {target_detail.deposit_date_ms}")
         
-        if target_detail.deposit_date > deadline_date:
+        if target_detail.deposit_date_ms > target_detail.deposit_limit_ms:
             return interests, False
         
         # target_detailが最後のdetailかどうかを判定
         # 只有当target_detail是最后一个installment时，才可能结束存款
         # 但还需要确保这是在正确的月份发放的（即base_date应该是max_installment的下一个月）
-        max_installment = max(detail.installment for detail in self.details)
-        
         # 检查：1. target_detail是最后一个installment
         #       2. base_date是最后一个installment的下一个月（即最后一个利息发放月份）
-        if target_detail.installment == max_installment:
-            max_installment_date_str = f"{max_installment}/01"
-            max_installment_date = utils.string_to_date(max_installment_date_str)
-            # 最后一个installment的利息应该在它的下一个月发放
-            expected_end_date = max_installment_date.add(months=1).start_of('month')
-            is_deposit_end = base_date == expected_end_date
+        if target_detail.installment == self.max_installment:
+            is_deposit_end = self.is_last_interest_month(base_date)
         else:
             is_deposit_end = False
         
         for detail in self.details:
-            if detail.deposit_date is None or detail.amount is None or detail.amount == 0 or detail.interest_rate is None:
+            if detail.deposit_date_ms is None or detail.amount is None or detail.amount == 0 or detail.interest_rate is None:
                 continue
                 
             # 计算利息金额并切り捨て到整数
@@ -1,17 +1,33 @@
 from decimal import Decimal
 from typing import Optional, List
 from utils.utils import Utils
+from utils.timestamps import LazyDate
+
+def parse_installment(installment: str) -> tuple[int, int]:
+    """installment（"YYYY/MM"）→ (年, 月)；其他格式交给 pendulum 解析"""
+    parts = installment.split("/")
+    if len(parts) == 2 and parts[0].isdigit() and parts[1].isdigit() and 1 <= int(parts[1]) <= 12:
+        return int(parts[0]), int(parts[1])
+    date = Utils().string_to_date(f"{installment}/01")
+    return date.year, date.month
+
 
 class DepositDetail:
+    # 日期列保留原始毫秒，比较直接用 *_ms；需要 DateTime 时第一次访问才转换
+    deposit_date = LazyDate("deposit_date_ms")
+    deposit_limit = LazyDate("deposit_limit_ms")
+
     def __init__(self, data: dict):
         self.uid: int = data.get("uid")  # type: ignore
         self.id: int = data.get("id")  # type: ignore
         self.installment: str = data.get("installment")  # type: ignore
         utils = Utils()
-        self.deposit_date = utils.int_to_date(data.get("deposit_date")) if data.get("deposit_date") else None
-        self.amount: Optional[Decimal] = Decimal(str(data.get("amount", 0))) if data.get("amount") else None
-        self.interest_rate: Optional[Decimal] = Decimal(str(data.get("interest_rate", 0))) if data.get("interest_rate") else None
-        self.deposit_limit = utils.int_to_date(data.get("deposit_limit")) if data.get("deposit_limit") else None
+        self.deposit_date_ms: Optional[int] = data.get("deposit_date") or None
+        self.deposit_limit_ms: Optional[int] = data.get("deposit_limit") or None
+        self.amount: Optional[Decimal] = utils.safe_decimal(data.get("amount")) if data.get("amount") else None
+        self.interest_rate: Optional[Decimal] = utils.safe_decimal(data.get("interest_rate")) if data.get("interest_rate") else None
+        # (年, 月)，由 Deposit.init_details 填充
+        self.installment_key: Optional[tuple[int, int]] = None
 
     def print(self, logger):
         logger.info(f"  DepositDetail ID: {self.id}, UID: {self.uid}, Installment: {self.installment}, Deposit Date: {self.deposit_date}, Amount: {self.amount}, Interest Rate: {self.interest_rate}, Deposit Limit: {self.deposit_limit}")
\ No newline at end of file
@@ -1,12 +1,15 @@
 from decimal import Decimal
 from typing import Optional, List
 from utils.utils import Utils
+from utils.timestamps import LazyDate
 
 class DepositInterest:
+    interest_date = LazyDate("interest_date_ms")
+
     def __init__(self, data: dict):
         self.uid: int = data.get("uid") # type: ignore
         self.id: int = data.get("id") # type: ignore
         self.installment: str = data.get("installment") # type: ignore
         utils = Utils()
-        self.interest_date = utils.int_to_date(data.get("interest_date"))
-        self.amount: Optional[Decimal] = Decimal(str(data.get("amount", 0))) if data.get("amount") else None
+        self.interest_date_ms: int = data.get("interest_date")  # type: ignore
+        self.amount: Optional[Decimal] = utils.safe_decimal(data.get("amount")) if data.get("amount") else None
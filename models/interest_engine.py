@@ -0,0 +1,86 @@
+# -*- coding: utf-8 -*-
+from decimal import Decimal
+import pendulum
+from models.deposit import Deposit
+from utils.timestamps import SHANGHAI, date_to_ms
+
+_ONE = Decimal('1')
+
+
+class InterestEngine:
+    """
+    monthly 的批量利息计算（与 Deposit.make_interests 结果逐位一致）
+
+    - 首月 / 第二个月以后的判定换算成 deposit_begin 毫秒的比较（base_date 的月初毫秒在 __init__ 里算好），
+      installment 的查找和15日界限使用 Deposit.init_details 建好的索引，不做 pendulum 的日期计算
+    - 金额的计算与 Deposit.make_interests 相同：(amount * rate [* ratio]).quantize(1, ROUND_DOWN)
+    - 首月按日比例中「某个 detail 在15日前存入后 payment_ratio 一直为1」的行为也保持不变
+    """
+
+    def __init__(self, logger, base_date: pendulum.DateTime):
+        self.logger = logger
+        self.base_date = base_date
+
+        # base_date 的上个月1日（installment 利息对应的月份）
+        self._target_month = base_date.subtract(months=1)
+
+        # first_interest_date（deposit_begin 的下个月1日）与 base_date 的比较换算成 deposit_begin 毫秒的范围：
+        #   base_date <  first_interest_date  <=> deposit_begin >= base_date 当月1日
+        #   base_date == first_interest_date  <=> base_date 是月初，且 deposit_begin 在上个月
+        month_start = base_date.in_timezone(SHANGHAI).start_of('month')
+        self._month_start_ms = date_to_ms(month_start)
+        self._prev_month_start_ms = date_to_ms(month_start.subtract(months=1))
+        self._is_month_start = base_date == month_start
+
+    def _interest(self, detail, amount: Decimal) -> dict:
+        return {
+            "uid": detail.uid,
+            "id": detail.id,
+            "installment": detail.installment,
+            "interest_date": self.base_date,
+            "amount": amount
+        }
+
+    def deposit_interests(self, deposit: Deposit) -> tuple[list, bool]:
+        """一件存款的 (interests, is_deposit_end)"""
+        begin_ms = deposit.deposit_begin_ms
+        if begin_ms >= self._month_start_ms:
+            return [], False
+
+        interests = []
+        if self._is_month_start and begin_ms >= self._prev_month_start_ms:
+            # 首月：按日比例
+            days_from_begin_to_base = (self.base_date - deposit.deposit_begin.start_of('day')).days
+            days_in_month = deposit.deposit_begin.days_in_month
+            ratio = Decimal(str(days_from_begin_to_base)) / Decimal(str(days_in_month))
+            for detail in deposit.details:
+                if detail.deposit_date_ms is None or detail.amount is None or detail.amount == 0 or detail.interest_rate is None:
+                    continue
+                if deposit.deposited_by_fifteenth(detail):
+                    ratio = _ONE
+                amount = (detail.amount * detail.interest_rate * ratio).quantize(_ONE, rounding='ROUND_DOWN')
+                interests.append(self._interest(detail, amount))
+            return interests, False
+
+        # 第二个月以后：找到上个月的 installment
+        target_detail = deposit.detail_for_month(self._target_month)
+        if target_detail is None or target_detail.deposit_date_ms is None or target_detail.amount is None or target_detail.amount == 0:
+            return [], False
+        if target_detail.deposit_limit_ms is None:
+            return [], False
+        if target_detail.deposit_date_ms > target_detail.deposit_limit_ms:
+            return [], False
+
+        is_deposit_end = target_detail.installment == deposit.max_installment and deposit.is_last_interest_month(self.base_date)
+        for detail in deposit.details:
+            if detail.deposit_date_ms is None or detail.amount is None or detail.amount == 0 or detail.interest_rate is None:
+                continue
+            amount = (detail.amount * detail.interest_rate).quantize(_ONE, rounding='ROUND_DOWN')
+            interests.append(self._interest(detail, amount))
+        return interests, is_deposit_end
+
+    def make_interests(self, deposits: list[Deposit]) -> list[tuple[list, bool]]:
+        """
+        对 deposits 批量计算利息，返回与 deposits 同顺序的 (interests, is_deposit_end) 列表
+        """
+        return [self.deposit_interests(deposit) for deposit in deposits]
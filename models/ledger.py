@@ -0,0 +1,104 @@
+# -*- coding: utf-8 -*-
+from decimal import Decimal, ROUND_DOWN
+from typing import Optional
+from models.lp_exception import LPException
+from models.user import UserPointRow
+
+
+class Ledger:
+    """
+    batch 一次运行内共用的 point 记账簿
+
+    - credit 按调用顺序依次记账，balance_after 由期初余额 + 累计金额确定（不做 trunc）
+    - 资金流水和各用户的净变动先留在内存里，由 flush 时一次性批量写入
+    - 数据库里的余额按 ROUND_DOWN 取整，取整的时机与逐笔 update_point / update_demand_balance 时相同：
+      point 默认在同一阶段内按用户合计后取整一次，settle() 可以让到此为止的入账先取整；
+      demand_balance 每笔扣减都取整
+    - flush 后用数据库返回的余额重新同步
+    """
+
+    def __init__(self, logger, users: dict[int, UserPointRow]):
+        self.logger = logger
+        self._points: dict[int, Decimal] = {uid: row.point for uid, row in users.items()}
+        # 最后一次 flush 时数据库里的余额
+        self._db_points: dict[int, Decimal] = dict(self._points)
+        self._demand_balances: dict[int, Decimal] = {uid: row.demand_balance for uid, row in users.items()}
+        # process -> 资金流水列表（保持首次出现的顺序）
+        self._flows: dict[str, list] = {}
+        # 已取整的净变动（flush 时写入的增量）和尚未取整的入账合计
+        self._point_deltas: dict[int, Decimal] = {}
+        self._pending_points: dict[int, Decimal] = {}
+        self._demand_balance_deltas: dict[int, Decimal] = {}
+
+    def __contains__(self, uid: int) -> bool:
+        return uid in self._points
+
+    def balance(self, uid: int) -> Decimal:
+        return self._points[uid]
+
+    def credit(self, uid: int, amount: Decimal, action: str, remark: str, process: str,
+               counter_side: Optional[int] = None) -> Decimal:
+        """入账 point，返回 balance_after"""
+        if uid not in self._points:
+            raise LPException(self.logger, "Ledger.credit", f"user with id {uid} not found")
+        balance_after = self._points[uid] + amount
+        self._points[uid] = balance_after
+        self._pending_points[uid] = self._pending_points.get(uid, Decimal('0')) + amount
+        self._flows.setdefault(process, []).append({
+            "user_id": uid,
+            "fund_type": "POINT",
+            "action": action,
+            "amount": amount,
+            "balance_after": balance_after,
+            "related_fund_type": None,
+            "related_amount": None,
+            "remark": remark,
+            "related_flow_id": None,
+            "counter_side": counter_side
+        })
+        return balance_after
+
+    def settle(self, uid: int):
+        """把 uid 尚未取整的入账合计加到数据库余额上并 ROUND_DOWN（相当于调用一次 update_point）"""
+        pending = self._pending_points.pop(uid, None)
+        if pending is None:
+            return
+        delta = self._point_deltas.get(uid, Decimal('0'))
+        current = self._db_points[uid] + delta
+        settled = (current + pending).quantize(Decimal('1'), rounding=ROUND_DOWN)
+        self._point_deltas[uid] = delta + (settled - current)
+
+    def debit_demand_balance(self, uid: int, amount: Decimal):
+        """扣减 demand_balance 并 ROUND_DOWN（相当于调用一次 update_demand_balance，不产生资金流水）"""
+        if uid not in self._demand_balances:
+            raise LPException(self.logger, "Ledger.debit_demand_balance", f"user with id {uid} not found")
+        delta = self._demand_balance_deltas.get(uid, Decimal('0'))
+        current = self._demand_balances[uid] + delta
+        settled = (current - amount).quantize(Decimal('1'), rounding=ROUND_DOWN)
+        self._demand_balance_deltas[uid] = delta + (settled - current)
+
+    def take_flows(self) -> list[tuple[str, list]]:
+        """取出未写入的资金流水，按 process 分组"""
+        flows = list(self._flows.items())
+        self._flows = {}
+        return flows
+
+    def take_point_deltas(self) -> dict[int, Decimal]:
+        """结算剩余的入账后取出各用户的增量（数据库余额 + 增量 即为取整后的余额）"""
+        for uid in list(self._pending_points):
+            self.settle(uid)
+        deltas = {uid: amount for uid, amount in self._point_deltas.items() if amount != 0}
+        self._point_deltas = {}
+        return deltas
+
+    def take_demand_balance_deltas(self) -> dict[int, Decimal]:
+        deltas = {uid: amount for uid, amount in self._demand_balance_deltas.items() if amount != 0}
+        self._demand_balance_deltas = {}
+        return deltas
+
+    def sync_points(self, points: dict[int, Decimal]):
+        self._points.update(points)
+        self._db_points.update(points)
+
+    def sync_demand_balances(self, demand_balances: dict[int, Decimal]):
+        self._demand_balances.update(demand_balances)
@@ -0,0 +1,173 @@
+# -*- coding: utf-8 -*-
+import json
+import threading
+from collections import OrderedDict
+from typing import Optional
+from utils.timestamps import now_ms
+
+KIND_WALLET = "wallet"
+KIND_TRANSACTION = "transaction"
+
+
+class RiskCache:
+    """
+    MistTrack 风险评估结果的缓存（进程内共享）
+
+    key 为 (种类, 地址或交易ID, coin)，value 为 assess_*_risk 返回的 dict。
+    每个条目有自己的过期时间（unix 毫秒，None 为永不过期），超过 max_size 时淘汰最久未使用的条目。
+    """
+
+    def __init__(self, max_size: int = 10000):
+        self.max_size = max_size
+        self._entries: OrderedDict = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.expired = 0
+        self.evictions = 0
+
+    def get(self, kind: str, key: str, coin: str) -> Optional[dict]:
+        cache_key = (kind, key, coin)
+        with self._lock:
+            entry = self._entries.get(cache_key)
+            if entry is not None:
+                result, expires_at = entry
+                if expires_at is None or expires_at > now_ms():
+                    self._entries.move_to_end(cache_key)
+                    self.hits += 1
+                    return dict(result)
+                del self._entries[cache_key]
+                self.expired += 1
+        result = self._load(kind, key, coin)
+        with self._lock:
+            if result is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+        return dict(result)
+
+    def put(self, kind: str, key: str, coin: str, result: dict, ttl: Optional[float]):
+        """ttl 为秒数，None 时永不过期（仍受 max_size 的 LRU 淘汰）"""
+        expires_at = None if ttl is None else now_ms() + int(ttl * 1000)
+        self._remember(kind, key, coin, dict(result), expires_at)
+        self._store(kind, key, coin, result, expires_at)
+
+    def _remember(self, kind: str, key: str, coin: str, result: dict, expires_at: Optional[int]):
+        with self._lock:
+            cache_key = (kind, key, coin)
+            self._entries[cache_key] = (result, expires_at)
+            self._entries.move_to_end(cache_key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def _load(self, kind: str, key: str, coin: str) -> Optional[dict]:
+        """进程内未命中时的二级存储，进程内缓存没有二级存储"""
+        return None
+
+    def _store(self, kind: str, key: str, coin: str, result: dict, expires_at: Optional[int]):
+        pass
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "size": len(self._entries),
+                "hits": self.hits,
+                "misses": self.misses,
+                "expired": self.expired,
+                "evictions": self.evictions,
+            }
+
+
+class PostgresRiskCache(RiskCache):
+    """
+    带 Postgres 表（risk_assessment_cache）的风险评估缓存，进程重启后结果仍然有效
+
+    先查进程内的 LRU，未命中时再查表，命中后放回进程内。写入时两边都写。
+    表的读写失败只记录警告，不影响风险评估本身（按未命中处理）。
+    """
+
+    def __init__(self, logger, db_service, max_size: int = 10000):
+        super().__init__(max_size)
+        self.logger = logger
+        self.db_service = db_service
+        self.db_hits = 0
+        self.db_errors = 0
+        self.ensure_table()
+
+    def _run(self, func):
+        conn = None
+        try:
+            conn = self.db_service.get_connection()
+            result = func(conn)
+            conn.commit()
+            return result
+        except Exception as e:
+            with self._lock:
+                self.db_errors += 1
+            self.logger.warning(f"risk_assessment_cache 访问失败: {e}")
+            if conn is not None:
+                try:
+                    conn.rollback()
+                except Exception:
+                    pass
+            return None
+
+    def ensure_table(self):
+        def create(conn):
+            conn.execute("""
+                create table if not exists risk_assessment_cache (
+                    kind varchar(16) not null,
+                    key varchar(128) not null,
+                    coin varchar(32) not null,
+                    result text not null,
+                    cached_at bigint not null,
+                    expires_at bigint,
+                    primary key (kind, key, coin)
+                )
+            """)
+            # 启动时顺便清理已过期的条目
+            conn.execute("delete from risk_assessment_cache where expires_at is not null and expires_at <= %s", (now_ms(),))
+        self._run(create)
+
+    def _load(self, kind: str, key: str, coin: str) -> Optional[dict]:
+        def select(conn):
+            return conn.select(
+                """
+                select result, expires_at from risk_assessment_cache
+                where kind = %s and key = %s and coin = %s and (expires_at is null or expires_at > %s)
+                """,
+                (kind, key, coin, now_ms())
+            )
+        rows = self._run(select)
+        if not rows:
+            return None
+        result = json.loads(rows[0]["result"])
+        self._remember(kind, key, coin, result, rows[0]["expires_at"])
+        with self._lock:
+            self.db_hits += 1
+        return result
+
+    def _store(self, kind: str, key: str, coin: str, result: dict, expires_at: Optional[int]):
+        def upsert(conn):
+            conn.execute(
+                """
+                insert into risk_assessment_cache (kind, key, coin, result, cached_at, expires_at)
+                values (%s, %s, %s, %s, %s, %s)
+                on conflict (kind, key, coin) do update
+                set result = excluded.result, cached_at = excluded.cached_at, expires_at = excluded.expires_at
+                """,
+                (kind, key, coin, json.dumps(result, ensure_ascii=False), now_ms(), expires_at)
+            )
+        self._run(upsert)
+
+    def stats(self) -> dict:
+        result = super().stats()
+        with self._lock:
+            result["db_hits"] = self.db_hits
+            result["db_errors"] = self.db_errors
+        return result
@@ -0,0 +1,87 @@
+# -*- coding: utf-8 -*-
+import threading
+import weakref
+from collections import OrderedDict
+
+
+class StatementCache:
+    """
+    DBConnection 写操作的 SQL 模板缓存（进程内共享）
+
+    key 为 (操作, 表名, 列名 tuple, ...)，value 为生成好的 SQL（%s 占位符）。
+    另外按物理连接记录已 PREPARE 的语句名，连接关闭/被回收后自动失效。
+    """
+
+    def __init__(self, max_size: int = 512):
+        self.max_size = max_size
+        self._statements: OrderedDict = OrderedDict()
+        self._prepared = weakref.WeakKeyDictionary()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.prepares = 0
+        self.prepared_executions = 0
+
+    def get(self, key: tuple, builder) -> str:
+        with self._lock:
+            sql = self._statements.get(key)
+            if sql is not None:
+                self._statements.move_to_end(key)
+                self.hits += 1
+                return sql
+            self.misses += 1
+        sql = builder()
+        with self._lock:
+            self._statements[key] = sql
+            if len(self._statements) > self.max_size:
+                self._statements.popitem(last=False)
+        return sql
+
+    def prepared_name(self, conn, key: tuple):
+        """返回该连接上已 PREPARE 的语句名，未准备时返回 None"""
+        with self._lock:
+            names = self._prepared.get(conn)
+            return names.get(key) if names else None
+
+    def register_prepared(self, conn, key: tuple) -> str:
+        """为该连接分配一个新的语句名（调用方负责执行 PREPARE）"""
+        with self._lock:
+            names = self._prepared.setdefault(conn, {})
+            self.prepares += 1
+            # 进程内递增，保证同一连接上不会重名
+            name = f"lp_stmt_{self.prepares}"
+            names[key] = name
+            return name
+
+    def forget_prepared(self, conn, key: tuple):
+        with self._lock:
+            names = self._prepared.get(conn)
+            if names:
+                names.pop(key, None)
+
+    def forget_connection(self, conn):
+        """
+        回滚后不确定事务内的 PREPARE 是否仍然有效，丢弃该连接的记录；
+        语句名在进程内唯一，重新 PREPARE 不会与残留的语句冲突
+        """
+        with self._lock:
+            self._prepared.pop(conn, None)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "size": len(self._statements),
+                "hits": self.hits,
+                "misses": self.misses,
+                "prepares": self.prepares,
+                "prepared_executions": self.prepared_executions,
+            }
+
+
+def to_positional(sql: str) -> str:
+    """把 psycopg2 的 %s 占位符转换为 PREPARE 用的 $1, $2, ..."""
+    parts = sql.split("%s")
+    result = parts[0]
+    for i, part in enumerate(parts[1:], start=1):
+        result += f"${i}" + part
+    return result
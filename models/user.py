@@ -1,54 +1,133 @@
 from decimal import Decimal
-from typing import Optional, List, Dict, Any
+from typing import Optional, List, Dict, Any, NamedTuple
 import json
 from utils.utils import Utils
 
+
+# batch / monitoring 用的轻量行类型：只包含各用途需要的列，直接由 cursor 的 tuple 构建
+class UserPointRow(NamedTuple):
+    id: int
+    point: Decimal
+    demand_balance: Decimal
+
+
+class UserHierarchyRow(NamedTuple):
+    id: int
+    parent: Optional[int]
+    parent_divid: Optional[Decimal]
+    point: Decimal
+
+
+class UserWalletRow(NamedTuple):
+    id: int
+    wallet: str
+    login_id: Optional[str]
+    name: str
+
+_UNSET = object()
+
+
+def _to_money(raw) -> Decimal:
+    return Utils().safe_decimal(raw) or Decimal('0')
+
+
+def _to_json(raw):
+    # detail_list 和 risk_detail 从数据库中以 JSON 字符串形式存储，需要解析
+    if not raw:
+        return None
+    try:
+        return json.loads(raw) if isinstance(raw, str) else raw
+    except (json.JSONDecodeError, TypeError):
+        return None
+
+
+class _LazyField:
+    """
+    User 的延迟字段：构造时只保存原始值（_raw_xxx），第一次访问时转换并缓存到 _xxx
+    """
+
+    def __init__(self, convert):
+        self.convert = convert
+
+    def __set_name__(self, owner, name):
+        self.raw_slot = "_raw_" + name
+        self.value_slot = "_" + name
+
+    def __get__(self, obj, owner=None):
+        if obj is None:
+            return self
+        value = getattr(obj, self.value_slot)
+        if value is _UNSET:
+            value = self.convert(getattr(obj, self.raw_slot))
+            setattr(obj, self.value_slot, value)
+        return value
+
+    def __set__(self, obj, value):
+        setattr(obj, self.value_slot, value)
+
+
+_LAZY_FIELDS = ("balance", "loan", "demand_balance", "audited_usdt", "audited_trx", "detail_list", "risk_detail")
+
+
 class User:
-    detail_list: Optional[List[str]]
-    risk_detail: Optional[List[Dict[str, Any]]]
-    
+    """
+    users 表的一行。batch 常用的 id/parent/parent_divid/point 在构造时转换，
+    其余金额字段和 JSON 字段（detail_list/risk_detail）在第一次访问时才转换
+    """
+
+    __slots__ = (
+        "id", "name", "email", "phone", "invitation", "login_id", "point", "can_lend", "can_borrow",
+        "parent", "parent_divid", "wallet", "score", "risk_level", "hacking_event", "system_admin_id", "_children",
+    ) + tuple("_raw_" + f for f in _LAZY_FIELDS) + tuple("_" + f for f in _LAZY_FIELDS)
+
+    balance: Decimal = _LazyField(_to_money)
+    loan: Decimal = _LazyField(_to_money)
+    demand_balance: Decimal = _LazyField(_to_money)
+    audited_usdt: Decimal = _LazyField(_to_money)
+    audited_trx: Decimal = _LazyField(_to_money)
+    detail_list: Optional[List[str]] = _LazyField(_to_json)
+    risk_detail: Optional[List[Dict[str, Any]]] = _LazyField(_to_json)
+
     def __init__(self, data: dict):
         utils = Utils()
-        self.id: int = data.get("id") # type: ignore
-        self.name: str = data.get("name") # type: ignore
-        self.email: str = data.get("email") # type: ignore
-        self.phone: str = data.get("phone") # type: ignore
-        self.invitation: str = data.get("invitation") # type: ignore
-        self.login_id: Optional[str] = data.get("login_id")
-        self.point: Decimal = utils.safe_decimal(data.get("point")) or Decimal('0')
-        self.balance: Decimal = utils.safe_decimal(data.get("balance")) or Decimal('0')
-        self.loan: Decimal = utils.safe_decimal(data.get("loan")) or Decimal('0')
-        self.demand_balance: Decimal = utils.safe_decimal(data.get("demand_balance")) or Decimal('0')
-        self.can_lend: bool = data.get("can_lend", False)
-        self.can_borrow: bool = data.get("can_borrow", False)
-        self.parent: Optional[int] = data.get("parent")
-        self.parent_divid: Optional[Decimal] = utils.safe_decimal(data.get("parent_divid"))
-        self.wallet: Optional[str] = data.get("wallet")
-        self.audited_usdt: Decimal = utils.safe_decimal(data.get("audited_usdt")) or Decimal('0')
-        self.audited_trx: Decimal = utils.safe_decimal(data.get("audited_trx")) or Decimal('0')
-        self.score: Optional[int] = data.get("score")
-        self.risk_level: Optional[str] = data.get("risk_level")
-        self.hacking_event: Optional[str] = data.get("hacking_event")
-        # detail_list 和 risk_detail 从数据库中以 JSON 字符串形式存储，需要解析
-        detail_list_str = data.get("detail_list")
-        if detail_list_str:
-            try:
-                self.detail_list = json.loads(detail_list_str) if isinstance(detail_list_str, str) else detail_list_str
-            except (json.JSONDecodeError, TypeError):
-                self.detail_list = None
-        else:
-            self.detail_list = None
-        
-        risk_detail_str = data.get("risk_detail")
-        if risk_detail_str:
-            try:
-                self.risk_detail = json.loads(risk_detail_str) if isinstance(risk_detail_str, str) else risk_detail_str
-            except (json.JSONDecodeError, TypeError):
-                self.risk_detail = None
-        else:
-            self.risk_detail = None
-        self.system_admin_id: Optional[int] = data.get("system_admin_id")
-        self.children: list[User] = []
+        get = data.get
+        self.id: int = get("id") # type: ignore
+        self.name: str = get("name") # type: ignore
+        self.email: str = get("email") # type: ignore
+        self.phone: str = get("phone") # type: ignore
+        self.invitation: str = get("invitation") # type: ignore
+        self.login_id: Optional[str] = get("login_id")
+        self.point: Decimal = utils.safe_decimal(get("point")) or Decimal('0')
+        self.can_lend: bool = get("can_lend", False)
+        self.can_borrow: bool = get("can_borrow", False)
+        self.parent: Optional[int] = get("parent")
+        self.parent_divid: Optional[Decimal] = utils.safe_decimal(get("parent_divid"))
+        self.wallet: Optional[str] = get("wallet")
+        self.score: Optional[int] = get("score")
+        self.risk_level: Optional[str] = get("risk_level")
+        self.hacking_event: Optional[str] = get("hacking_event")
+        self.system_admin_id: Optional[int] = get("system_admin_id")
+        self._children = None
+
+        self._raw_balance = get("balance")
+        self._raw_loan = get("loan")
+        self._raw_demand_balance = get("demand_balance")
+        self._raw_audited_usdt = get("audited_usdt")
+        self._raw_audited_trx = get("audited_trx")
+        self._raw_detail_list = get("detail_list")
+        self._raw_risk_detail = get("risk_detail")
+        self._balance = self._loan = self._demand_balance = _UNSET
+        self._audited_usdt = self._audited_trx = self._detail_list = self._risk_detail = _UNSET
+
+    @property
+    def children(self) -> list["User"]:
+        if self._children is None:
+            self._children = []
+        return self._children
+
+    @children.setter
+    def children(self, value: list["User"]):
+        self._children = value
 
     @property
     def is_admin(self):
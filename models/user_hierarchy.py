@@ -0,0 +1,96 @@
+# -*- coding: utf-8 -*-
+from decimal import Decimal
+from typing import Optional
+from models.lp_exception import LPException
+from models.user import UserHierarchyRow
+
+
+class AncestorIndex:
+    """
+    用户上家链的索引（每次运行构建一次）
+
+    chain(uid) 返回该用户的上家链 ((上家ID, parent_divid), ...)，顺序与逐级向上查找相同：
+    遇到 parent_divid 为空/0 的上家时，该上家拿走剩余全部收入，链在它这里结束；
+    上家不存在时链也结束。
+    构建时只做一次迭代的成环检查（每个用户只走一次，O(N)），不为每个用户生成链；
+    chain() 第一次调用时沿 parent 逐级向上取得并缓存，遇到已缓存的上家时直接接上它的链，
+    所以只为真正分配收入的借款人生成链，耗时 O(该借款人的深度)。
+    parent 关系成环时 chain() 抛出 LPException，不会像逐级查找那样无限循环。
+    """
+
+    def __init__(self, logger, users: dict[int, UserHierarchyRow]):
+        self.logger = logger
+        self.users = users
+        self._chains: dict[int, tuple] = {}
+        self._checked: set[int] = set()
+        self._cyclic: set[int] = set()
+        for uid in users:
+            if uid not in self._checked and uid not in self._cyclic:
+                self._check(uid)
+
+    def __contains__(self, uid) -> bool:
+        return uid in self.users
+
+    def __getitem__(self, uid) -> UserHierarchyRow:
+        return self.users[uid]
+
+    def _next(self, uid: int) -> Optional[int]:
+        """链上 uid 的上家（上家不存在时为 None）"""
+        parent_id = self.users[uid].parent
+        if not parent_id or parent_id not in self.users:
+            return None
+        return parent_id
+
+    def _check(self, uid: int):
+        users = self.users
+        # 向上走到 已检查的节点 / 链的终点 / 环 为止，路径上的用户一并标记
+        path = []
+        on_path = set()
+        current = uid
+        cyclic = False
+        while True:
+            if current in self._checked:
+                break
+            if current in self._cyclic or current in on_path:
+                cyclic = True
+                break
+            path.append(current)
+            on_path.add(current)
+            parent_id = self._next(current)
+            if parent_id is None or not users[parent_id].parent_divid:
+                # 链在这里结束（parent_divid 为空的上家拿走剩余全部，不再向上）
+                break
+            current = parent_id
+
+        # 路径上的用户向上都会进入环
+        (self._cyclic if cyclic else self._checked).update(path)
+
+    def chain(self, uid: int) -> tuple[tuple[int, Optional[Decimal]], ...]:
+        if uid in self._cyclic:
+            raise LPException(self.logger, "AncestorIndex.chain", f"user {uid} has a cycle in its parent chain")
+        chain = self._chains.get(uid)
+        if chain is not None:
+            return chain
+        if uid not in self.users:
+            return ()
+
+        entries = []
+        current = uid
+        while True:
+            parent_id = self._next(current)
+            if parent_id is None:
+                break
+            parent_divid = self.users[parent_id].parent_divid
+            entries.append((parent_id, parent_divid))
+            if not parent_divid:
+                break
+            # chain(子) = ((上家, divid),) + chain(上家)：上家的链已缓存时直接接上
+            suffix = self._chains.get(parent_id)
+            if suffix is not None:
+                entries.extend(suffix)
+                break
+            current = parent_id
+
+        chain = tuple(entries)
+        self._chains[uid] = chain
+        return chain
@@ -6,17 +6,19 @@ from decimal import Decimal, ROUND_DOWN
 from typing import Dict, List, Optional
 
 import pendulum
-import requests
 import schedule
 
 import base
 import constants
 from models.lp_exception import LPException
+from models.risk_cache import PostgresRiskCache
 from services.db_service import DBService
 from services.wallet_service import WalletService
 from services.notification_service import NotificationService
 from services.user_service import UserService
 from services.riskService import RiskService
+from utils.timestamps import date_to_ms
+from utils.http_client import HttpClient
 
 
 def fetch_last_monitoring_timestamp(conn) -> int:
@@ -62,7 +64,7 @@ def fetch_failed_deposits(conn) -> List[Dict[str, Optional[str]]]:
 
 
 def update_last_monitoring(conn, logger: logging.Logger) -> None:
-    now_ms = int(pendulum.now("UTC").timestamp() * 1000)
+    now_ms = date_to_ms(pendulum.now("UTC"))
     conn.update(
         "system_configs",
         {"config_key": "last_monitoring"},
@@ -488,9 +490,10 @@ def check_deposit_records_risk(logger: logging.Logger, conn) -> None:
                         try:
                             # 调用API，将to_address作为URL路径的一部分
                             api_url = f"{api_endpoint}/{to_address}"
-                            response = requests.post(
+                            # 归集服务处理较慢，连接超时也保持300秒（数值 timeout 的连接超时会被限制为 connect_timeout）
+                            response = HttpClient().post(
                                 api_url,
-                                timeout=300
+                                timeout=(300, 300)
                             )
                         except Exception as e:
                             logger.error(f"Error calling API for deposit record {record_id}: {e}")
@@ -666,7 +669,8 @@ def run_hourly_monitoring(logger: logging.Logger, mode: str) -> None:
 
         # 余额更新：对所有有钱包的用户更新 audited_usdt/audited_trx（与风险评估分离，风险评估仅针对1小时内有动作的用户）
         user_service = UserService(logger)
-        refresh_users = user_service.get_refresh_users(conn)
+        # 循环中每个钱包都要调用 TronGrid，不用服务端游标（游标会在整个循环期间占住连接和快照），先读出列表
+        refresh_users = user_service.get_refresh_wallets(conn)
         if refresh_users:
             logger.info(f"开始更新 {len(refresh_users)} 个钱包的余额")
             for user in refresh_users:
@@ -690,6 +694,7 @@ def run_hourly_monitoring(logger: logging.Logger, mode: str) -> None:
                             refresh_conn.commit(holdConnection=False)
                         except Exception:
                             pass
+            logger.info(f"{len(refresh_users)} 个钱包的余额更新完成")
 
         # 更新用户 345 的 audited_usdt（基于子用户汇总计算）
         try:
@@ -735,6 +740,12 @@ SELECT sum(audited_usdt)/1000000 as total_usdt FROM sub_users where id<>345"""
         if conn:
             conn.rollback()
     finally:
+        pool_stats = DBService(logger, mode).get_pool_stats()
+        if pool_stats is not None:
+            logger.info(f"DB pool stats: {pool_stats}")
+        logger.info(f"Risk cache stats: {RiskService(logger).cache_stats()}")
+        logger.info(f"MistTrack limiter stats: {RiskService(logger).limiter_stats()}")
+        logger.info(f"TronGrid key stats: {WalletService(logger).key_stats()}")
         logger.info("===== hourly monitoring iteration end =====")
 
 
@@ -768,7 +779,7 @@ def audit(logger, mode):
     list_conn = db_service.get_connection()
     try:
         user_service = UserService(logger)
-        users = user_service.get_audit_users(list_conn)
+        users = user_service.get_audit_wallets(list_conn)
         
         if not users:
             logger.info("没有需要审计的用户")
@@ -782,41 +793,51 @@ def audit(logger, mode):
     success_count = 0
     error_count = 0
     
+    # 同一钱包的用户共用一次风险评估
+    users_by_wallet = {}
     for user in users:
-        user_conn = None
-        try:
-            # 为每个用户创建独立的连接和事务
-            user_conn = db_service.get_connection()
-            user_service = UserService(logger)
+        users_by_wallet.setdefault(user.wallet, []).append(user)
+    
+    # 风险评估批量流水线执行，按完成顺序逐个处理
+    for wallet, risk_result, risk_error in risk_service.assess_many(users_by_wallet):
+        for user in users_by_wallet[wallet]:
+            user_conn = None
+            try:
+                if risk_error is not None:
+                    raise risk_error
             
-            # 处理单个用户的审计
-            _audit_single_user(logger, user, user_conn, user_service, risk_service, notification_service)
+                # 为每个用户创建独立的连接和事务
+                user_conn = db_service.get_connection()
+                user_service = UserService(logger)
             
-            # 立即提交当前用户的事务
-            user_conn.commit()
-            success_count += 1
+                # 处理单个用户的审计
+                _audit_single_user(logger, user, user_conn, user_service, risk_service, notification_service, risk_result)
             
-        except LPException as e:
-            # LPException 有详细的错误信息，使用 print() 方法记录
-            e.print()
-            logger.error(f"用户 {user.id} 钱包 {user.wallet} 审计失败 - 错误函数: {e.error_function}, 错误详情: {e.error_detail}")
-            if user_conn:
-                user_conn.rollback()
-            error_count += 1
-        except Exception as e:
-            logger.error(f"用户 {user.id} 钱包 {user.wallet} 审计失败: {type(e).__name__}: {str(e)}")
-            import traceback
-            logger.error(f"详细错误信息: {traceback.format_exc()}")
-            if user_conn:
-                user_conn.rollback()
-            error_count += 1
-        finally:
-            # 确保连接关闭
-            if user_conn:
-                try:
-                    user_conn.commit(holdConnection=False)
-                except:
-                    pass
+                # 立即提交当前用户的事务
+                user_conn.commit()
+                success_count += 1
+            
+            except LPException as e:
+                # LPException 有详细的错误信息，使用 print() 方法记录
+                e.print()
+                logger.error(f"用户 {user.id} 钱包 {user.wallet} 审计失败 - 错误函数: {e.error_function}, 错误详情: {e.error_detail}")
+                if user_conn:
+                    user_conn.rollback()
+                error_count += 1
+            except Exception as e:
+                logger.error(f"用户 {user.id} 钱包 {user.wallet} 审计失败: {type(e).__name__}: {str(e)}")
+                import traceback
+                logger.error(f"详细错误信息: {traceback.format_exc()}")
+                if user_conn:
+                    user_conn.rollback()
+                error_count += 1
+            finally:
+                # 确保连接关闭
+                if user_conn:
+                    try:
+                        user_conn.commit(holdConnection=False)
+                    except:
+                        pass
 
     logger.info(f"===== audit completed =====")
     logger.info(f"成功: {success_count} 个用户, 失败: {error_count} 个用户")
@@ -842,7 +863,7 @@ def update_balance(logger, user, conn, wallet_service, user_service):
         logger.warning(f"用户 {user.id} 的钱包 {user.wallet} 审计失败，跳过更新")
 
 
-def _audit_single_user(logger, user, conn, user_service, risk_service, notification_service):
+def _audit_single_user(logger, user, conn, user_service, risk_service, notification_service, risk_result=None):
     """
     处理单个用户的风险评估（余额更新由 update_balance 单独处理）
 
@@ -853,10 +874,12 @@ def _audit_single_user(logger, user, conn, user_service, risk_service, notificat
         user_service: 用户服务
         risk_service: 风险服务
         notification_service: 通知服务
+        risk_result: 已取得的钱包风险评估结果（audit 通过 assess_many 批量取得），None 时在这里评估
     """
     # 风险评估
     try:
-        risk_result = risk_service.assess_wallet_risk(user.wallet)
+        if risk_result is None:
+            risk_result = risk_service.assess_wallet_risk(user.wallet)
         if risk_result:
             score = risk_result.get('score', 0)
             risk_level = risk_result.get('risk_level', 'Unknown')
@@ -1052,6 +1075,13 @@ def main():
     logger = base.getLogger(mode, app_name)
     logger.info("=================== monitoring start ===================")
 
+    # 每分钟/每小时的监控以及按用户拆分的审计事务共用一个连接池，避免每个用户都重新建立 SSL 连接
+    db_service = DBService(logger, mode)
+    db_service.enable_pool(min_size=1, max_size=4)
+
+    # 风险评估结果同时保存到 risk_assessment_cache 表，重启后同一地址/交易也不再重复调用 MistTrack
+    RiskService(logger).use_cache(PostgresRiskCache(logger, db_service, max_size=constants.risk_cache["max_size"]))
+
     schedule_monitoring(logger, mode)
 
     logger.info("=================== monitoring end ===================")
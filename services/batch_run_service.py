@@ -0,0 +1,89 @@
+# -*- coding: utf-8 -*-
+from services.singleton_service import SingletonService
+from models.db_connection import DBConnection
+from utils.timestamps import now_ms
+
+
+class BatchRunService(SingletonService):
+    """
+    midnight batch 的运行记录（batch_runs / batch_run_steps）
+
+    以业务日期 + 阶段为单位记录执行状态。阶段的完成记录与阶段本身的更新在同一事务里提交，
+    所以 status='done' 的阶段可以安全地跳过；失败的阶段在回滚后另行记录错误信息。
+    """
+
+    STATUS_RUNNING = "running"
+    STATUS_DONE = "done"
+    STATUS_FAILED = "failed"
+
+    def __init__(self, logger):
+        self.logger = logger
+
+    def _now(self) -> int:
+        return now_ms()
+
+    def ensure_tables(self, conn: DBConnection):
+        conn.execute("""
+            create table if not exists batch_runs (
+                business_date varchar(10) primary key,
+                status varchar(16) not null,
+                attempts integer not null default 0,
+                started_at bigint,
+                finished_at bigint,
+                error text
+            )
+        """)
+        conn.execute("""
+            create table if not exists batch_run_steps (
+                business_date varchar(10) not null,
+                phase varchar(64) not null,
+                status varchar(16) not null,
+                attempts integer not null default 0,
+                started_at bigint,
+                finished_at bigint,
+                duration_ms bigint,
+                error text,
+                primary key (business_date, phase)
+            )
+        """)
+
+    def start_run(self, conn: DBConnection, business_date: str):
+        conn.execute("""
+            insert into batch_runs (business_date, status, attempts, started_at, finished_at, error)
+            values (%s, %s, 1, %s, null, null)
+            on conflict (business_date) do update
+            set status = excluded.status, attempts = batch_runs.attempts + 1,
+                started_at = excluded.started_at, finished_at = null, error = null
+        """, (business_date, self.STATUS_RUNNING, self._now()))
+
+    def finish_run(self, conn: DBConnection, business_date: str, status: str, error: str = None):
+        conn.execute(
+            "update batch_runs set status = %s, finished_at = %s, error = %s where business_date = %s",
+            (status, self._now(), error, business_date)
+        )
+
+    def get_done_phases(self, conn: DBConnection, business_date: str) -> set[str]:
+        rows = conn.select(
+            "select phase from batch_run_steps where business_date = %s and status = %s",
+            (business_date, self.STATUS_DONE)
+        )
+        return {row["phase"] for row in rows}
+
+    def _save_step(self, conn: DBConnection, business_date: str, phase: str, status: str, started_at: int, error: str = None):
+        finished_at = self._now()
+        conn.execute("""
+            insert into batch_run_steps (business_date, phase, status, attempts, started_at, finished_at, duration_ms, error)
+            values (%s, %s, %s, 1, %s, %s, %s, %s)
+            on conflict (business_date, phase) do update
+            set status = excluded.status, attempts = batch_run_steps.attempts + 1,
+                started_at = excluded.started_at, finished_at = excluded.finished_at,
+                duration_ms = excluded.duration_ms, error = excluded.error
+        """, (business_date, phase, status, started_at, finished_at, finished_at - started_at, error))
+
+    def complete_step(self, conn: DBConnection, business_date: str, phase: str, started_at: int):
+        """在阶段的事务内调用，随阶段的更新一起提交"""
+        self._save_step(conn, business_date, phase, self.STATUS_DONE, started_at)
+
+    def fail_step(self, conn: DBConnection, business_date: str, phase: str, started_at: int, error: str):
+        """阶段回滚后调用"""
+        self._save_step(conn, business_date, phase, self.STATUS_FAILED, started_at, error)
@@ -2,9 +2,10 @@
 from services.singleton_service import SingletonService
 import pendulum
 from utils.utils import Utils
-from models.user import User
+from models.user_hierarchy import AncestorIndex
+from models.ledger import Ledger
 from decimal import Decimal
-from typing import Dict, List
+from typing import List
 
 
 class BorrowingService(SingletonService):
@@ -28,21 +29,19 @@ class BorrowingService(SingletonService):
                 self.logger.info("没有需要更新的利息记录")
                 return
             
-            update_count = 0
-            for record in records:
-                keys = {
+            rows = [
+                {
                     "uid": record["uid"],
-                    "id": record["id"], 
+                    "id": record["id"],
                     "interest_from": record["interest_from"],
-                    "interest_to": record["interest_to"]
-                }
-                
-                update_data = {
+                    "interest_to": record["interest_to"],
                     "status": "overdue"
                 }
-                
-                conn.update("borrowing_interests", keys, update_data, 0, "batch.update_interest_status")
-                update_count += 1
+                for record in records
+            ]
+            update_count = conn.update_many(
+                "borrowing_interests", ["uid", "id", "interest_from", "interest_to"], rows, 0, "batch.update_interest_status"
+            )
             
             self.logger.info(f"成功更新 {update_count} 条利息记录状态为 overdue")
             
@@ -50,7 +49,11 @@ class BorrowingService(SingletonService):
             self.logger.error(f"更新利息状态失败: {str(e)}")
             raise
 
-    def distribute_incomes(self, conn, base_date: pendulum.DateTime, users_dict: dict[int, User]):
+    def distribute_incomes(self, conn, base_date: pendulum.DateTime, hierarchy: AncestorIndex, ledger: Ledger,
+                           process: str = "batch.borrow_flows") -> list[dict]:
+        """
+        分配 repaid 的利息：incomes 直接写入，point 入账和资金流水记到 ledger（由调用方 flush）
+        """
         try:
             utils = Utils()
             
@@ -72,10 +75,10 @@ class BorrowingService(SingletonService):
             
             if not interest_records:
                 self.logger.info("没有需要分配的利息记录")
-                return [], []
+                return []
             
             all_incomes = []
-            all_flows = []
+            distributed_rows = []
             
             for record in interest_records:
                 amount = Decimal(str(record['amount'])) if record['amount'] else Decimal('0')
@@ -84,111 +87,98 @@ class BorrowingService(SingletonService):
                 
                 self.logger.info(f"处理利息记录: 用户{record['uid']}, 贷款ID{record['id']}, 金额{amount}")
                 
-                guarantor_incomes, guarantor_flows = self._distribute_to_guarantors(
-                    record, amount, guarantor_divid, users_dict
+                guarantor_incomes = self._distribute_to_guarantors(
+                    record, amount, guarantor_divid, hierarchy, ledger, process
                 )
                 all_incomes.extend(guarantor_incomes)
-                all_flows.extend(guarantor_flows)
                 
                 guarantor_total = sum(Decimal(str(income['amount'])) for income in guarantor_incomes)
                 remaining_amount = amount - guarantor_total
                 
                 if remaining_amount > Decimal('0'):
-                    hierarchy_incomes, hierarchy_flows = self._distribute_to_hierarchy(
-                        record, remaining_amount, users_dict
+                    hierarchy_incomes = self._distribute_to_hierarchy(
+                        record, remaining_amount, hierarchy, ledger, process
                     )
                     all_incomes.extend(hierarchy_incomes)
-                    all_flows.extend(hierarchy_flows)
                 
-                keys = {
+                distributed_rows.append({
                     "uid": record['uid'],
                     "id": record['id'],
                     "interest_from": record['interest_from'],
-                    "interest_to": record['interest_to']
-                }
-                update_data = {
+                    "interest_to": record['interest_to'],
                     "status": "distributed"
-                }
-                conn.update("borrowing_interests", keys, update_data, 0, "batch.distribute_incomes")
-                self.logger.debug(f"更新利息记录状态为 distributed: 用户{record['uid']}, 贷款ID{record['id']}")
+                })
+            
+            # 所有记录处理完后一次性更新为 distributed
+            if distributed_rows:
+                conn.update_many(
+                    "borrowing_interests", ["uid", "id", "interest_from", "interest_to"], distributed_rows, 0, "batch.distribute_incomes"
+                )
+                self.logger.debug(f"更新 {len(distributed_rows)} 条利息记录状态为 distributed")
             
             if all_incomes:
-                conn.insertMany("incomes", all_incomes, 0, "batch.distribute_incomes")
+                conn.bulk_insert("incomes", all_incomes, 0, "batch.distribute_incomes")
                 self.logger.info(f"成功分配 {len(all_incomes)} 条收入记录")
             
-            return all_incomes, all_flows
+            return all_incomes
             
         except Exception as e:
             self.logger.error(f"分配收入失败: {str(e)}")
             raise
     
-    def _distribute_to_guarantors(self, record: dict, amount: Decimal, guarantor_divid: Decimal, users_dict: Dict[int, User]) -> tuple[List[dict], List[dict]]:
+    def _distribute_to_guarantors(self, record: dict, amount: Decimal, guarantor_divid: Decimal, hierarchy: AncestorIndex,
+                                  ledger: Ledger, process: str) -> List[dict]:
         incomes = []
-        flow_records = []
         
         guarantors = [
-            record['guarantor1'],
-            record['guarantor2'], 
-            record['guarantor3']
+            guarantor_id
+            for guarantor_id in (record['guarantor1'], record['guarantor2'], record['guarantor3'])
+            if guarantor_id and guarantor_id in hierarchy
         ]
+        if not guarantors:
+            return incomes
         
-        for guarantor_id in guarantors:
-            if guarantor_id and guarantor_id in users_dict:
-                guarantor_amount = (amount * guarantor_divid).quantize(Decimal('1'), rounding='ROUND_DOWN')
+        # 每个担保人的金额相同，每条记录只计算一次
+        guarantor_amount = (amount * guarantor_divid).quantize(Decimal('1'), rounding='ROUND_DOWN')
+        if guarantor_amount > Decimal('0'):
+            for guarantor_id in guarantors:
+                income = {
+                    "uid": guarantor_id,
+                    "borrowing_uid": record['uid'],
+                    "bid": record['id'],
+                    "interest_from": record['interest_from'],
+                    "interest_to": record['interest_to'],
+                    "amount": guarantor_amount,
+                    "is_guarantee": True
+                }
+                incomes.append(income)
                 
-                if guarantor_amount > Decimal('0'):
-                    income = {
-                        "uid": guarantor_id,
-                        "borrowing_uid": record['uid'],
-                        "bid": record['id'],
-                        "interest_from": record['interest_from'],
-                        "interest_to": record['interest_to'],
-                        "amount": guarantor_amount,
-                        "is_guarantee": True
-                    }
-                    incomes.append(income)
-                    
-                    # 创建资金流水记录
-                    flow_record = {
-                        "user_id": guarantor_id,
-                        "fund_type": "POINT",
-                        "action": "brothers_guarantee_interest",
-                        "amount": guarantor_amount,
-                        "balance_after": guarantor_amount,
-                        "related_fund_type": None,
-                        "related_amount": None,
-                        "remark": "担保收入",
-                        "related_flow_id": None,
-                        "counter_side": record['uid']
-                    }
-                    flow_records.append(flow_record)
-                    
-                    self.logger.info(f"担保人 {guarantor_id} 获得收入: {guarantor_amount}")
+                # 入账并记录资金流水
+                ledger.credit(guarantor_id, guarantor_amount, "brothers_guarantee_interest", "担保收入", process, counter_side=record['uid'])
+                
+                self.logger.info(f"担保人 {guarantor_id} 获得收入: {guarantor_amount}")
         
-        return incomes, flow_records
+        return incomes
     
-    def _distribute_to_hierarchy(self, record: dict, amount: Decimal, users_dict: Dict[int, User]) -> tuple[List[dict], List[dict]]:
+    def _distribute_to_hierarchy(self, record: dict, amount: Decimal, hierarchy: AncestorIndex,
+                                 ledger: Ledger, process: str) -> List[dict]:
         incomes = []
-        flow_records = []
         
         borrower_id = record['uid']
-        if borrower_id not in users_dict:
+        if borrower_id not in hierarchy:
             self.logger.warning(f"借款人 {borrower_id} 不在用户字典中")
-            return incomes, flow_records
+            return incomes
         
-        borrower = users_dict[borrower_id]
         current_amount = amount
         
-        current_user = borrower
-        while current_user.parent and current_user.parent in users_dict:
-            parent = users_dict[current_user.parent]
-            
-            if parent.parent_divid:
-                parent_amount = (current_amount * parent.parent_divid).quantize(Decimal('1'), rounding='ROUND_DOWN')
+        # 上家链由 AncestorIndex 按借款人缓存（parent_divid 为空的上家在链尾，拿走剩余全部）
+        for parent_id, parent_divid in hierarchy.chain(borrower_id):
+            if parent_divid:
+                parent_amount = (current_amount * parent_divid).quantize(Decimal('1'), rounding='ROUND_DOWN')
                 
                 if parent_amount > Decimal('0'):
                     income = {
-                        "uid": parent.id,
+                        "uid": parent_id,
                         "borrowing_uid": record['uid'],
                         "bid": record['id'],
                         "interest_from": record['interest_from'],
@@ -198,29 +188,16 @@ class BorrowingService(SingletonService):
                     }
                     incomes.append(income)
                     
-                    # 创建资金流水记录
-                    flow_record = {
-                        "user_id": parent.id,
-                        "fund_type": "POINT",
-                        "action": "brothers_distribute_interest",
-                        "amount": parent_amount,
-                        "balance_after": parent_amount,
-                        "related_fund_type": None,
-                        "related_amount": None,
-                        "remark": "股东收入",
-                        "related_flow_id": None,
-                        "counter_side": record['uid']
-                    }
-                    flow_records.append(flow_record)
+                    # 入账并记录资金流水
+                    ledger.credit(parent_id, parent_amount, "brothers_distribute_interest", "股东收入", process, counter_side=record['uid'])
                     
-                    self.logger.info(f"上家 {parent.id} 获得收入: {parent_amount}")
+                    self.logger.info(f"上家 {parent_id} 获得收入: {parent_amount}")
                 
                 current_amount = current_amount - parent_amount
-                current_user = parent
             else:
                 if current_amount > Decimal('0'):
                     income = {
-                        "uid": parent.id,
+                        "uid": parent_id,
                         "borrowing_uid": record['uid'],
                         "bid": record['id'],
                         "interest_from": record['interest_from'],
@@ -230,23 +207,9 @@ class BorrowingService(SingletonService):
                     }
                     incomes.append(income)
                     
-                    # 创建资金流水记录
-                    flow_record = {
-                        "user_id": parent.id,
-                        "fund_type": "POINT",
-                        "action": "brothers_distribute_interest",
-                        "amount": current_amount,
-                        "balance_after": current_amount,
-                        "related_fund_type": None,
-                        "related_amount": None,
-                        "remark": "股东收入",
-                        "related_flow_id": None,
-                        "counter_side": record['uid']
-                    }
-                    flow_records.append(flow_record)
+                    # 入账并记录资金流水
+                    ledger.credit(parent_id, current_amount, "brothers_distribute_interest", "股东收入", process, counter_side=record['uid'])
                     
-                    self.logger.info(f"上家 {parent.id} 获得全部剩余收入: {current_amount}")
-                
-                break
+                    self.logger.info(f"上家 {parent_id} 获得全部剩余收入: {current_amount}")
         
-        return incomes, flow_records
\ No newline at end of file
+        return incomes
@@ -4,12 +4,17 @@ import os
 import constants as constants
 from models.lp_exception import LPException
 from models.db_connection import DBConnection
+from models.db_pool import DBConnectionPool
 from services.singleton_service import SingletonService
 
 
 class DBService(SingletonService):
     def __init__(self, logger, mode: str):
         self.logger = logger
+        # 单例会重复执行 __init__，连接池需要跨调用保留
+        if not hasattr(self, "pool"):
+            self.pool = None
+            self.prepare_statements = False
         if mode == constants.env["development"]:
             self.host = "localhost"
             self.database = "postgres"
@@ -74,23 +79,78 @@ class DBService(SingletonService):
                 'sslcompression': False
             }
 
-    def get_connection(self) -> DBConnection:
+    def _connect(self):
+        return psycopg2.connect(
+            user=self.user,
+            password=self.password,
+            host=self.host,
+            database=self.database,
+            port=self.port,
+            sslmode=self.ssl_mode['sslmode'] if self.ssl_mode else None,
+            sslcert=self.ssl_mode['sslcert'] if self.ssl_mode else None,
+            sslkey=self.ssl_mode['sslkey'] if self.ssl_mode else None,
+            sslrootcert=self.ssl_mode['sslrootcert'] if self.ssl_mode else None,
+            sslcrl=self.ssl_mode['sslcrl'] if self.ssl_mode else None,
+            sslcompression=self.ssl_mode['sslcompression'] if self.ssl_mode else None,
+            connect_timeout=10,
+            options='-c statement_timeout=30000'
+        )
+
+    def enable_pool(self, min_size: int = 1, max_size: int = 5, max_lifetime: float = 3600.0,
+                    health_check_idle: float = 30.0, checkout_timeout: float = 30.0):
+        """
+        启用连接池模式，之后 get_connection() 从连接池借出连接，
+        DBConnection.commit()/rollback() 时归还到连接池
+
+        参数:
+            min_size: 预先建立的连接数
+            max_size: 最大连接数
+            max_lifetime: 连接最大存活秒数
+            health_check_idle: 闲置超过该秒数的连接借出前做健康检查
+            checkout_timeout: 等待空闲连接的最长秒数
+        """
+        if self.pool is not None:
+            return
         try:
-            conn = psycopg2.connect(
-                user=self.user,
-                password=self.password,
-                host=self.host,
-                database=self.database,
-                port=self.port,
-                sslmode=self.ssl_mode['sslmode'] if self.ssl_mode else None,
-                sslcert=self.ssl_mode['sslcert'] if self.ssl_mode else None,
-                sslkey=self.ssl_mode['sslkey'] if self.ssl_mode else None,
-                sslrootcert=self.ssl_mode['sslrootcert'] if self.ssl_mode else None,
-                sslcrl=self.ssl_mode['sslcrl'] if self.ssl_mode else None,
-                sslcompression=self.ssl_mode['sslcompression'] if self.ssl_mode else None,
-                connect_timeout=10,
-                options='-c statement_timeout=30000'
+            self.pool = DBConnectionPool(
+                self.logger,
+                self._connect,
+                min_size=min_size,
+                max_size=max_size,
+                max_lifetime=max_lifetime,
+                health_check_idle=health_check_idle,
+                checkout_timeout=checkout_timeout,
             )
-            return DBConnection(self.logger, conn)
+        except LPException:
+            raise
+        except Exception as e:
+            raise LPException(self.logger, "DBService.enable_pool", f"{e}")
+
+    def enable_prepared_statements(self, enabled: bool = True):
+        """
+        之后借出的 DBConnection 在物理连接上 PREPARE 缓存的写语句（insert/update/delete），
+        同一形状的语句重复执行时只传参数
+        """
+        self.prepare_statements = enabled
+
+    def close_pool(self):
+        if self.pool is not None:
+            self.pool.close()
+            self.pool = None
+
+    def get_pool_stats(self) -> dict | None:
+        """连接池统计（借出次数、等待时间、活动连接数等），未启用连接池时返回 None"""
+        if self.pool is None:
+            return None
+        return self.pool.stats()
+
+    def get_connection(self) -> DBConnection:
+        try:
+            if self.pool is not None:
+                return DBConnection(self.logger, self.pool.checkout(), pool=self.pool, prepare=self.prepare_statements)
+            conn = self._connect()
+            return DBConnection(self.logger, conn, prepare=self.prepare_statements)
+        except LPException:
+            raise
         except Exception as e:
             raise LPException(self.logger, "DBService.get_connection", f"{e}")
@@ -4,6 +4,7 @@ from services.singleton_service import SingletonService
 from models.db_connection import DBConnection
 from models.demand import Demand
 import pendulum
+from utils.timestamps import date_to_ms
 
 
 class DemandService(SingletonService):
@@ -15,7 +16,7 @@ class DemandService(SingletonService):
         获取所有已到期的demand记录（base_date > demand_end）
         只获取status为'begin'的记录（'end'状态已通过画面处理，batch无需关心）
         """
-        base_timestamp = int(base_date.timestamp() * 1000)
+        base_timestamp = date_to_ms(base_date)
         sql = """
             select * from demands 
             where demand_end is not null 
@@ -41,3 +42,9 @@ class DemandService(SingletonService):
         json_data = {"status": status}
         conn.update("demands", keys, json_data, user, process)
 
+    def update_demand_statuses(self, conn: DBConnection, demands: list[Demand], status: str, user: int, process: str) -> int:
+        """
+        批量更新demand的状态，返回更新件数
+        """
+        rows = [{"uid": demand.uid, "id": demand.id, "status": status} for demand in demands]
+        return conn.update_many("demands", ["uid", "id"], rows, user, process)
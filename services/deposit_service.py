@@ -5,49 +5,70 @@ from models.db_connection import DBConnection
 from models.deposit import Deposit
 from models.deposit_detail import DepositDetail
 import pendulum
+from typing import Iterator
+from utils.utils import Utils
+from utils.timestamps import now_ms
 
 
 class DepositService(SingletonService):
     def __init__(self, logger):
         self.logger = logger
 
-    def get_deposits(self, conn: DBConnection) -> list[Deposit]:
-        sql = "select * from deposits where status = 'begin' order by deposit_begin desc"
-        datas = conn.select(sql)
-        
-        deposits = []
-        for data in datas:
+    def iter_interest_deposits(self, conn: DBConnection, base_date: pendulum.DateTime, itersize: int = 2000) -> Iterator[Deposit]:
+        """
+        以流方式取得 base_date 可能产生利息的 status='begin' 存款，details 已装好
+
+        first_interest_date（deposit_begin 的下个月1日）在 base_date 之后的存款不会产生利息，
+        等价于 deposit_begin >= base_date 当月1日，在 SQL 里直接排除。
+        deposits 和 deposit_details 各用一条同顺序的查询流式读取，按 (uid, id) 合并，
+        不再每个存款查询一次 details。
+        """
+        utils = Utils()
+        begin_before = utils.date_to_int(base_date.start_of('month'))
+
+        deposit_sql = """
+            select * from deposits
+            where status = 'begin' and deposit_begin < %s
+            order by deposit_begin desc, uid, id
+        """
+        detail_sql = """
+            select dd.*, d.deposit_begin as deposit_begin_
+            from deposit_details dd
+            join deposits d on d.uid = dd.uid and d.id = dd.id
+            where d.status = 'begin' and d.deposit_begin < %s
+            order by d.deposit_begin desc, dd.uid, dd.id, dd.installment
+        """
+        details_iter = conn.select_iter(detail_sql, (begin_before,), itersize=itersize)
+        pending = next(details_iter, None)
+
+        for data in conn.select_iter(deposit_sql, (begin_before,), itersize=itersize):
             deposit = Deposit(data)
-            deposits.append(deposit)
-        
-        return deposits 
+            key = (-data["deposit_begin"], deposit.uid, deposit.id)
+
+            # 两条查询之间新增的存款只会出现在 details 一侧，按排序键跳过
+            while pending is not None and (-pending["deposit_begin_"], pending["uid"], pending["id"]) < key:
+                self.logger.warning(f"deposit_details {pending['uid']}-{pending['id']} 没有对应的存款，跳过")
+                pending = next(details_iter, None)
 
-    def get_deposit_details(self, conn: DBConnection, deposit: Deposit):
-        sql = "select * from deposit_details where uid = %s and id = %s order by installment"
-        datas = conn.select(sql, (deposit.uid, deposit.id))
-        
-        details = []
-        for data in datas:
-            detail = DepositDetail(data)
-            details.append(detail)
-        
-        deposit.init_details(details)
-    
-    def get_ndy_deposit_details(self, conn: DBConnection):
+            details = []
+            while pending is not None and pending["uid"] == deposit.uid and pending["id"] == deposit.id:
+                details.append(DepositDetail(pending))
+                pending = next(details_iter, None)
+            deposit.init_details(details)
+            yield deposit
+
+        # 关闭 details 的服务端游标
+        details_iter.close()
+
+    def iter_ndy_deposit_details(self, conn: DBConnection, itersize: int = 2000) -> Iterator[DepositDetail]:
         sql = "select * from deposit_details where status='NDY'"
-        datas = conn.select(sql)
-        
-        details = []
-        for data in datas:
-            detail = DepositDetail(data)
-            details.append(detail)
-        
-        return details
+        for data in conn.select_iter(sql, itersize=itersize):
+            yield DepositDetail(data)
 
     def save_deposit_interests(self, conn: DBConnection, interests: list, user: int, process: str) -> None:
         if not interests or len(interests) == 0:
             return    
-        conn.insertMany("deposit_interests", interests, user, process)
+        conn.bulk_insert("deposit_interests", interests, user, process)
 
     def save_deposit_details(self, conn: DBConnection, details: list, user: int, process: str) -> None:
         if not details or len(details) == 0:
@@ -56,7 +77,7 @@ class DepositService(SingletonService):
 
     def update_deposit_status(self, conn: DBConnection, uid: int, id: int, user: int, process: str) -> None:
         keys = {"uid": uid, "id": id}
-        now = int(pendulum.now().timestamp() * 1000)
+        now = now_ms()
         json_data = {"status": "end", "deposit_end": now}
         conn.update("deposits", keys, json_data, user, process)
 
@@ -64,3 +85,11 @@ class DepositService(SingletonService):
         keys = {"uid": uid, "id": id, "installment": installment}
         json_data = {"status": status}
         conn.update("deposit_details", keys, json_data, user, process)
+
+    def update_deposit_detail_statuses(self, conn: DBConnection, details: list[DepositDetail], status: str, user: int, process: str) -> int:
+        """批量更新 deposit_details 的状态，返回更新件数"""
+        rows = [
+            {"uid": detail.uid, "id": detail.id, "installment": detail.installment, "status": status}
+            for detail in details
+        ]
+        return conn.update_many("deposit_details", ["uid", "id", "installment"], rows, user, process)
@@ -1,6 +1,7 @@
 # -*- coding: utf-8 -*-
 from models.lp_exception import LPException
 from services.singleton_service import SingletonService
+from utils.http_client import HttpClient
 import requests
 import json
 import os
@@ -31,7 +32,7 @@ class NotificationService(SingletonService):
         payload = {"text": message}
 
         try:
-            response = requests.post(self.slack_webhook_url, headers=headers, json=payload, timeout=10)
+            response = HttpClient().post(self.slack_webhook_url, headers=headers, json=payload, timeout=10)
             response.raise_for_status()
         except requests.exceptions.Timeout:
             self.logger.error("Slack notification timed out.")
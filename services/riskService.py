@@ -1,10 +1,15 @@
 # -*- coding: utf-8 -*-
 from models.lp_exception import LPException
+from models.risk_cache import RiskCache, KIND_WALLET, KIND_TRANSACTION
 from services.singleton_service import SingletonService
+from utils.rate_limiter import TokenBucket, RetryPolicy, parse_retry_after
+from utils.http_client import HttpClient
+import constants as constants
 import requests
 import json
 import time
-from typing import Optional, Dict
+from collections import deque
+from typing import Optional, Dict, Iterable, Iterator, Tuple
 
 
 class RiskService(SingletonService):
@@ -13,6 +18,135 @@ class RiskService(SingletonService):
         self.api_key = api_key
         self.create_task_url = "https://openapi.misttrack.io/v2/risk_score_create_task"
         self.query_task_url = "https://openapi.misttrack.io/v2/risk_score_query_task"
+        self.wallet_ttl = constants.risk_cache["wallet_ttl"]
+        # 单例会重复执行 __init__，缓存需要跨调用保留
+        if not hasattr(self, "cache"):
+            self.cache = RiskCache(max_size=constants.risk_cache["max_size"])
+            # 进程内所有 MistTrack 请求共用一个令牌桶（按套餐的 QPS）
+            self.limiter = TokenBucket(constants.misttrack["qps"], constants.misttrack["burst"])
+        self.window = constants.misttrack["window"]
+        self.retry_max_delay = constants.misttrack["retry_max_delay"]
+
+    def use_cache(self, cache: RiskCache):
+        """替换风险评估结果的缓存（例如换成 PostgresRiskCache）"""
+        self.cache = cache
+
+    def cache_stats(self) -> dict:
+        """风险评估缓存的命中/未命中次数等统计"""
+        return self.cache.stats()
+
+    def limiter_stats(self) -> dict:
+        """MistTrack 令牌桶的统计（取得次数、等待秒数、429 暂停次数）"""
+        return self.limiter.stats()
+
+    def _request(self, method: str, url: str, error_function: str, target: str, max_retries: int, initial_delay: float, **kwargs) -> Dict:
+        """
+        MistTrack 请求的共通处理，返回解析后的 JSON
+        
+        - 每次请求（包括重试）先从令牌桶取得令牌
+        - 429 / 超时 / 连接错误按 RetryPolicy 重试（带抖动的指数退避）；
+          429 时暂停整个令牌桶（Retry-After，没有时为 base_delay * 2^attempt 的退避上限）
+        - 其他非 200 响应和无法解析的 JSON 不重试，直接抛出 LPException
+        """
+        policy = RetryPolicy(max_retries, initial_delay, self.retry_max_delay)
+        attempt = 0
+        while True:
+            self.limiter.acquire()
+            retry_after = None
+            error = None
+            try:
+                response = HttpClient().request(method, url, timeout=30, **kwargs)
+            except requests.exceptions.Timeout as e:
+                failure, error = "Request timeout", e
+            except requests.exceptions.ConnectionError as e:
+                failure, error = "Connection error", e
+            except requests.exceptions.RequestException as e:
+                raise LPException(self.logger, error_function, f"API request failed for {target}: {e}")
+            else:
+                if response.status_code == 429:
+                    failure = "Rate limit (429)"
+                    retry_after = parse_retry_after(response.headers.get('Retry-After'))
+                elif response.status_code != 200:
+                    error_text = response.text
+                    self.logger.error(f"API returned non-200 status code {response.status_code}: {error_text}")
+                    raise LPException(self.logger, error_function, f"API returned status {response.status_code}: {error_text}")
+                else:
+                    try:
+                        return response.json()
+                    except ValueError:
+                        self.logger.error(f"Failed to parse JSON response: {response.text}")
+                        raise LPException(self.logger, error_function, f"Invalid JSON response: {response.text}")
+            
+            if attempt >= max_retries:
+                detail = f"{failure} after {max_retries + 1} attempts for {target}"
+                raise LPException(self.logger, error_function, f"{detail}: {error}" if error else detail)
+            
+            delay = policy.backoff(attempt, retry_after)
+            if failure.startswith("Rate limit"):
+                # 其他线程也在 Retry-After（没有时为不带抖动的退避上限）内停止请求；
+                # 抖动只加在本线程自己的等待上，暂停时间不会接近 0
+                self.limiter.penalize(retry_after if retry_after is not None else policy.cap(attempt))
+            self.logger.warning(f"{failure} for {target} on attempt {attempt + 1}/{max_retries + 1}. Will retry in {delay:.1f}s...")
+            time.sleep(delay)
+            attempt += 1
+
+    def _task_data(self, result: Dict, error_function: str) -> Dict:
+        """risk_score_create_task 的响应 -> data"""
+        # 检查 API 响应格式
+        if 'success' not in result:
+            self.logger.error(f"API response missing 'success' field: {result}")
+            raise LPException(self.logger, error_function, f"Invalid API response format: missing 'success' field")
+        
+        if not result.get('success', False):
+            error_msg = result.get('msg', 'Unknown error')
+            self.logger.error(f"API returned error: {error_msg}, full response: {result}")
+            raise LPException(self.logger, error_function, f"API returned error: {error_msg}")
+        
+        # 检查 data 字段
+        data = result.get('data', {})
+        if not data:
+            self.logger.error(f"API response missing 'data' field: {result}")
+            raise LPException(self.logger, error_function, f"API response missing 'data' field: {result}")
+        
+        return data
+
+    def _query_result(self, result: Dict, error_function: str) -> Optional[Dict]:
+        """risk_score_query_task 的响应 -> 结果 data，任务还未完成时返回 None"""
+        if not result.get('success', False):
+            error_msg = result.get('msg', 'Unknown error')
+            # 如果任务还未完成，返回None而不是抛出异常
+            if 'not ready' in error_msg.lower() or 'no result' in error_msg.lower():
+                return None
+            raise LPException(self.logger, error_function, f"API returned error: {error_msg}")
+        
+        data = result.get('data', {})
+        # 检查任务是否已完成：如果数据中包含 score 字段，说明结果已经准备好
+        if 'score' in data:
+            return data
+        
+        if data.get('has_result', False):
+            return data
+        
+        return None
+
+    def _check_task_data(self, task_data: Dict, error_function: str, target: str):
+        """检查 risk_score_create_task 返回的数据"""
+        if not task_data:
+            raise LPException(self.logger, error_function, f"Task creation returned empty data for {target}")
+        if 'error' in task_data or 'error_msg' in task_data:
+            error_info = task_data.get('error') or task_data.get('error_msg')
+            raise LPException(self.logger, error_function, f"Task creation returned error: {error_info}")
+
+    def _wallet_assessment(self, wallet_address: str, result: Dict) -> Dict:
+        return {
+            'wallet_address': wallet_address,
+            'score': result.get('score', 0),
+            'risk_level': result.get('risk_level', 'Unknown'),
+            'hacking_event': result.get('hacking_event', ''),
+            'detail_list': result.get('detail_list', []),
+            'risk_detail': result.get('risk_detail', []),
+            'scanned_ts': result.get('scanned_ts', 0)
+        }
     
     def _create_risk_task(self, wallet_address: str, coin: str = "USDT-TRC20", max_retries: int = 3, initial_delay: float = 1.0) -> Dict:
         """
@@ -22,7 +156,7 @@ class RiskService(SingletonService):
             wallet_address: 钱包地址
             coin: 币种类型（默认USDT-TRC20）
             max_retries: 最大重试次数
-            initial_delay: 初始延迟秒数
+            initial_delay: 重试退避的基础秒数
         
         返回:
             dict: API响应数据
@@ -30,91 +164,17 @@ class RiskService(SingletonService):
         if not self.api_key:
             raise LPException(self.logger, "RiskService._create_risk_task", "API key is not set")
         
-        headers = {
-            'Content-Type': 'application/json'
-        }
-        
         payload = {
             "address": wallet_address,
             "coin": coin,
             "api_key": self.api_key
         }
         
-        delay = initial_delay
-        last_exception = None
-        
-        for attempt in range(max_retries + 1):
-            try:
-                if attempt > 0:
-                    time.sleep(delay)
-                    delay *= 2
-                
-                response = requests.post(
-                    self.create_task_url,
-                    headers=headers,
-                    json=payload,
-                    timeout=30
-                )
-                
-                if response.status_code == 429:
-                    last_exception = requests.exceptions.HTTPError(f"Rate limit (429) on attempt {attempt + 1}")
-                    if attempt < max_retries:
-                        self.logger.warning(f"Rate limit hit (429) for wallet {wallet_address} on attempt {attempt + 1}/{max_retries + 1}. Will retry...")
-                        continue
-                    else:
-                        raise LPException(self.logger, "RiskService._create_risk_task", f"Rate limit (429) after {max_retries + 1} attempts for wallet {wallet_address}")
-                
-                # 检查 HTTP 状态码
-                if response.status_code != 200:
-                    error_text = response.text
-                    self.logger.error(f"API returned non-200 status code {response.status_code}: {error_text}")
-                    raise LPException(self.logger, "RiskService._create_risk_task", f"API returned status {response.status_code}: {error_text}")
-                
-                try:
-                    result = response.json()
-                except ValueError as e:
-                    self.logger.error(f"Failed to parse JSON response: {response.text}")
-                    raise LPException(self.logger, "RiskService._create_risk_task", f"Invalid JSON response: {response.text}")
-                
-                # 检查 API 响应格式
-                if 'success' not in result:
-                    self.logger.error(f"API response missing 'success' field: {result}")
-                    raise LPException(self.logger, "RiskService._create_risk_task", f"Invalid API response format: missing 'success' field")
-                
-                if not result.get('success', False):
-                    error_msg = result.get('msg', 'Unknown error')
-                    self.logger.error(f"API returned error: {error_msg}, full response: {result}")
-                    raise LPException(self.logger, "RiskService._create_risk_task", f"API returned error: {error_msg}")
-                
-                # 检查 data 字段
-                data = result.get('data', {})
-                if not data:
-                    self.logger.error(f"API response missing 'data' field: {result}")
-                    raise LPException(self.logger, "RiskService._create_risk_task", f"API response missing 'data' field: {result}")
-                
-                return data
-                
-            except requests.exceptions.Timeout as e:
-                last_exception = e
-                if attempt < max_retries:
-                    self.logger.warning(f"Request timeout for wallet {wallet_address} on attempt {attempt + 1}/{max_retries + 1}. Will retry...")
-                    continue
-                else:
-                    raise LPException(self.logger, "RiskService._create_risk_task", f"Request timeout after {max_retries + 1} attempts for wallet {wallet_address}: {e}")
-            except requests.exceptions.ConnectionError as e:
-                last_exception = e
-                if attempt < max_retries:
-                    self.logger.warning(f"Connection error for wallet {wallet_address} on attempt {attempt + 1}/{max_retries + 1}. Will retry...")
-                    continue
-                else:
-                    raise LPException(self.logger, "RiskService._create_risk_task", f"Connection error after {max_retries + 1} attempts for wallet {wallet_address}: {e}")
-            except requests.exceptions.RequestException as e:
-                raise LPException(self.logger, "RiskService._create_risk_task", f"API request failed for wallet {wallet_address}: {e}")
-            except Exception as e:
-                raise LPException(self.logger, "RiskService._create_risk_task", f"Unexpected error while creating risk task for wallet {wallet_address}: {e}")
-        
-        if last_exception:
-            raise LPException(self.logger, "RiskService._create_risk_task", f"Failed to create risk task after {max_retries + 1} attempts: {last_exception}")
+        result = self._request(
+            "POST", self.create_task_url, "RiskService._create_risk_task", f"wallet {wallet_address}", max_retries, initial_delay,
+            headers={'Content-Type': 'application/json'}, json=payload
+        )
+        return self._task_data(result, "RiskService._create_risk_task")
     
     def _query_risk_task(self, wallet_address: str, coin: str = "USDT-TRC20", max_retries: int = 3, initial_delay: float = 1.0) -> Optional[Dict]:
         """
@@ -124,7 +184,7 @@ class RiskService(SingletonService):
             wallet_address: 钱包地址
             coin: 币种类型（默认USDT-TRC20）
             max_retries: 最大重试次数
-            initial_delay: 初始延迟秒数
+            initial_delay: 重试退避的基础秒数
         
         返回:
             dict: 风险评估结果，如果任务还未完成则返回None
@@ -138,89 +198,22 @@ class RiskService(SingletonService):
             "api_key": self.api_key
         }
         
-        delay = initial_delay
-        last_exception = None
-        
-        for attempt in range(max_retries + 1):
-            try:
-                if attempt > 0:
-                    time.sleep(delay)
-                    delay *= 2
-                
-                response = requests.get(
-                    self.query_task_url,
-                    params=params,
-                    timeout=30
-                )
-                
-                if response.status_code == 429:
-                    last_exception = requests.exceptions.HTTPError(f"Rate limit (429) on attempt {attempt + 1}")
-                    if attempt < max_retries:
-                        self.logger.warning(f"Rate limit hit (429) for wallet {wallet_address} on attempt {attempt + 1}/{max_retries + 1}. Will retry...")
-                        continue
-                    else:
-                        raise LPException(self.logger, "RiskService._query_risk_task", f"Rate limit (429) after {max_retries + 1} attempts for wallet {wallet_address}")
-                
-                # 检查 HTTP 状态码
-                if response.status_code != 200:
-                    error_text = response.text
-                    self.logger.error(f"Query API returned non-200 status code {response.status_code}: {error_text}")
-                    raise LPException(self.logger, "RiskService._query_risk_task", f"API returned status {response.status_code}: {error_text}")
-                
-                try:
-                    result = response.json()
-                except ValueError as e:
-                    self.logger.error(f"Failed to parse JSON response: {response.text}")
-                    raise LPException(self.logger, "RiskService._query_risk_task", f"Invalid JSON response: {response.text}")
-                
-                if not result.get('success', False):
-                    error_msg = result.get('msg', 'Unknown error')
-                    # 如果任务还未完成，返回None而不是抛出异常
-                    if 'not ready' in error_msg.lower() or 'no result' in error_msg.lower():
-                        return None
-                    raise LPException(self.logger, "RiskService._query_risk_task", f"API returned error: {error_msg}")
-                
-                data = result.get('data', {})
-                # 检查任务是否已完成：如果数据中包含 score 字段，说明结果已经准备好
-                if 'score' in data:
-                    return data
-                
-                if data.get('has_result', False):
-                    return data
-                
-                return None
-                
-            except requests.exceptions.Timeout as e:
-                last_exception = e
-                if attempt < max_retries:
-                    self.logger.warning(f"Request timeout for wallet {wallet_address} on attempt {attempt + 1}/{max_retries + 1}. Will retry...")
-                    continue
-                else:
-                    raise LPException(self.logger, "RiskService._query_risk_task", f"Request timeout after {max_retries + 1} attempts for wallet {wallet_address}: {e}")
-            except requests.exceptions.ConnectionError as e:
-                last_exception = e
-                if attempt < max_retries:
-                    self.logger.warning(f"Connection error for wallet {wallet_address} on attempt {attempt + 1}/{max_retries + 1}. Will retry...")
-                    continue
-                else:
-                    raise LPException(self.logger, "RiskService._query_risk_task", f"Connection error after {max_retries + 1} attempts for wallet {wallet_address}: {e}")
-            except requests.exceptions.RequestException as e:
-                raise LPException(self.logger, "RiskService._query_risk_task", f"API request failed for wallet {wallet_address}: {e}")
-            except Exception as e:
-                raise LPException(self.logger, "RiskService._query_risk_task", f"Unexpected error while querying risk task for wallet {wallet_address}: {e}")
-        
-        if last_exception:
-            raise LPException(self.logger, "RiskService._query_risk_task", f"Failed to query risk task after {max_retries + 1} attempts: {last_exception}")
+        result = self._request(
+            "GET", self.query_task_url, "RiskService._query_risk_task", f"wallet {wallet_address}", max_retries, initial_delay, params=params
+        )
+        return self._query_result(result, "RiskService._query_risk_task")
     
-    def assess_wallet_risk(self, wallet_address: str, coin: str = "USDT-TRC20", max_polling_attempts: int = 3, polling_interval: float = 2.0) -> Dict:
+    def assess_wallet_risk(self, wallet_address: str, coin: str = "USDT-TRC20", max_polling_attempts: int = 3, polling_interval: float = 2.0,
+                           use_cache: bool = True) -> Dict:
         """
-        评估钱包地址的风险
+        评估钱包地址的风险（wallet_ttl 秒内的结果从缓存返回，不访问 API）
         
         参数:
             wallet_address: 钱包地址
             coin: 币种类型（默认USDT-TRC20，内部使用，用户无需指定）
             max_polling_attempts: 最大轮询次数（默认3次）
             polling_interval: 轮询间隔秒数（默认2秒）
+            use_cache: 是否使用缓存（False 时总是访问 API，结果仍写入缓存）
         
         返回:
             dict: 包含以下键的字典:
@@ -235,23 +228,17 @@ class RiskService(SingletonService):
         异常:
             LPException: 当API请求失败或查询失败时抛出
         """
-        # 在方法开始时sleep 1秒，降低API调用频率
-        time.sleep(1.0)
-        
+        if use_cache:
+            cached = self.cache.get(KIND_WALLET, wallet_address, coin)
+            if cached is not None:
+                return cached
         
         # 1. 创建风险评估任务
         try:
             task_data = self._create_risk_task(wallet_address, coin)
             
             # 验证任务数据
-            if not task_data:
-                raise LPException(self.logger, "RiskService.assess_wallet_risk", f"Task creation returned empty data for wallet {wallet_address}")
-            
-            
-            # 检查是否有错误信息
-            if 'error' in task_data or 'error_msg' in task_data:
-                error_info = task_data.get('error') or task_data.get('error_msg')
-                raise LPException(self.logger, "RiskService.assess_wallet_risk", f"Task creation returned error: {error_info}")
+            self._check_task_data(task_data, "RiskService.assess_wallet_risk", f"wallet {wallet_address}")
                 
         except LPException as e:
             self.logger.error(f"Failed to create risk task for wallet {wallet_address}: {e.error_detail}")
@@ -287,27 +274,109 @@ class RiskService(SingletonService):
             raise LPException(self.logger, "RiskService.assess_wallet_risk", f"Failed to get risk assessment result for wallet {wallet_address} after {max_polling_attempts} polling attempts")
         
         # 3. 格式化返回结果
-        risk_assessment = {
-            'wallet_address': wallet_address,
-            'score': result.get('score', 0),
-            'risk_level': result.get('risk_level', 'Unknown'),
-            'hacking_event': result.get('hacking_event', ''),
-            'detail_list': result.get('detail_list', []),
-            'risk_detail': result.get('risk_detail', []),
-            'scanned_ts': result.get('scanned_ts', 0)
-        }
+        risk_assessment = self._wallet_assessment(wallet_address, result)
+        
+        self.cache.put(KIND_WALLET, wallet_address, coin, risk_assessment, self.wallet_ttl)
         
         return risk_assessment
+
+    def assess_many(self, wallet_addresses: Iterable[str], coin: str = "USDT-TRC20", window: Optional[int] = None,
+                    max_polling_attempts: int = 3, polling_interval: float = 2.0,
+                    use_cache: bool = True) -> Iterator[Tuple[str, Optional[Dict], Optional[Exception]]]:
+        """
+        批量评估多个钱包地址的风险，按完成顺序 yield (钱包地址, 评估结果, 异常)
+        
+        - 创建任务后不等待结果，继续为后面的地址创建任务，同时在途的任务最多 window 个
+        - 在途任务各自从创建后 polling_interval 秒开始轮询，到时的任务一起查询；
+          只有没有任何任务到时的时候才 sleep
+        - 所有请求共用令牌桶的速率限制（见 _request）
+        - 缓存命中的地址直接 yield，重复的地址只评估一次
+        
+        参数:
+            wallet_addresses: 钱包地址
+            coin: 币种类型（默认USDT-TRC20）
+            window: 同时在途的任务数（默认 constants.misttrack["window"]）
+            max_polling_attempts: 每个任务的最大轮询次数（默认3次）
+            polling_interval: 轮询间隔秒数（默认2秒）
+            use_cache: 是否使用缓存
+        
+        返回:
+            (钱包地址, 与 assess_wallet_risk 相同格式的结果, None)，
+            失败时为 (钱包地址, None, 异常)
+        """
+        window = window or self.window
+        pending = deque(dict.fromkeys(wallet_addresses))
+        # 钱包地址 -> [下次轮询时刻, 剩余轮询次数]
+        outstanding: Dict[str, list] = {}
+        
+        while pending or outstanding:
+            # 1. 补充在途任务
+            while pending and len(outstanding) < window:
+                wallet_address = pending.popleft()
+                if use_cache:
+                    cached = self.cache.get(KIND_WALLET, wallet_address, coin)
+                    if cached is not None:
+                        yield wallet_address, cached, None
+                        continue
+                try:
+                    task_data = self._create_risk_task(wallet_address, coin)
+                    self._check_task_data(task_data, "RiskService.assess_many", f"wallet {wallet_address}")
+                except Exception as e:
+                    self.logger.error(f"Failed to create risk task for wallet {wallet_address}: {getattr(e, 'error_detail', e)}")
+                    yield wallet_address, None, e
+                    continue
+                outstanding[wallet_address] = [time.monotonic() + polling_interval, max_polling_attempts]
+            
+            if not outstanding:
+                continue
+            
+            # 2. 轮询已到时的任务，没有到时的任务时等到最早的一个
+            now = time.monotonic()
+            due = [address for address, (poll_at, _) in outstanding.items() if poll_at <= now]
+            if not due:
+                time.sleep(min(poll_at for poll_at, _ in outstanding.values()) - now)
+                continue
+            
+            for wallet_address in due:
+                state = outstanding[wallet_address]
+                try:
+                    result = self._query_risk_task(wallet_address, coin)
+                except Exception as e:
+                    del outstanding[wallet_address]
+                    self.logger.error(f"Error while polling risk task result for wallet {wallet_address}: {getattr(e, 'error_detail', e)}")
+                    yield wallet_address, None, e
+                    continue
+                
+                if result is not None:
+                    del outstanding[wallet_address]
+                    risk_assessment = self._wallet_assessment(wallet_address, result)
+                    self.cache.put(KIND_WALLET, wallet_address, coin, risk_assessment, self.wallet_ttl)
+                    yield wallet_address, risk_assessment, None
+                    continue
+                
+                state[1] -= 1
+                if state[1] > 0:
+                    state[0] = time.monotonic() + polling_interval
+                    continue
+                
+                del outstanding[wallet_address]
+                self.logger.warning(f"Risk task result not ready after {max_polling_attempts} polling attempts for wallet {wallet_address}")
+                yield wallet_address, None, LPException(
+                    self.logger, "RiskService.assess_many",
+                    f"Failed to get risk assessment result for wallet {wallet_address} after {max_polling_attempts} polling attempts"
+                )
     
-    def assess_transaction_risk(self, transaction_id: str, coin: str = "USDT-TRC20", max_polling_attempts: int = 3, polling_interval: float = 2.0) -> Dict:
+    def assess_transaction_risk(self, transaction_id: str, coin: str = "USDT-TRC20", max_polling_attempts: int = 3, polling_interval: float = 2.0,
+                                use_cache: bool = True) -> Dict:
         """
-        评估交易的风险
+        评估交易的风险（交易扫描后结果不再变化，缓存不过期）
         
         参数:
             transaction_id: 交易ID（交易哈希）
             coin: 币种类型（默认USDT-TRC20）
             max_polling_attempts: 最大轮询次数（默认3次）
             polling_interval: 轮询间隔秒数（默认2秒）
+            use_cache: 是否使用缓存（False 时总是访问 API，结果仍写入缓存）
         
         返回:
             dict: 包含以下键的字典:
@@ -322,8 +391,10 @@ class RiskService(SingletonService):
         异常:
             LPException: 当API请求失败或查询失败时抛出
         """
-        # 在方法开始时sleep 1秒，降低API调用频率
-        time.sleep(1.0)
+        if use_cache:
+            cached = self.cache.get(KIND_TRANSACTION, transaction_id, coin)
+            if cached is not None:
+                return cached
         
         self.logger.info(f"Starting risk assessment for transaction: {transaction_id}")
         
@@ -332,14 +403,7 @@ class RiskService(SingletonService):
             task_data = self._create_transaction_risk_task(transaction_id, coin)
             
             # 验证任务数据
-            if not task_data:
-                raise LPException(self.logger, "RiskService.assess_transaction_risk", f"Task creation returned empty data for transaction {transaction_id}")
-            
-            
-            # 检查是否有错误信息
-            if 'error' in task_data or 'error_msg' in task_data:
-                error_info = task_data.get('error') or task_data.get('error_msg')
-                raise LPException(self.logger, "RiskService.assess_transaction_risk", f"Task creation returned error: {error_info}")
+            self._check_task_data(task_data, "RiskService.assess_transaction_risk", f"transaction {transaction_id}")
                 
         except LPException as e:
             self.logger.error(f"Failed to create risk task for transaction {transaction_id}: {e.error_detail}")
@@ -385,6 +449,8 @@ class RiskService(SingletonService):
             'scanned_ts': result.get('scanned_ts', 0)
         }
         
+        self.cache.put(KIND_TRANSACTION, transaction_id, coin, risk_assessment, None)
+        
         return risk_assessment
     
     def _create_transaction_risk_task(self, transaction_id: str, coin: str = "USDT-TRC20", max_retries: int = 3, initial_delay: float = 1.0) -> Dict:
@@ -395,7 +461,7 @@ class RiskService(SingletonService):
             transaction_id: 交易ID（交易哈希）
             coin: 币种类型（默认USDT-TRC20）
             max_retries: 最大重试次数
-            initial_delay: 初始延迟秒数
+            initial_delay: 重试退避的基础秒数
         
         返回:
             dict: API响应数据
@@ -403,91 +469,17 @@ class RiskService(SingletonService):
         if not self.api_key:
             raise LPException(self.logger, "RiskService._create_transaction_risk_task", "API key is not set")
         
-        headers = {
-            'Content-Type': 'application/json'
-        }
-        
         payload = {
             "txid": transaction_id,
             "coin": coin,
             "api_key": self.api_key
         }
         
-        delay = initial_delay
-        last_exception = None
-        
-        for attempt in range(max_retries + 1):
-            try:
-                if attempt > 0:
-                    time.sleep(delay)
-                    delay *= 2
-                
-                response = requests.post(
-                    self.create_task_url,
-                    headers=headers,
-                    json=payload,
-                    timeout=30
-                )
-                
-                if response.status_code == 429:
-                    last_exception = requests.exceptions.HTTPError(f"Rate limit (429) on attempt {attempt + 1}")
-                    if attempt < max_retries:
-                        self.logger.warning(f"Rate limit hit (429) for transaction {transaction_id} on attempt {attempt + 1}/{max_retries + 1}. Will retry...")
-                        continue
-                    else:
-                        raise LPException(self.logger, "RiskService._create_transaction_risk_task", f"Rate limit (429) after {max_retries + 1} attempts for transaction {transaction_id}")
-                
-                # 检查 HTTP 状态码
-                if response.status_code != 200:
-                    error_text = response.text
-                    self.logger.error(f"API returned non-200 status code {response.status_code}: {error_text}")
-                    raise LPException(self.logger, "RiskService._create_transaction_risk_task", f"API returned status {response.status_code}: {error_text}")
-                
-                try:
-                    result = response.json()
-                except ValueError as e:
-                    self.logger.error(f"Failed to parse JSON response: {response.text}")
-                    raise LPException(self.logger, "RiskService._create_transaction_risk_task", f"Invalid JSON response: {response.text}")
-                
-                # 检查 API 响应格式
-                if 'success' not in result:
-                    self.logger.error(f"API response missing 'success' field: {result}")
-                    raise LPException(self.logger, "RiskService._create_transaction_risk_task", f"Invalid API response format: missing 'success' field")
-                
-                if not result.get('success', False):
-                    error_msg = result.get('msg', 'Unknown error')
-                    self.logger.error(f"API returned error: {error_msg}, full response: {result}")
-                    raise LPException(self.logger, "RiskService._create_transaction_risk_task", f"API returned error: {error_msg}")
-                
-                # 检查 data 字段
-                data = result.get('data', {})
-                if not data:
-                    self.logger.error(f"API response missing 'data' field: {result}")
-                    raise LPException(self.logger, "RiskService._create_transaction_risk_task", f"API response missing 'data' field: {result}")
-                
-                return data
-                
-            except requests.exceptions.Timeout as e:
-                last_exception = e
-                if attempt < max_retries:
-                    self.logger.warning(f"Request timeout for transaction {transaction_id} on attempt {attempt + 1}/{max_retries + 1}. Will retry...")
-                    continue
-                else:
-                    raise LPException(self.logger, "RiskService._create_transaction_risk_task", f"Request timeout after {max_retries + 1} attempts for transaction {transaction_id}: {e}")
-            except requests.exceptions.ConnectionError as e:
-                last_exception = e
-                if attempt < max_retries:
-                    self.logger.warning(f"Connection error for transaction {transaction_id} on attempt {attempt + 1}/{max_retries + 1}. Will retry...")
-                    continue
-                else:
-                    raise LPException(self.logger, "RiskService._create_transaction_risk_task", f"Connection error after {max_retries + 1} attempts for transaction {transaction_id}: {e}")
-            except requests.exceptions.RequestException as e:
-                raise LPException(self.logger, "RiskService._create_transaction_risk_task", f"API request failed for transaction {transaction_id}: {e}")
-            except Exception as e:
-                raise LPException(self.logger, "RiskService._create_transaction_risk_task", f"Unexpected error while creating risk task for transaction {transaction_id}: {e}")
-        
-        if last_exception:
-            raise LPException(self.logger, "RiskService._create_transaction_risk_task", f"Failed to create risk task after {max_retries + 1} attempts: {last_exception}")
+        result = self._request(
+            "POST", self.create_task_url, "RiskService._create_transaction_risk_task", f"transaction {transaction_id}", max_retries, initial_delay,
+            headers={'Content-Type': 'application/json'}, json=payload
+        )
+        return self._task_data(result, "RiskService._create_transaction_risk_task")
     
     def _query_transaction_risk_task(self, transaction_id: str, coin: str = "USDT-TRC20", max_retries: int = 3, initial_delay: float = 1.0) -> Optional[Dict]:
         """
@@ -497,7 +489,7 @@ class RiskService(SingletonService):
             transaction_id: 交易ID（交易哈希）
             coin: 币种类型（默认USDT-TRC20）
             max_retries: 最大重试次数
-            initial_delay: 初始延迟秒数
+            initial_delay: 重试退避的基础秒数
         
         返回:
             dict: 风险评估结果，如果任务还未完成则返回None
@@ -511,79 +503,10 @@ class RiskService(SingletonService):
             "api_key": self.api_key
         }
         
-        delay = initial_delay
-        last_exception = None
-        
-        for attempt in range(max_retries + 1):
-            try:
-                if attempt > 0:
-                    time.sleep(delay)
-                    delay *= 2
-                
-                response = requests.get(
-                    self.query_task_url,
-                    params=params,
-                    timeout=30
-                )
-                
-                if response.status_code == 429:
-                    last_exception = requests.exceptions.HTTPError(f"Rate limit (429) on attempt {attempt + 1}")
-                    if attempt < max_retries:
-                        self.logger.warning(f"Rate limit hit (429) for transaction {transaction_id} on attempt {attempt + 1}/{max_retries + 1}. Will retry...")
-                        continue
-                    else:
-                        raise LPException(self.logger, "RiskService._query_transaction_risk_task", f"Rate limit (429) after {max_retries + 1} attempts for transaction {transaction_id}")
-                
-                # 检查 HTTP 状态码
-                if response.status_code != 200:
-                    error_text = response.text
-                    self.logger.error(f"Query API returned non-200 status code {response.status_code}: {error_text}")
-                    raise LPException(self.logger, "RiskService._query_transaction_risk_task", f"API returned status {response.status_code}: {error_text}")
-                
-                try:
-                    result = response.json()
-                except ValueError as e:
-                    self.logger.error(f"Failed to parse JSON response: {response.text}")
-                    raise LPException(self.logger, "RiskService._query_transaction_risk_task", f"Invalid JSON response: {response.text}")
-                
-                if not result.get('success', False):
-                    error_msg = result.get('msg', 'Unknown error')
-                    # 如果任务还未完成，返回None而不是抛出异常
-                    if 'not ready' in error_msg.lower() or 'no result' in error_msg.lower():
-                        return None
-                    raise LPException(self.logger, "RiskService._query_transaction_risk_task", f"API returned error: {error_msg}")
-                
-                data = result.get('data', {})
-                # 检查任务是否已完成：如果数据中包含 score 字段，说明结果已经准备好
-                if 'score' in data:
-                    return data
-                
-                if data.get('has_result', False):
-                    return data
-                
-                return None
-                
-            except requests.exceptions.Timeout as e:
-                last_exception = e
-                if attempt < max_retries:
-                    self.logger.warning(f"Request timeout for transaction {transaction_id} on attempt {attempt + 1}/{max_retries + 1}. Will retry...")
-                    continue
-                else:
-                    raise LPException(self.logger, "RiskService._query_transaction_risk_task", f"Request timeout after {max_retries + 1} attempts for transaction {transaction_id}: {e}")
-            except requests.exceptions.ConnectionError as e:
-                last_exception = e
-                if attempt < max_retries:
-                    self.logger.warning(f"Connection error for transaction {transaction_id} on attempt {attempt + 1}/{max_retries + 1}. Will retry...")
-                    continue
-                else:
-                    raise LPException(self.logger, "RiskService._query_transaction_risk_task", f"Connection error after {max_retries + 1} attempts for transaction {transaction_id}: {e}")
-            except requests.exceptions.RequestException as e:
-                raise LPException(self.logger, "RiskService._query_transaction_risk_task", f"API request failed for transaction {transaction_id}: {e}")
-            except Exception as e:
-                raise LPException(self.logger, "RiskService._query_transaction_risk_task", f"Unexpected error while querying risk task for transaction {transaction_id}: {e}")
-        
-        if last_exception:
-            raise LPException(self.logger, "RiskService._query_transaction_risk_task", f"Failed to query risk task after {max_retries + 1} attempts: {last_exception}")
+        result = self._request(
+            "GET", self.query_task_url, "RiskService._query_transaction_risk_task", f"transaction {transaction_id}", max_retries, initial_delay, params=params
+        )
+        return self._query_result(result, "RiskService._query_transaction_risk_task")
     
     def analyseRisk(self, score: int, risk_level: str, hacking_event: str, detail_list: list, risk_detail: list) -> tuple:
         """
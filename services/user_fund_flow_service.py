@@ -12,4 +12,4 @@ class UserFundFlowService(SingletonService):
     def save_deposit_interest_flows(self, conn: DBConnection, flows: list, user: int, process: str) -> None:
         if not flows or len(flows) == 0:
             return    
-        conn.insertMany("user_fund_flows", flows, user, process)
+        conn.bulk_insert("user_fund_flows", flows, user, process)
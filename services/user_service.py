@@ -2,7 +2,7 @@
 from models.lp_exception import LPException
 from services.singleton_service import SingletonService
 from models.db_connection import DBConnection
-from models.user import User
+from models.user import User, UserPointRow, UserHierarchyRow, UserWalletRow
 from decimal import Decimal
 
 
@@ -19,62 +19,28 @@ class UserService(SingletonService):
         else:
             raise LPException(self.logger, "UserService.get_user", "nothing to lock")
 
-    def get_related_users(self, conn: DBConnection) -> dict[int, User]:
-        sql = "select * from users"
-        datas = conn.select(sql)
-        
-        users_dict = {}
-        
-        for data in datas:
-            user = User(data)
-            users_dict[user.id] = user
-            
-        for user in users_dict.values():
-            if user.parent and user.parent in users_dict:
-                parent_user = users_dict[user.parent]
-                parent_user.children.append(user)
-        
-        def add_user_and_children(user: User):
-            users_dict[user.id] = user
-            for child in user.children:
-                add_user_and_children(child)
-        
-        top_level_users = [user for user in users_dict.values() if not user.parent]
-        for user in top_level_users:
-            add_user_and_children(user)
-        
-        def print_user_hierarchy(user: User, level: int = 0):
-            indent = "  " * level
-            self.logger.debug(f"{indent}用户ID: {user.id}, 姓名: {user.name}, 上家ID: {user.parent}, 分成比例: {user.parent_divid}")
-            for child in user.children:
-                print_user_hierarchy(child, level + 1)
-        
-        self.logger.debug("=== 用户层级关系 ===")
-        for user in top_level_users:
-            print_user_hierarchy(user)
-        self.logger.debug(f"=== 总计 {len(users_dict)} 个用户 ===")
-        
-        return users_dict
+    def get_user_points(self, conn: DBConnection) -> dict[int, UserPointRow]:
+        """只读取计算余额所需的列（id, point, demand_balance）"""
+        sql = "select id, coalesce(point, 0), coalesce(demand_balance, 0) from users"
+        return {row.id: row for row in conn.select_rows(sql, row_type=UserPointRow)}
+
+    def get_user_hierarchy(self, conn: DBConnection) -> dict[int, UserHierarchyRow]:
+        """只读取收入分配所需的列（id, parent, parent_divid, point）"""
+        sql = "select id, parent, parent_divid, coalesce(point, 0) from users"
+        return {row.id: row for row in conn.select_rows(sql, row_type=UserHierarchyRow)}
 
-    def get_audit_users(self, conn: DBConnection) -> list[User]:
-        # 只审计 update_at 在1小时以内的用户（update_at 为 unix 毫秒时间戳）
-        sql = """select * from users 
+    def get_audit_wallets(self, conn: DBConnection) -> list[UserWalletRow]:
+        """只审计 update_at 在1小时以内的用户，只读取风险审计所需的列"""
+        sql = """select id, wallet, login_id, name from users 
                  where wallet is not null 
                    and update_at >= floor(extract(epoch from now()) * 1000) - 3600000
                  order by update_at desc"""
-        datas = conn.select(sql)
-        return [User(data) for data in datas]
+        return conn.select_rows(sql, row_type=UserWalletRow)
 
-    def get_refresh_users(self, conn: DBConnection) -> list[User]:
-        """取得 wallet is not null 的所有用户（用于余额更新）"""
-        sql = """select * from users where wallet is not null"""
-        datas = conn.select(sql)
-        return [User(data) for data in datas]
-
-    def get_users(self, conn: DBConnection) -> list[User]:
-        sql = "select * from users"
-        datas = conn.select(sql)
-        return [User(data) for data in datas]
+    def get_refresh_wallets(self, conn: DBConnection) -> list[UserWalletRow]:
+        """取得 wallet is not null 的所有用户（只读取余额更新所需的列）"""
+        sql = """select id, wallet, login_id, name from users where wallet is not null"""
+        return conn.select_rows(sql, row_type=UserWalletRow)
 
     def get_user(self, conn: DBConnection, uid: int) -> User | None:
         sql = """select * from users where id=%s"""
@@ -92,7 +58,7 @@ class UserService(SingletonService):
         conn.update("users", keys, json, user, process)
 
     def update_audited_info(self, conn: DBConnection, uid, audited_usdt, audited_trx, user: int, process: str):
-        """更新 audited_usdt/audited_trx，使用 is_master=True 避免更新 update_at，否则余额刷新会使所有用户被 get_audit_users 误判为 1 小时内有动作"""
+        """更新 audited_usdt/audited_trx，使用 is_master=True 避免更新 update_at，否则余额刷新会使所有用户被 get_audit_wallets 误判为 1 小时内有动作"""
         keys = {"id": uid}
         json_data = {"audited_usdt": audited_usdt, "audited_trx": audited_trx}
         conn.update("users", keys, json_data, user, process, is_master=True)
@@ -143,34 +109,53 @@ class UserService(SingletonService):
         
         conn.update("users", keys, json_data, user, process)
 
-    def update_point(self, conn: DBConnection, uid: int, add_amount: Decimal, user: int, process: str):
-        existing_user = self.get_user(conn, uid)
-        if existing_user is None:
+    def update_point(self, conn: DBConnection, uid: int, add_amount: Decimal, user: int, process: str) -> Decimal:
+        """
+        在 SQL 内原子地加算用户的point（point = trunc(point + add_amount)），返回更新后的point
+        """
+        result = conn.increment("users", {"id": uid}, {"point": add_amount}, user, process)
+        if result is None:
             raise LPException(self.logger, "UserService.update_point", f"user with id {uid} not found")
-        
-        keys = {"id": uid}
-        # existing_user.point 已经是 Decimal 类型，直接使用
-        current_point = existing_user.point if isinstance(existing_user.point, Decimal) else Decimal('0')
-        new_point = (current_point + add_amount).quantize(Decimal('1'), rounding='ROUND_DOWN')
-        json_data = {"point": new_point}
-        
-        conn.update("users", keys, json_data, user, process)
+        return result["point"]
 
-    def update_demand_balance(self, conn: DBConnection, uid: int, subtract_amount: Decimal, user: int, process: str):
+    def update_demand_balance(self, conn: DBConnection, uid: int, subtract_amount: Decimal, user: int, process: str) -> Decimal:
         """
-        更新用户的demand_balance字段（减去金额）
+        更新用户的demand_balance字段（减去金额），在 SQL 内原子地计算，返回更新后的demand_balance
         """
-        existing_user = self.get_user(conn, uid)
-        if existing_user is None:
+        result = conn.increment("users", {"id": uid}, {"demand_balance": -subtract_amount}, user, process)
+        if result is None:
             raise LPException(self.logger, "UserService.update_demand_balance", f"user with id {uid} not found")
-        
-        keys = {"id": uid}
-        # existing_user.demand_balance 已经是 Decimal 类型，直接使用
-        current_demand_balance = existing_user.demand_balance if isinstance(existing_user.demand_balance, Decimal) else Decimal('0')
-        new_demand_balance = (current_demand_balance - subtract_amount).quantize(Decimal('1'), rounding='ROUND_DOWN')
-        json_data = {"demand_balance": new_demand_balance}
-        
-        conn.update("users", keys, json_data, user, process)
+        return result["demand_balance"]
+    
+    def _increment_bulk(self, conn: DBConnection, column: str, deltas: dict[int, Decimal], user: int, process: str,
+                        caller: str) -> dict[int, Decimal]:
+        if not deltas:
+            return {}
+        rows = [{"id": uid, column: amount} for uid, amount in deltas.items()]
+        updated = conn.increment_many("users", ["id"], rows, user, process)
+        balances = {row["id"]: row[column] for row in updated}
+        missing = [uid for uid in deltas if uid not in balances]
+        if missing:
+            raise LPException(self.logger, caller, f"users with id {missing} not found")
+        return balances
+
+    def credit_points_bulk(self, conn: DBConnection, deltas: dict[int, Decimal], user: int, process: str) -> dict[int, Decimal]:
+        """
+        一条 update ... from (values ...) 语句批量加算多个用户的point（ROUND_DOWN 与 update_point 相同）
+
+        参数:
+            deltas: {uid: 增量}
+
+        返回:
+            dict[int, Decimal]: {uid: 更新后的point}
+        """
+        return self._increment_bulk(conn, "point", deltas, user, process, "UserService.credit_points_bulk")
+
+    def update_demand_balances_bulk(self, conn: DBConnection, deltas: dict[int, Decimal], user: int, process: str) -> dict[int, Decimal]:
+        """
+        批量加算多个用户的demand_balance（减算时传负数），返回 {uid: 更新后的demand_balance}
+        """
+        return self._increment_bulk(conn, "demand_balance", deltas, user, process, "UserService.update_demand_balances_bulk")
     
     def update_hw_risk_info(self, conn: DBConnection, uid: int, hw_score: int, hw_risk_level: str, user: int, process: str):
         """
@@ -2,36 +2,44 @@
 from models.lp_exception import LPException
 from services.singleton_service import SingletonService
 from models.db_connection import DBConnection
+from utils.rate_limiter import KeyPool, RetryPolicy, parse_retry_after
+from utils.http_client import HttpClient
+import constants as constants
 import pendulum
 import requests
 import json
 import base58
 import binascii
-import time
 import threading
+import time
 from typing import Optional, List, Dict
 from decimal import Decimal
 
-# 双 Key 轮流使用，将有效 QPS 提高一倍（TronGrid 限流按 Key 独立计算）
-TRON_API_KEYS = [
-    "109a39a3-a6d6-4483-bcf4-7b3267bdf395",
-    "4bc45d3c-41a7-45d3-b8e1-c5b9632ae9fb",
-]
-_api_key_index = 0
-_api_key_lock = threading.Lock()
-
-
-def _get_next_api_key() -> str:
-    global _api_key_index
-    with _api_key_lock:
-        key = TRON_API_KEYS[_api_key_index % len(TRON_API_KEYS)]
-        _api_key_index += 1
-        return key
+TRONGRID_URL = "https://api.trongrid.io"
+USDT_CONTRACT_ADDRESS = "TR7NHqjeKQxGTCi8q8ZY4pL8otSzgjLj6t"
 
 
 class WalletService(SingletonService):
     def __init__(self, logger):
         self.logger = logger
+        # 单例会重复执行 __init__，Key 池（各 Key 的令牌桶和计数）需要跨调用保留
+        if not hasattr(self, "key_pool"):
+            self.key_pool = KeyPool(
+                constants.trongrid["api_keys"],
+                constants.trongrid["qps_per_key"],
+                constants.trongrid["burst"],
+                constants.trongrid["cooldown"],
+            )
+        # tronpy 客户端（每个 Key 一个，内部的 Session 复用连接）和合约 ABI 同样在进程内保留
+        if not hasattr(self, "_tron_clients"):
+            self._tron_clients = {}
+            self._contract_abis = {}
+            self._contracts = {}
+            self._tron_lock = threading.Lock()
+
+    def key_stats(self) -> dict:
+        """TronGrid 各 API Key 的请求次数 / 429 次数 / 可用令牌"""
+        return self.key_pool.stats()
     
     def _base58_to_hex_parameter(self, address):
         """将Base58地址转换为hex格式（用于合约调用的parameter）"""
@@ -49,39 +57,90 @@ class WalletService(SingletonService):
             self.logger.error(f"Failed to convert address {address} to hex: {e}")
             raise
     
-    def _query_trc20_balance(self, wallet_address, contract_address, api_key: str, max_retries=3, initial_delay=1.0):
+    def _tron_client(self, api_key):
+        """API Key 对应的 tronpy 客户端（首次使用时创建，之后复用）"""
+        tron = self._tron_clients.get(api_key)
+        if tron is None:
+            from tronpy import Tron
+            from tronpy.providers.http import HTTPProvider
+            with self._tron_lock:
+                tron = self._tron_clients.get(api_key)
+                if tron is None:
+                    tron = Tron(provider=HTTPProvider(endpoint_uri=TRONGRID_URL, api_key=api_key))
+                    self._tron_clients[api_key] = tron
+        return tron
+
+    def _contract(self, api_key, contract_address):
+        """
+        API Key 对应的合约实例
+        ABI 只在第一次通过 wallet/getcontract 取得，其他 Key 的实例用缓存的 ABI 直接构建
+        """
+        contract = self._contracts.get((api_key, contract_address))
+        if contract is None:
+            from tronpy.contract import Contract
+            tron = self._tron_client(api_key)
+            abi = self._contract_abis.get(contract_address)
+            if abi is None:
+                contract = tron.get_contract(contract_address)
+                abi = contract.abi
+            else:
+                contract = Contract(addr=contract_address, abi=abi, client=tron)
+            with self._tron_lock:
+                self._contract_abis.setdefault(contract_address, abi)
+                self._contracts[(api_key, contract_address)] = contract
+        return contract
+
+    def _trigger_balance_of(self, wallet_address, contract_address, api_key):
+        """
+        直接调用 wallet/triggerconstantcontract 查询 balanceOf（1次 HTTP 请求）
+        HTTP 错误时抛出 HTTPError，响应中没有结果时抛出 ValueError
+        """
+        response = HttpClient().post(
+            f"{TRONGRID_URL}/wallet/triggerconstantcontract",
+            json={
+                'owner_address': wallet_address,
+                'contract_address': contract_address,
+                'function_selector': 'balanceOf(address)',
+                'parameter': self._base58_to_hex_parameter(wallet_address),
+                'visible': True,
+            },
+            headers={'Accept': 'application/json', 'TRON-PRO-API-KEY': api_key},
+            timeout=10,
+        )
+        response.raise_for_status()
+        data = response.json()
+        constant_result = data.get('constant_result')
+        if not data.get('result', {}).get('result') or not constant_result or not constant_result[0]:
+            raise ValueError(f"triggerconstantcontract returned no result: {data}")
+        return Decimal(int(constant_result[0], 16))
+
+    def _query_trc20_balance(self, wallet_address, contract_address, max_retries=3, initial_delay=1.0):
         """
         通过调用合约的balanceOf方法查询TRC20代币余额
-        包含429错误的重试逻辑（指数退避）
+        先直接调用 triggerconstantcontract，响应异常时再用 tronpy 的合约实例查询（客户端和 ABI 均复用）
+        包含429错误的重试逻辑：429 的 Key 进入冷却，重试时从 Key 池取另一个 Key
         
         参数:
             wallet_address: 钱包地址
             contract_address: 合约地址
-            api_key: TronGrid API Key
             max_retries: 最大重试次数（默认3次）
-            initial_delay: 初始延迟秒数（默认1秒，每次重试会翻倍）
+            initial_delay: 未使用（429 时由 Key 池的冷却控制等待，429 以外的错误不重试）
         """
-        from tronpy import Tron
-        from tronpy.providers.http import HTTPProvider
         from requests.exceptions import HTTPError
         
-        provider = HTTPProvider(endpoint_uri="https://api.trongrid.io", api_key=api_key)
-        tron = Tron(provider=provider)
-        
-        delay = initial_delay
         last_exception = None
         
         for attempt in range(max_retries + 1):
+            api_key = self.key_pool.acquire()
             try:
-                # 如果不是第一次尝试，等待后重试
-                if attempt > 0:
-                    time.sleep(delay)
-                    delay *= 2  # 指数退避：每次重试延迟翻倍
+                try:
+                    # 结果直接是最小单位的整数，不进行转换
+                    return self._trigger_balance_of(wallet_address, contract_address, api_key)
+                except ValueError as e:
+                    self.logger.warning(f"triggerconstantcontract failed for {wallet_address}, falling back to tronpy: {e}")
                 
-                # 获取合约实例
-                contract = tron.get_contract(contract_address)
-                
-                # 调用balanceOf方法
+                # 调用balanceOf方法（合约实例已缓存，不再每次获取 ABI）
+                contract = self._contract(api_key, contract_address)
                 result = contract.functions.balanceOf(wallet_address)
                 
                 # result是一个整数（最小单位），直接返回最小单位，不进行转换
@@ -100,6 +159,7 @@ class WalletService(SingletonService):
                 
                 if is_429_error:
                     last_exception = e
+                    self.key_pool.report_429(api_key, parse_retry_after(e.response.headers.get('Retry-After')) if e.response is not None else None)
                     if attempt < max_retries:
                         # 如果是429错误且还有重试机会，继续循环
                         self.logger.warning(f"Rate limit hit (429) on attempt {attempt + 1}/{max_retries + 1}. Will retry...")
@@ -112,7 +172,7 @@ class WalletService(SingletonService):
                         return None
                 else:
                     # 其他HTTP错误，直接返回
-                    self.logger.warning(f"Failed to query TRC20 balance via tronpy: {e}")
+                    self.logger.warning(f"Failed to query TRC20 balance: {e}")
                     import traceback
                     self.logger.warning(f"Traceback: {traceback.format_exc()}")
                     return None
@@ -121,6 +181,7 @@ class WalletService(SingletonService):
                 error_str = str(e)
                 if "429" in error_str or "Too Many Requests" in error_str:
                     last_exception = e
+                    self.key_pool.report_429(api_key)
                     if attempt < max_retries:
                         # 如果是429错误且还有重试机会，继续循环
                         self.logger.warning(f"Rate limit hit (429) detected in exception message on attempt {attempt + 1}/{max_retries + 1}. Will retry...")
@@ -133,7 +194,7 @@ class WalletService(SingletonService):
                         return None
                 else:
                     # 其他类型的异常，直接返回
-                    self.logger.warning(f"Failed to query TRC20 balance via tronpy: {e}")
+                    self.logger.warning(f"Failed to query TRC20 balance: {e}")
                     import traceback
                     self.logger.warning(f"Traceback: {traceback.format_exc()}")
                     return None
@@ -146,12 +207,12 @@ class WalletService(SingletonService):
     def audit_wallet(self, wallet_address, max_retries=3, initial_delay=1.0):
         """
         审计钱包地址，查询TRX和USDT余额
-        包含重试逻辑以处理网络错误和429错误（指数退避）
+        包含重试逻辑以处理网络错误和429错误（429 的 Key 冷却后换用其他 Key，网络错误带抖动退避）
         
         参数:
             wallet_address (str): TRON钱包地址（Base58格式）
             max_retries (int): 最大重试次数（默认3次）
-            initial_delay (float): 初始延迟秒数（默认1秒，每次重试会翻倍）
+            initial_delay (float): 重试退避的基础秒数（默认1秒）
         
         返回:
             dict: 包含以下键的字典:
@@ -165,12 +226,6 @@ class WalletService(SingletonService):
         
         注意: 此函数接口被midnight_batch.py调用，请勿修改输入输出格式
         """
-        # 双 Key 轮流使用，sleep 0.5 秒即可（单 Key 时需 1 秒）
-        time.sleep(0.5)
-        api_key = _get_next_api_key()
-        
-        usdt_contract_address = "TR7NHqjeKQxGTCi8q8ZY4pL8otSzgjLj6t"
-        
         # 初始化余额信息（确保返回格式一致）
         balance_info = {
             'wallet_address': wallet_address,
@@ -180,27 +235,26 @@ class WalletService(SingletonService):
         }
         
         # 1. 查询账户基本信息（带重试逻辑）
-        api_url = f"https://api.trongrid.io/v1/accounts/{wallet_address}"
-        headers = {
-            'Accept': 'application/json',
-            'TRON-PRO-API-KEY': api_key
-        }
+        api_url = f"{TRONGRID_URL}/v1/accounts/{wallet_address}"
         
-        delay = initial_delay
+        policy = RetryPolicy(max_retries, initial_delay)
         last_exception = None
         
         for attempt in range(max_retries + 1):
             try:
-                # 如果不是第一次尝试，等待后重试
-                if attempt > 0:
-                    time.sleep(delay)
-                    delay *= 2  # 指数退避：每次重试延迟翻倍
+                # 从 Key 池取得令牌最多的 Key（没有可用令牌时在这里等待，代替固定的 sleep）
+                api_key = self.key_pool.acquire()
+                headers = {
+                    'Accept': 'application/json',
+                    'TRON-PRO-API-KEY': api_key
+                }
                 
-                response = requests.get(api_url, headers=headers, timeout=10)
+                response = HttpClient().get(api_url, headers=headers, timeout=10)
                 
-                # 检查是否是429错误（Rate Limit）
+                # 检查是否是429错误（Rate Limit）：该 Key 冷却，重试时换用其他 Key
                 if response.status_code == 429:
                     last_exception = requests.exceptions.HTTPError(f"Rate limit (429) on attempt {attempt + 1}")
+                    self.key_pool.report_429(api_key, parse_retry_after(response.headers.get('Retry-After')))
                     if attempt < max_retries:
                         self.logger.warning(f"Rate limit hit (429) for wallet {wallet_address} on attempt {attempt + 1}/{max_retries + 1}. Will retry...")
                         continue
@@ -227,7 +281,7 @@ class WalletService(SingletonService):
                                 if balance != '0':
                                     # USDT是TRC20代币，直接返回最小单位，不进行转换
                                     balance_decimal = Decimal(str(balance))
-                                    if token_address == usdt_contract_address:
+                                    if token_address == USDT_CONTRACT_ADDRESS:
                                         balance_info['usdt_balance'] = balance_decimal
                                     
                                     balance_info['tokens'].append({
@@ -242,6 +296,7 @@ class WalletService(SingletonService):
                 last_exception = e
                 if attempt < max_retries:
                     self.logger.warning(f"Request timeout for wallet {wallet_address} on attempt {attempt + 1}/{max_retries + 1}. Will retry...")
+                    time.sleep(policy.backoff(attempt))
                     continue
                 else:
                     # 最后一次重试也失败，抛出异常
@@ -250,6 +305,7 @@ class WalletService(SingletonService):
                 last_exception = e
                 if attempt < max_retries:
                     self.logger.warning(f"Connection error for wallet {wallet_address} on attempt {attempt + 1}/{max_retries + 1}. Will retry...")
+                    time.sleep(policy.backoff(attempt))
                     continue
                 else:
                     # 最后一次重试也失败，抛出异常
@@ -263,7 +319,7 @@ class WalletService(SingletonService):
         
         # 2. 如果data为空或没有找到USDT余额，通过合约调用查询USDT余额
         if balance_info['usdt_balance'] == Decimal('0'):
-            usdt_balance = self._query_trc20_balance(wallet_address, usdt_contract_address, api_key)
+            usdt_balance = self._query_trc20_balance(wallet_address, USDT_CONTRACT_ADDRESS)
             if usdt_balance is not None:
                 balance_info['usdt_balance'] = usdt_balance
         
@@ -0,0 +1,6 @@
+# -*- coding: utf-8 -*-
+import os
+import sys
+
+# 各模块以仓库根目录为基准 import（models.*, services.*, utils.*）
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -0,0 +1,170 @@
+# -*- coding: utf-8 -*-
+"""InterestEngine 与 Deposit.make_interests 的逐位一致性"""
+import logging
+from decimal import Decimal
+import pendulum
+import pytest
+from benchmarks.interest_engine_check import BASE_DATES, half_even_cases, make_deposits
+from models.deposit import Deposit
+from models.deposit_detail import DepositDetail
+from models.interest_engine import InterestEngine
+from utils.timestamps import date_to_ms
+
+logger = logging.getLogger(__name__)
+
+
+def shanghai(*args) -> pendulum.DateTime:
+    return pendulum.datetime(*args, tz='Asia/Shanghai')
+
+
+def make_deposit(begin: pendulum.DateTime, details: list[dict], uid: int = 1) -> Deposit:
+    deposit = Deposit({"uid": uid, "id": 1, "deposit_begin": date_to_ms(begin), "status": "begin"})
+    deposit.init_details([
+        DepositDetail({
+            "uid": uid,
+            "id": 1,
+            "installment": detail["installment"],
+            "deposit_date": date_to_ms(detail["deposit_date"]) if detail.get("deposit_date") else None,
+            "amount": detail.get("amount"),
+            "interest_rate": detail.get("interest_rate"),
+            "deposit_limit": date_to_ms(detail["deposit_limit"]) if detail.get("deposit_limit") else None,
+        })
+        for detail in details
+    ])
+    return deposit
+
+
+def detail(installment: str, deposit_date, amount, rate="0.01", limit_days: int = 10) -> dict:
+    return {
+        "installment": installment,
+        "deposit_date": deposit_date,
+        "amount": Decimal(amount) if amount is not None else None,
+        "interest_rate": Decimal(rate) if rate is not None else None,
+        "deposit_limit": deposit_date.add(days=limit_days) if deposit_date is not None and limit_days is not None else None,
+    }
+
+
+def assert_same(deposit: Deposit, base_date: pendulum.DateTime) -> tuple[list, bool]:
+    expected = deposit.make_interests(base_date, logger)
+    actual = InterestEngine(logger, base_date).make_interests([deposit])[0]
+    assert actual[1] == expected[1]
+    assert actual[0] == expected[0]
+    # 金额的表示（指数、-0）也要相同
+    assert [str(i["amount"]) for i in actual[0]] == [str(i["amount"]) for i in expected[0]]
+    return actual
+
+
+def amounts(result: tuple[list, bool]) -> list[Decimal]:
+    return [interest["amount"] for interest in result[0]]
+
+
+@pytest.mark.parametrize("begin, base_date, expected_count", [
+    # 月末最后1毫秒开始：下个月1日是首月（按日比例）
+    (shanghai(2025, 1, 31, 23, 59, 59, 999000), shanghai(2025, 2, 1), 1),
+    # 当月1日0点开始：base_date 当月开始的存款不产生利息
+    (shanghai(2025, 2, 1), shanghai(2025, 2, 1), 0),
+    # 上个月1日0点开始：首月
+    (shanghai(2025, 1, 1), shanghai(2025, 2, 1), 1),
+    # 月中的 base_date：首月判定不成立，也没有上个月1日的 installment
+    (shanghai(2025, 1, 10), shanghai(2025, 2, 15), 0),
+])
+def test_month_boundaries(begin, base_date, expected_count):
+    deposit = make_deposit(begin, [detail("2025/01", shanghai(2025, 1, 20), "1000000")])
+    assert len(assert_same(deposit, base_date)[0]) == expected_count
+
+
+def test_first_month_fifteenth_cutoff():
+    begin = shanghai(2025, 1, 10, 8)
+    base_date = shanghai(2025, 2, 1)
+    # 16日0点存入：按日比例（22/31）
+    by_ratio = make_deposit(begin, [detail("2025/01", shanghai(2025, 1, 16), "3100000")])
+    assert amounts(assert_same(by_ratio, base_date)) == [Decimal(22000)]
+    # 15日 23:59:59.999 存入：比例为 1
+    full = make_deposit(begin, [detail("2025/01", shanghai(2025, 1, 15, 23, 59, 59, 999000), "3100000")])
+    assert amounts(assert_same(full, base_date)) == [Decimal(31000)]
+    # 15日前存入的 detail 之后，比例一直为 1（与 make_first_installment_interests 相同）
+    both = make_deposit(begin, [
+        detail("2025/01", shanghai(2025, 1, 12), "3100000"),
+        detail("2025/02", shanghai(2025, 2, 20), "3100000"),
+    ])
+    assert amounts(assert_same(both, base_date)) == [Decimal(31000), Decimal(31000)]
+
+
+def test_installment_months():
+    begin = shanghai(2024, 11, 5)
+    details = [
+        detail("2024/11", shanghai(2024, 11, 5), "1000000"),
+        detail("2024/12", shanghai(2024, 12, 5), "1000000"),
+        detail("2025/01", shanghai(2025, 1, 5), "1000000"),
+    ]
+    deposit = make_deposit(begin, details)
+    interests, is_deposit_end = assert_same(deposit, shanghai(2025, 1, 1))
+    assert not is_deposit_end and len(interests) == 3
+    # 最后一个 installment 的下个月1日：存款结束
+    interests, is_deposit_end = assert_same(deposit, shanghai(2025, 2, 1))
+    assert is_deposit_end and len(interests) == 3
+
+
+@pytest.mark.parametrize("target", [
+    detail("2025/01", shanghai(2025, 1, 5), "1000000", limit_days=None),  # 没有期限日
+    detail("2025/01", shanghai(2025, 1, 5), "1000000", limit_days=-1),  # 期限日之后存入
+    detail("2025/01", None, "1000000"),  # 未存入
+    detail("2025/01", shanghai(2025, 1, 5), "0"),  # 金额为 0
+])
+def test_installment_skipped(target):
+    deposit = make_deposit(shanghai(2024, 12, 5), [detail("2024/12", shanghai(2024, 12, 5), "1000000"), target])
+    assert assert_same(deposit, shanghai(2025, 2, 1)) == ([], False)
+
+
+def test_zero_none_and_negative_amounts():
+    begin = shanghai(2024, 12, 5)
+    deposit = make_deposit(begin, [
+        detail("2024/12", shanghai(2024, 12, 5), "1000000"),
+        detail("2025/01", shanghai(2025, 1, 5), "1000000"),
+        detail("2025/02", shanghai(2025, 2, 5), None),
+        detail("2025/03", shanghai(2025, 3, 5), "0"),
+        detail("2025/04", shanghai(2025, 4, 5), "-150", rate="0.01"),
+        detail("2025/05", shanghai(2025, 5, 5), "-50", rate="0.01"),
+        detail("2025/06", shanghai(2025, 6, 5), "1000", rate=None),
+    ])
+    result = assert_same(deposit, shanghai(2025, 2, 1))
+    # 负数向 0 方向切り捨て，-0.5 -> -0
+    assert [str(a) for a in amounts(result)] == ["10000", "10000", "-1", "-0"]
+
+
+@pytest.mark.parametrize("amount, rate", half_even_cases())
+def test_rounding_ties(amount, rate):
+    deposit = make_deposit(shanghai(2024, 12, 5), [
+        {"installment": "2025/01", "deposit_date": shanghai(2025, 1, 5), "amount": amount, "interest_rate": rate,
+         "deposit_limit": shanghai(2025, 1, 10)},
+    ])
+    assert_same(deposit, shanghai(2025, 2, 1))
+    # 首月（按日比例）
+    first = make_deposit(shanghai(2025, 1, 10), [
+        {"installment": "2025/01", "deposit_date": shanghai(2025, 1, 20), "amount": amount, "interest_rate": rate,
+         "deposit_limit": shanghai(2025, 1, 25)},
+    ])
+    assert_same(first, shanghai(2025, 2, 1))
+
+
+def test_odd_even_tie_on_units_digit():
+    # 29 位系数、末位 .5：前一位为偶数时不进位，为奇数时进位（ROUND_HALF_EVEN），然后切り捨て
+    begin = shanghai(2024, 12, 5)
+    even = make_deposit(begin, [{"installment": "2025/01", "deposit_date": shanghai(2025, 1, 5),
+                                 "amount": Decimal("1234567890123456789012345678.5"), "interest_rate": Decimal("1"),
+                                 "deposit_limit": shanghai(2025, 1, 10)}])
+    odd = make_deposit(begin, [{"installment": "2025/01", "deposit_date": shanghai(2025, 1, 5),
+                                "amount": Decimal("1234567890123456789012345677.5"), "interest_rate": Decimal("1"),
+                                "deposit_limit": shanghai(2025, 1, 10)}])
+    assert amounts(assert_same(even, shanghai(2025, 2, 1))) == [Decimal("1234567890123456789012345678")]
+    assert amounts(assert_same(odd, shanghai(2025, 2, 1))) == [Decimal("1234567890123456789012345678")]
+
+
+@pytest.mark.parametrize("base_date", BASE_DATES)
+def test_generated_deposits(base_date):
+    deposits = make_deposits(500, seed=7)
+    results = InterestEngine(logger, base_date).make_interests(deposits)
+    for deposit, actual in zip(deposits, results):
+        expected = deposit.make_interests(base_date, logger)
+        assert actual == expected
+        assert [str(i["amount"]) for i in actual[0]] == [str(i["amount"]) for i in expected[0]]
@@ -0,0 +1,130 @@
+# -*- coding: utf-8 -*-
+"""utils.timestamps 的 ms <-> DateTime 往返转换和 LazyDate 的缓存"""
+import random
+import pendulum
+import pytest
+from models.deposit import Deposit
+from models.deposit_detail import DepositDetail
+from utils.timestamps import SHANGHAI, LazyDate, date_to_ms, ms_to_date
+
+
+def fields(date: pendulum.DateTime) -> tuple:
+    return date.year, date.month, date.day, date.hour, date.minute, date.second, date.microsecond
+
+
+def assert_round_trip(date: pendulum.DateTime):
+    ms = date_to_ms(date)
+    converted = ms_to_date(ms)
+    assert date_to_ms(converted) == ms
+    assert converted == date
+    assert fields(converted) == fields(date)
+    assert converted.tzinfo == SHANGHAI
+
+
+@pytest.mark.parametrize("date, ms", [
+    (pendulum.datetime(1970, 1, 1, 8, tz='Asia/Shanghai'), 0),
+    (pendulum.datetime(2024, 1, 1, tz='Asia/Shanghai'), 1704038400000),
+    (pendulum.datetime(2025, 3, 1, tz='Asia/Shanghai'), 1740758400000),
+    (pendulum.datetime(2025, 2, 28, 16, tz='UTC'), 1740758400000),
+])
+def test_shanghai_midnight(date, ms):
+    assert date_to_ms(date) == ms
+    converted = ms_to_date(ms)
+    assert converted == date
+    assert converted.tzinfo == SHANGHAI
+    if date.tzinfo == SHANGHAI:
+        assert fields(converted) == fields(date)
+
+
+def test_ms_to_date_other_timezone():
+    converted = ms_to_date(1740758400000, 'UTC')
+    assert fields(converted) == (2025, 2, 28, 16, 0, 0, 0)
+    assert converted.timezone_name == 'UTC'
+
+
+def test_date_to_ms_truncates_below_millisecond():
+    date = pendulum.datetime(2024, 1, 1, tz='Asia/Shanghai')
+    assert date_to_ms(date.add(microseconds=999)) == 1704038400000
+    assert date_to_ms(date.subtract(microseconds=1)) == 1704038400000 - 1
+
+
+@pytest.mark.parametrize("year", [1970, 1999, 2000, 2024, 2025, 2038, 2100])
+def test_month_boundaries(year):
+    for month in range(1, 13):
+        start = pendulum.datetime(year, month, 1, tz='Asia/Shanghai')
+        sixteenth = start.add(days=15)
+        for date in (
+            start,
+            start.add(microseconds=1000),
+            sixteenth,
+            sixteenth.subtract(microseconds=1000),
+            start.end_of('month').replace(microsecond=999000),
+        ):
+            assert_round_trip(date)
+        if year > 1970 or month > 1:
+            assert_round_trip(start.subtract(microseconds=1000))
+        # 上个月最后1毫秒与当月1日0点相差 1ms
+        assert date_to_ms(start) - date_to_ms(start.subtract(microseconds=1000)) == 1
+
+
+def test_shanghai_daylight_saving_transitions():
+    # Asia/Shanghai 在 1986〜1991 年有夏令时，切换前后各取几个点
+    for year in range(1986, 1992):
+        for month in (4, 9):
+            for day in range(1, 31):
+                for hour in (0, 1, 2, 3):
+                    assert_round_trip(pendulum.datetime(year, month, day, hour, 59, 59, 999000, tz='Asia/Shanghai'))
+
+
+def test_random_round_trip():
+    rng = random.Random(0)
+    for _ in range(20000):
+        ms = rng.randint(0, 4102444800000)
+        assert date_to_ms(ms_to_date(ms)) == ms
+
+
+class Row:
+    created_at = LazyDate("created_at_ms")
+
+    def __init__(self, ms):
+        self.created_at_ms = ms
+
+
+def test_lazy_date_converts_on_first_access_and_caches_in_dict():
+    row = Row(1704038400000)
+    assert "created_at" not in row.__dict__
+
+    first = row.created_at
+    assert first == pendulum.datetime(2024, 1, 1, tz='Asia/Shanghai')
+    assert row.__dict__["created_at"] is first
+    # 之后的访问直接取 __dict__，毫秒改了也不再转换
+    row.created_at_ms = 0
+    assert row.created_at is first
+
+
+@pytest.mark.parametrize("ms", [None, 0])
+def test_lazy_date_empty_ms_is_none(ms):
+    row = Row(ms)
+    assert row.created_at is None
+    assert "created_at" in row.__dict__
+
+
+def test_lazy_date_can_be_assigned():
+    row = Row(1704038400000)
+    date = pendulum.datetime(2025, 1, 1, tz='Asia/Shanghai')
+    row.created_at = date
+    assert row.created_at is date
+
+
+def test_models_keep_raw_ms_until_date_access():
+    ms = 1740758400000
+    detail = DepositDetail({"uid": 1, "id": 1, "installment": "2025/03", "deposit_date": ms, "deposit_limit": None})
+    assert "deposit_date" not in detail.__dict__
+    assert detail.deposit_date_ms == ms
+    assert detail.deposit_date == pendulum.datetime(2025, 3, 1, tz='Asia/Shanghai')
+    assert detail.deposit_limit is None
+
+    deposit = Deposit({"uid": 1, "id": 1, "deposit_begin": ms, "status": "begin"})
+    assert "deposit_begin" not in deposit.__dict__
+    assert deposit.deposit_begin == ms_to_date(ms)
+    assert deposit.__dict__["deposit_begin"] is deposit.deposit_begin
@@ -0,0 +1,92 @@
+# -*- coding: utf-8 -*-
+"""AncestorIndex.chain 与逐级向上查找的一致性、成环检测"""
+import logging
+import random
+from decimal import Decimal
+import pytest
+from models.lp_exception import LPException
+from models.user import UserHierarchyRow
+from models.user_hierarchy import AncestorIndex
+
+logger = logging.getLogger(__name__)
+
+
+def row(uid: int, parent, divid) -> UserHierarchyRow:
+    return UserHierarchyRow(uid, parent, Decimal(divid) if divid is not None else None, Decimal('0'))
+
+
+def walk(users: dict, uid: int) -> tuple:
+    """逐级向上查找（AncestorIndex 之前的做法）"""
+    chain = []
+    current = users[uid]
+    while current.parent and current.parent in users:
+        parent = users[current.parent]
+        chain.append((parent.id, parent.parent_divid))
+        if not parent.parent_divid:
+            break
+        current = parent
+    return tuple(chain)
+
+
+def test_chain_ends_at_ancestor_without_divid():
+    users = {
+        1: row(1, None, "0.1"),
+        2: row(2, 1, None),
+        3: row(3, 2, "0.2"),
+        4: row(4, 3, "0.3"),
+        5: row(5, 99, "0.1"),
+    }
+    index = AncestorIndex(logger, users)
+    # 2 的 parent_divid 为空：2 拿走剩余全部，不再向上到 1
+    assert index.chain(4) == ((3, Decimal("0.2")), (2, None))
+    assert index.chain(3) == ((2, None),)
+    assert index.chain(1) == ()
+    # 上家不存在 / 用户不存在
+    assert index.chain(5) == ()
+    assert index.chain(42) == ()
+
+
+def test_chain_reuses_cached_suffix():
+    users = {uid: row(uid, uid - 1 if uid > 1 else None, "0.1") for uid in range(1, 6)}
+    index = AncestorIndex(logger, users)
+    assert index.chain(3) == ((2, Decimal("0.1")), (1, Decimal("0.1")))
+    # chain(5) 经过 3 时接上 chain(3)
+    assert index.chain(5) == ((4, Decimal("0.1")), (3, Decimal("0.1")), (2, Decimal("0.1")), (1, Decimal("0.1")))
+    assert index.chain(5) is index.chain(5)
+
+
+def test_cycle_raises_only_through_nonempty_divids():
+    users = {
+        1: row(1, 2, "0.1"),
+        2: row(2, 1, "0.1"),
+        3: row(3, 1, "0.1"),
+        # 环上有 parent_divid 为空的用户时链在那里结束，不算成环
+        4: row(4, 5, "0.1"),
+        5: row(5, 4, None),
+    }
+    index = AncestorIndex(logger, users)
+    for uid in (1, 2, 3):
+        with pytest.raises(LPException):
+            index.chain(uid)
+    assert index.chain(4) == ((5, None),)
+    assert index.chain(5) == ((4, Decimal("0.1")), (5, None))
+
+
+def test_chain_matches_walk_on_random_forest():
+    rng = random.Random(3)
+    users = {}
+    for uid in range(1, 3001):
+        parent = rng.randint(1, uid - 1) if uid > 1 and rng.random() < 0.95 else None
+        if parent is not None and rng.random() < 0.02:
+            parent = 10 ** 6 + uid
+        divid = rng.choice([None, "0", "0.1", "0.05", "0.3"]) if rng.random() < 0.2 else "0.1"
+        users[uid] = row(uid, parent, divid)
+    # 深链：3000 层
+    for uid in range(3001, 6001):
+        users[uid] = row(uid, uid - 1, "0.01")
+
+    index = AncestorIndex(logger, users)
+    order = list(users)
+    rng.shuffle(order)
+    for uid in order:
+        assert index.chain(uid) == walk(users, uid)
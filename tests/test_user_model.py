@@ -0,0 +1,92 @@
+# -*- coding: utf-8 -*-
+"""User 的延迟字段和 __slots__：属性的读写与改动前的 User 相同"""
+import json
+from decimal import Decimal
+import pytest
+from benchmarks.user_model_benchmark import COLUMNS, EagerUser, make_rows
+from models.user import User, _LAZY_FIELDS, _UNSET
+
+# 改动前的 User 在构造时设置的全部属性
+ATTRIBUTES = COLUMNS + ("children",)
+
+
+def rows() -> list[dict]:
+    data = [dict(zip(COLUMNS, row)) for row in make_rows(20)]
+    # 空值、字符串金额、无法解析的 JSON、已解析的 JSON、空列表
+    data[0].update(balance=None, loan="", demand_balance="12.5", audited_usdt=None, detail_list="not json", risk_detail=None)
+    data[1].update(point=None, parent_divid=None, detail_list=["x"], risk_detail=[], audited_trx="0")
+    data[2].update(detail_list="", risk_detail="[1, 2]")
+    return data
+
+
+@pytest.mark.parametrize("data", rows())
+def test_attributes_match_eager_user(data):
+    user = User(data)
+    expected = EagerUser(data)
+    for name in ATTRIBUTES:
+        actual = getattr(user, name)
+        assert actual == getattr(expected, name), name
+        assert type(actual) is type(getattr(expected, name)), name
+
+
+@pytest.mark.parametrize("name", ATTRIBUTES)
+def test_every_attribute_can_be_set(name):
+    user = User(dict(zip(COLUMNS, make_rows(1)[0])))
+    value = object()
+    setattr(user, name, value)
+    assert getattr(user, name) is value
+
+
+def test_unknown_attribute_is_rejected():
+    user = User({"id": 1})
+    # monitoring 用 getattr(user, 'hw_risk_level', None) 读取，users 表以外的属性不存在
+    assert getattr(user, "hw_risk_level", None) is None
+    with pytest.raises(AttributeError):
+        user.hw_risk_level = "to_Low"
+    assert not hasattr(user, "__dict__")
+
+
+@pytest.mark.parametrize("name", _LAZY_FIELDS)
+def test_lazy_field_converts_once(monkeypatch, name):
+    field = User.__dict__[name]
+    calls = []
+
+    def convert(raw):
+        calls.append(raw)
+        return [raw]
+
+    monkeypatch.setattr(field, "convert", convert)
+    user = User({name: "raw"})
+    assert calls == []
+
+    first = getattr(user, name)
+    assert first == ["raw"]
+    assert getattr(user, name) is first
+    assert calls == ["raw"]
+
+
+def test_lazy_json_field_is_parsed_on_first_access_and_cached():
+    user = User({"detail_list": json.dumps(["exchange"]), "risk_detail": "not json"})
+    assert user._detail_list is _UNSET
+    detail_list = user.detail_list
+    assert detail_list == ["exchange"]
+    assert user._detail_list is detail_list
+    assert user.detail_list is detail_list
+    assert user.risk_detail is None
+    assert user._risk_detail is None
+
+
+def test_set_before_first_access_skips_conversion(monkeypatch):
+    field = User.__dict__["balance"]
+    monkeypatch.setattr(field, "convert", lambda raw: pytest.fail("converted after assignment"))
+    user = User({"balance": "100"})
+    user.balance = Decimal("5")
+    assert user.balance == Decimal("5")
+
+
+def test_children_created_on_first_use():
+    parent = User({"id": 1})
+    child = User({"id": 2, "parent": 1})
+    assert parent._children is None
+    parent.children.append(child)
+    assert parent.children == [child]
@@ -0,0 +1,66 @@
+# -*- coding: utf-8 -*-
+import threading
+from typing import Optional, Union
+from urllib.parse import urlsplit
+import requests
+from requests.adapters import HTTPAdapter
+import constants as constants
+from utils.utils import SingletonUtils
+
+
+class HttpClient(SingletonUtils):
+    """
+    对外 HTTP 请求的共通客户端（进程内共享）
+
+    按 scheme://host 各保留一个 requests.Session，连接池由 HTTPAdapter 管理，
+    同一主机的请求复用 keep-alive 连接，不再每次都做 DNS 解析和 TLS 握手。
+    Session 的连接池是线程安全的，多个线程可以同时通过同一个 Session 发请求。
+    重试由调用方处理（HTTPAdapter 不重试）。
+    """
+
+    def __init__(self):
+        # 单例会重复执行 __init__，Session 需要跨调用保留
+        if not hasattr(self, "_sessions"):
+            self._sessions: dict[str, requests.Session] = {}
+            self._lock = threading.Lock()
+        self.pool_maxsize = constants.http_client["pool_maxsize"]
+        self.connect_timeout = constants.http_client["connect_timeout"]
+        self.read_timeout = constants.http_client["read_timeout"]
+
+    def session(self, url: str) -> requests.Session:
+        parts = urlsplit(url)
+        host = f"{parts.scheme}://{parts.netloc}"
+        session = self._sessions.get(host)
+        if session is None:
+            with self._lock:
+                session = self._sessions.get(host)
+                if session is None:
+                    session = requests.Session()
+                    adapter = HTTPAdapter(pool_connections=1, pool_maxsize=self.pool_maxsize, max_retries=0)
+                    session.mount("http://", adapter)
+                    session.mount("https://", adapter)
+                    self._sessions[host] = session
+        return session
+
+    def _timeout(self, timeout: Union[None, float, tuple]) -> tuple:
+        """timeout 为数值时作为读取超时，连接超时使用 connect_timeout（不超过读取超时）"""
+        if timeout is None:
+            return (self.connect_timeout, self.read_timeout)
+        if isinstance(timeout, tuple):
+            return timeout
+        return (min(self.connect_timeout, timeout), timeout)
+
+    def request(self, method: str, url: str, timeout: Optional[Union[float, tuple]] = None, **kwargs) -> requests.Response:
+        return self.session(url).request(method, url, timeout=self._timeout(timeout), **kwargs)
+
+    def get(self, url: str, **kwargs) -> requests.Response:
+        return self.request("GET", url, **kwargs)
+
+    def post(self, url: str, **kwargs) -> requests.Response:
+        return self.request("POST", url, **kwargs)
+
+    def close(self):
+        with self._lock:
+            for session in self._sessions.values():
+                session.close()
+            self._sessions.clear()
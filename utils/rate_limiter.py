@@ -0,0 +1,178 @@
+# -*- coding: utf-8 -*-
+import random
+import threading
+import time
+from email.utils import parsedate_to_datetime
+from typing import Optional
+
+
+class TokenBucket:
+    """
+    线程安全的令牌桶：每秒补充 rate 个令牌，最多积攒 capacity 个
+
+    acquire() 拿不到令牌时 sleep 到够用为止。收到 429 时用 penalize() 暂停整个桶并清空令牌，
+    暂停结束后各线程按 rate 依次放行，不会同时涌入。
+    """
+
+    def __init__(self, rate: float, capacity: Optional[float] = None):
+        self.rate = float(rate)
+        self.capacity = float(capacity) if capacity else max(1.0, self.rate)
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._blocked_until = 0.0
+        self._lock = threading.Lock()
+        self.acquired = 0
+        self.wait_seconds = 0.0
+        self.penalties = 0
+
+    def _refill(self, now: float):
+        if now > self._updated:
+            self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+
+    def try_acquire(self, tokens: float = 1) -> float:
+        """拿到令牌时返回 0，否则返回还需要等待的秒数（不消耗令牌）"""
+        with self._lock:
+            now = time.monotonic()
+            if now < self._blocked_until:
+                return self._blocked_until - now
+            self._refill(now)
+            if self._tokens >= tokens:
+                self._tokens -= tokens
+                self.acquired += 1
+                return 0.0
+            return (tokens - self._tokens) / self.rate
+
+    def acquire(self, tokens: float = 1, timeout: Optional[float] = None) -> bool:
+        """等待并取得令牌，超过 timeout 秒仍未取得时返回 False"""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            wait = self.try_acquire(tokens)
+            if wait <= 0:
+                return True
+            if deadline is not None:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return False
+                wait = min(wait, remaining)
+            with self._lock:
+                self.wait_seconds += wait
+            time.sleep(wait)
+
+    def penalize(self, seconds: float):
+        """seconds 秒内不再发放令牌（用于 429 / Retry-After），并清空已积攒的令牌"""
+        with self._lock:
+            now = time.monotonic()
+            self._blocked_until = max(self._blocked_until, now + seconds)
+            self._tokens = 0.0
+            self._updated = max(now, self._blocked_until)
+            self.penalties += 1
+
+    def available(self) -> float:
+        """当前可用的令牌数（暂停中为 0）"""
+        with self._lock:
+            now = time.monotonic()
+            if now < self._blocked_until:
+                return 0.0
+            self._refill(now)
+            return self._tokens
+
+    def blocked_for(self) -> float:
+        """暂停剩余的秒数"""
+        with self._lock:
+            return max(0.0, self._blocked_until - time.monotonic())
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "rate": self.rate,
+                "acquired": self.acquired,
+                "wait_seconds": round(self.wait_seconds, 3),
+                "penalties": self.penalties,
+            }
+
+
+class RetryPolicy:
+    """
+    带抖动的指数退避：第 attempt 次重试（从 0 开始）等待 [0, min(max_delay, base_delay * 2^attempt)) 之间的随机秒数；
+    服务端给出 Retry-After 时等待 Retry-After 再加最多 base_delay 秒的抖动
+    """
+
+    def __init__(self, max_retries: int = 3, base_delay: float = 1.0, max_delay: float = 30.0):
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+
+    def cap(self, attempt: int) -> float:
+        """第 attempt 次重试的退避上限（不带抖动）：min(max_delay, base_delay * 2^attempt)"""
+        return min(self.max_delay, self.base_delay * (2 ** attempt))
+
+    def backoff(self, attempt: int, retry_after: Optional[float] = None) -> float:
+        if retry_after is not None:
+            return retry_after + random.uniform(0, self.base_delay)
+        return random.uniform(0, self.cap(attempt))
+
+
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """Retry-After 头（秒数或 HTTP 日期）-> 秒数，无法解析时返回 None"""
+    if not value:
+        return None
+    value = value.strip()
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+class KeyPool:
+    """
+    多个 API Key 的限速池：每个 Key 有自己的令牌桶，acquire() 返回当前可用令牌最多的 Key
+
+    某个 Key 收到 429 时用 report_429() 让它冷却（Retry-After 或 cooldown 秒），
+    冷却期间只使用其他 Key。总吞吐量为 Key 数 × 每个 Key 的 rate。
+    """
+
+    def __init__(self, keys: list[str], rate: float, capacity: Optional[float] = None, cooldown: float = 30.0):
+        if not keys:
+            raise ValueError("KeyPool needs at least one key")
+        self.cooldown = cooldown
+        self._buckets = {key: TokenBucket(rate, capacity) for key in dict.fromkeys(keys)}
+        self._lock = threading.Lock()
+        self._requests = {key: 0 for key in self._buckets}
+        self._rate_limited = {key: 0 for key in self._buckets}
+
+    def acquire(self) -> str:
+        while True:
+            # 可用令牌最多的 Key（冷却中的 Key 可用令牌为 0）
+            key, bucket = max(self._buckets.items(), key=lambda item: item[1].available())
+            if bucket.try_acquire() <= 0:
+                with self._lock:
+                    self._requests[key] += 1
+                return key
+            # 所有 Key 都没有令牌：等到最早可用的一个
+            wait = min(
+                bucket.blocked_for() or max(0.0, 1 - bucket.available()) / bucket.rate
+                for bucket in self._buckets.values()
+            )
+            time.sleep(max(wait, 0.001))
+
+    def report_429(self, key: str, retry_after: Optional[float] = None):
+        self._buckets[key].penalize(retry_after if retry_after is not None else self.cooldown)
+        with self._lock:
+            self._rate_limited[key] += 1
+
+    def stats(self) -> dict:
+        """Key（只显示末尾4位）-> 请求次数 / 429 次数 / 当前可用令牌"""
+        with self._lock:
+            return {
+                f"...{key[-4:]}": {
+                    "requests": self._requests[key],
+                    "rate_limited": self._rate_limited[key],
+                    "available": round(bucket.available(), 2),
+                }
+                for key, bucket in self._buckets.items()
+            }
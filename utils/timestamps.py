@@ -0,0 +1,73 @@
+# -*- coding: utf-8 -*-
+"""
+unix 毫秒 <-> pendulum.DateTime 的转换
+
+DB 里的时间列都是 unix 毫秒（int）。这里的转换全部用整数运算，不经过 float，
+往返转换（毫秒 -> DateTime -> 毫秒）结果不变。时区对象按名字缓存。
+
+只需要比较大小的地方直接比较毫秒；需要日历计算（月初、天数等）时才创建 DateTime，
+模型类用 LazyDate 在第一次访问时才转换。
+"""
+import datetime
+from typing import Optional, Union
+import pendulum
+
+SHANGHAI = pendulum.timezone('Asia/Shanghai')
+
+_timezones: dict[str, pendulum.Timezone] = {'Asia/Shanghai': SHANGHAI}
+
+_EPOCH = datetime.datetime(1970, 1, 1, tzinfo=datetime.timezone.utc)
+# pendulum.DateTime 的减法返回 Interval（较慢），这里直接用 datetime 的减法取得 timedelta
+_datetime_sub = datetime.datetime.__sub__
+
+
+def get_timezone(tz: Union[str, pendulum.Timezone]) -> pendulum.Timezone:
+    """时区名 -> Timezone（进程内缓存）"""
+    if not isinstance(tz, str):
+        return tz
+    result = _timezones.get(tz)
+    if result is None:
+        result = pendulum.timezone(tz)
+        _timezones[tz] = result
+    return result
+
+
+def ms_to_date(ms: int, tz: Union[str, pendulum.Timezone] = SHANGHAI) -> pendulum.DateTime:
+    """unix 毫秒 -> DateTime（与 pendulum.from_timestamp(ms / 1000, tz) 相同的时刻，但没有 float 误差）"""
+    tz = get_timezone(tz)
+    seconds, millis = divmod(int(ms), 1000)
+    dt = datetime.datetime.fromtimestamp(seconds, tz)
+    return pendulum.DateTime(
+        dt.year, dt.month, dt.day, dt.hour, dt.minute, dt.second, millis * 1000, tzinfo=tz, fold=dt.fold
+    )
+
+
+def date_to_ms(date: datetime.datetime) -> int:
+    """带时区的 DateTime -> unix 毫秒（整数运算，毫秒以下切り捨て）"""
+    delta = _datetime_sub(date, _EPOCH)
+    return (delta.days * 86400 + delta.seconds) * 1000 + delta.microseconds // 1000
+
+
+def now_ms() -> int:
+    return date_to_ms(pendulum.now(SHANGHAI))
+
+
+class LazyDate:
+    """
+    毫秒属性对应的 DateTime 属性：第一次访问时由 ms_attr 转换并缓存到实例的 __dict__，
+    之后的访问不再经过这里。毫秒值为空/0 时为 None。
+    """
+
+    def __init__(self, ms_attr: str):
+        self.ms_attr = ms_attr
+
+    def __set_name__(self, owner, name):
+        self.name = name
+
+    def __get__(self, obj, owner=None) -> Optional[pendulum.DateTime]:
+        if obj is None:
+            return self
+        ms = getattr(obj, self.ms_attr)
+        value = ms_to_date(ms) if ms else None
+        obj.__dict__[self.name] = value
+        return value
@@ -2,6 +2,7 @@
 import pendulum
 from typing import Union, Optional
 from decimal import Decimal
+from utils.timestamps import ms_to_date, date_to_ms
 
 
 class SingletonUtils(object):
@@ -13,10 +14,10 @@ class SingletonUtils(object):
 
 class Utils(SingletonUtils):
     def int_to_date(self, i, tz: str = 'Asia/Shanghai') -> pendulum.DateTime:
-        return pendulum.from_timestamp(i / 1000.0, tz=tz)
+        return ms_to_date(i, tz)
 
     def date_to_int(self, date: pendulum.DateTime) -> int:
-        return int(date.timestamp() * 1e3)
+        return date_to_ms(date)
 
     def string_to_date(self, date_str: str, tz: str = 'Asia/Shanghai') -> pendulum.DateTime:
         result = pendulum.parse(date_str, tz=tz)